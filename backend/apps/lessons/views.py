@@ -7,7 +7,8 @@ from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
-from apps.users.achievements import check_achievements
+from apps.users import events
+from apps.users.idempotency import idempotent
 
 from .models import Lesson, Module, Quiz, UserLessonProgress, UserModuleProgress
 from .serializers import (
@@ -101,6 +102,7 @@ class LessonViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
     @action(detail=True, methods=["post"])
+    @idempotent
     def complete(self, request, pk=None):
         """Mark a lesson as completed."""
         lesson = self.get_object()
@@ -142,9 +144,9 @@ class LessonViewSet(viewsets.ModelViewSet):
         # Update module progress
         self._update_module_progress(user, lesson.module)
 
-        # Check for newly unlocked achievements
-        new_achievements = check_achievements(user)
-        user.refresh_from_db()
+        # Achievements are checked in the background once this commits;
+        # unlocked ones are pushed over the user's WebSocket.
+        events.emit(events.LESSON_COMPLETED, user.id)
 
         serializer = UserLessonProgressSerializer(progress)
         return Response(
@@ -155,10 +157,6 @@ class LessonViewSet(viewsets.ModelViewSet):
                 "new_level": user.level,
                 "xp_to_next_level": user.xp_to_next_level,
                 "streak_days": user.streak_days,
-                "new_achievements": [
-                    {"name": a.name, "icon": a.icon, "xp_reward": a.xp_reward}
-                    for a in new_achievements
-                ],
             }
         )
 
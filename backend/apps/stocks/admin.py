@@ -4,7 +4,22 @@ Admin configuration for Stocks app.
 
 from django.contrib import admin
 
-from .models import Portfolio, Stock, StockPriceHistory, Transaction, Watchlist
+from .models import (
+    CorporateAction,
+    League,
+    LeagueMembership,
+    Order,
+    Portfolio,
+    PortfolioSnapshot,
+    PriceAlert,
+    RecurringOrder,
+    Scenario,
+    Stock,
+    StockPriceHistory,
+    TaxLot,
+    Transaction,
+    Watchlist,
+)
 
 
 @admin.register(Stock)
@@ -23,7 +38,7 @@ class StockAdmin(admin.ModelAdmin):
     search_fields = ["symbol", "name"]
     readonly_fields = ["last_updated"]
 
-    @admin.display(description="Change %")
+    @admin.display(description="Change %", ordering="price_change_percent")
     def price_change_display(self, obj):
         change = obj.price_change_percent
         sign = "+" if change >= 0 else ""
@@ -39,6 +54,24 @@ class StockPriceHistoryAdmin(admin.ModelAdmin):
     date_hierarchy = "timestamp"
 
 
+@admin.register(CorporateAction)
+class CorporateActionAdmin(admin.ModelAdmin):
+    """Admin for CorporateAction model."""
+
+    list_display = [
+        "stock",
+        "action_type",
+        "ex_date",
+        "ratio",
+        "amount",
+        "applied_at",
+        "holders",
+    ]
+    list_filter = ["action_type", "stock"]
+    date_hierarchy = "ex_date"
+    readonly_fields = ["applied_at", "holders", "created_at"]
+
+
 @admin.register(Portfolio)
 class PortfolioAdmin(admin.ModelAdmin):
     """Admin for Portfolio model."""
@@ -83,3 +116,114 @@ class WatchlistAdmin(admin.ModelAdmin):
     list_display = ["user", "stock", "added_at"]
     list_filter = ["stock"]
     search_fields = ["user__username", "stock__symbol"]
+
+
+@admin.register(PriceAlert)
+class PriceAlertAdmin(admin.ModelAdmin):
+    """Admin for PriceAlert model."""
+
+    list_display = [
+        "watchlist",
+        "condition",
+        "target_price",
+        "percent",
+        "reference_price",
+        "is_active",
+        "triggered_at",
+    ]
+    list_filter = ["condition", "is_active"]
+    search_fields = ["watchlist__user__username", "watchlist__stock__symbol"]
+
+
+@admin.register(Order)
+class OrderAdmin(admin.ModelAdmin):
+    """Admin for Order model."""
+
+    list_display = [
+        "user",
+        "stock",
+        "order_type",
+        "transaction_type",
+        "shares",
+        "trigger_price",
+        "status",
+        "created_at",
+    ]
+    list_filter = ["status", "order_type", "transaction_type", "stock"]
+    search_fields = ["user__username", "stock__symbol"]
+
+
+@admin.register(RecurringOrder)
+class RecurringOrderAdmin(admin.ModelAdmin):
+    """Admin for RecurringOrder model."""
+
+    list_display = [
+        "user",
+        "stock",
+        "amount",
+        "frequency",
+        "next_run_at",
+        "is_active",
+        "last_status",
+    ]
+    list_filter = ["frequency", "is_active", "last_status", "stock"]
+    search_fields = ["user__username", "stock__symbol"]
+
+
+@admin.register(PortfolioSnapshot)
+class PortfolioSnapshotAdmin(admin.ModelAdmin):
+    """Admin for PortfolioSnapshot model."""
+
+    list_display = ["user", "date", "cash", "holdings_value", "nav"]
+    list_filter = ["date"]
+    search_fields = ["user__username"]
+
+
+@admin.register(TaxLot)
+class TaxLotAdmin(admin.ModelAdmin):
+    """Admin for TaxLot model."""
+
+    list_display = [
+        "user",
+        "stock",
+        "shares",
+        "remaining_shares",
+        "cost_per_share",
+        "acquired_at",
+    ]
+    list_filter = ["stock"]
+    search_fields = ["user__username", "stock__symbol"]
+
+
+class LeagueMembershipInline(admin.TabularInline):
+    """Inline for a league's members."""
+
+    model = LeagueMembership
+    extra = 0
+    raw_id_fields = ["user"]
+    readonly_fields = ["joined_at"]
+
+
+@admin.register(League)
+class LeagueAdmin(admin.ModelAdmin):
+    """Admin for League model."""
+
+    list_display = ["name", "owner", "start_date", "starting_balance", "created_at"]
+    search_fields = ["name", "owner__username", "invite_code"]
+    inlines = [LeagueMembershipInline]
+
+
+@admin.register(Scenario)
+class ScenarioAdmin(admin.ModelAdmin):
+    """Admin for Scenario model."""
+
+    list_display = [
+        "user",
+        "name",
+        "start_date",
+        "clock",
+        "initial_balance",
+        "cash_balance",
+        "created_at",
+    ]
+    search_fields = ["user__username", "name"]
@@ -0,0 +1,222 @@
+"""
+Price alerts on watchlist entries, evaluated on every price tick.
+
+Active alerts are kept in memory as thresholds in per-stock books sorted by
+price, the same structure the matching engine uses for resting orders (see
+orders.py): "above" alerts wait for the price to rise to their target,
+"below" alerts for it to fall to theirs, and "move" alerts have one
+threshold on each side of the price they were set at. A tick finds the
+crossed thresholds with one binary search per side and removes them as a
+slice, so its cost grows with the crossings, not with the alerts set.
+
+A stock split rescales the targets of the stock's active alerts in the
+database (see corporate_actions.py). Each tick checks whether a split was
+applied since the last one and, if so, reloads every book from the
+database, whichever process applied it.
+
+Crossed alerts are claimed with one conditional UPDATE per stock, so an
+alert deleted meanwhile or fired by another process is skipped. Once the
+claim commits, each user gets all of the tick's alerts in one message over
+ws/user/, and the messages to all users go out in one channel layer hop.
+"""
+
+import threading
+from collections import defaultdict
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from apps.users.notifications import notify_users
+
+from .models import CorporateAction, PriceAlert, Stock
+from .orders import SYNC_ID_OVERLAP, SymbolBook
+
+ALERTS_MESSAGE_TYPE = "price_alerts"
+
+
+def alert_thresholds(
+    condition: str,
+    target_price: Optional[Decimal],
+    percent: Optional[Decimal],
+    reference_price: Decimal,
+) -> List[Tuple[float, bool]]:
+    """An alert's (price, triggers_on_rise) thresholds."""
+    if condition == "above":
+        return [(float(target_price), True)]
+    if condition == "below":
+        return [(float(target_price), False)]
+    move = float(reference_price) * float(percent) / 100
+    return [
+        (float(reference_price) + move, True),
+        (float(reference_price) - move, False),
+    ]
+
+
+class AlertMonitor:
+    """
+    In-memory threshold books for all stocks, plus the tick handler that
+    fires crossed alerts.
+    """
+
+    def __init__(self):
+        self.books: Dict[int, SymbolBook] = defaultdict(SymbolBook)
+        self.known_ids: Set[int] = set()
+        self.max_alert_id = 0
+        self.applied_splits: Optional[Tuple[int, Optional[int]]] = None
+        self.lock = threading.Lock()
+
+    def clear(self) -> None:
+        """Drop every loaded alert, so the next sync reloads them all."""
+        with self.lock:
+            self.books.clear()
+            self.known_ids.clear()
+            self.max_alert_id = 0
+
+    def add(self, alert: PriceAlert) -> None:
+        """Add an active alert to its stock's book."""
+        self.load(
+            [
+                (
+                    alert.id,
+                    alert.watchlist.stock_id,
+                    alert.condition,
+                    alert.target_price,
+                    alert.percent,
+                    alert.reference_price,
+                )
+            ]
+        )
+
+    def load(self, rows: Iterable[tuple]) -> None:
+        """
+        Add (id, stock_id, condition, target_price, percent, reference_price)
+        rows of active alerts not loaded yet.
+        """
+        entries: Dict[int, List[Tuple[int, float, bool]]] = defaultdict(list)
+        with self.lock:
+            for alert_id, stock_id, *alert in rows:
+                if alert_id in self.known_ids:
+                    continue
+                self.known_ids.add(alert_id)
+                self.max_alert_id = max(self.max_alert_id, alert_id)
+                entries[stock_id].extend(
+                    (alert_id, price, triggers_on_rise)
+                    for price, triggers_on_rise in alert_thresholds(*alert)
+                )
+            for stock_id, stock_entries in entries.items():
+                self.books[stock_id].add_many(stock_entries)
+
+    def sync(self) -> None:
+        """
+        Load alerts set since the last sync (all of them at first, or after
+        a split rescaled the targets of loaded ones).
+        """
+        applied = CorporateAction.objects.filter(
+            action_type="split", applied_at__isnull=False
+        ).aggregate(count=Count("id"), last=Max("id"))
+        applied_splits = (applied["count"], applied["last"])
+        if self.applied_splits is not None and applied_splits != self.applied_splits:
+            self.clear()
+        self.applied_splits = applied_splits
+
+        self.load(
+            PriceAlert.objects.filter(
+                is_active=True, id__gt=max(0, self.max_alert_id - SYNC_ID_OVERLAP)
+            )
+            .order_by("id")
+            .values_list(
+                "id",
+                "watchlist__stock_id",
+                "condition",
+                "target_price",
+                "percent",
+                "reference_price",
+            )
+            .iterator(chunk_size=10000)
+        )
+
+    def crossed(self, stocks: Iterable[Stock]) -> Dict[int, Stock]:
+        """
+        Remove the alerts whose thresholds the new prices crossed and
+        return them with their stock. A move alert's other threshold is
+        left in its book and skipped when it is crossed later.
+        """
+        crossed: Dict[int, Stock] = {}
+        with self.lock:
+            for stock in stocks:
+                if stock.current_price <= 0 or stock.id not in self.books:
+                    continue
+                for alert_id in self.books[stock.id].pop_triggered(
+                    float(stock.current_price)
+                ):
+                    if alert_id in self.known_ids:
+                        self.known_ids.discard(alert_id)
+                        crossed[alert_id] = stock
+        return crossed
+
+    def on_tick(self, stocks: Iterable[Stock]) -> int:
+        """
+        Fire the alerts crossed by new stock prices.
+        Returns the number of alerts fired.
+        """
+        self.sync()
+        crossed = self.crossed(stocks)
+        if not crossed:
+            return 0
+        return self._fire(crossed)
+
+    @staticmethod
+    def _fire(crossed: Dict[int, Stock]) -> int:
+        """Claim crossed alerts and notify their users once committed."""
+        now = timezone.now()
+        with transaction.atomic():
+            alerts = list(
+                PriceAlert.objects.select_for_update(skip_locked=True, of=("self",))
+                .filter(id__in=list(crossed), is_active=True)
+                .values_list(
+                    "id", "watchlist__user_id", "condition", "target_price", "percent"
+                )
+            )
+            by_stock: Dict[int, List[int]] = defaultdict(list)
+            for alert_id, *_ in alerts:
+                by_stock[crossed[alert_id].id].append(alert_id)
+            stocks = {stock.id: stock for stock in crossed.values()}
+            for stock_id, alert_ids in by_stock.items():
+                PriceAlert.objects.filter(id__in=alert_ids).update(
+                    is_active=False,
+                    triggered_at=now,
+                    triggered_price=stocks[stock_id].current_price,
+                )
+
+            batches: Dict[int, List[dict]] = defaultdict(list)
+            for alert_id, user_id, condition, target_price, percent in alerts:
+                stock = crossed[alert_id]
+                batches[user_id].append(
+                    {
+                        "id": alert_id,
+                        "stock_id": stock.id,
+                        "symbol": stock.symbol,
+                        "condition": condition,
+                        "target_price": (
+                            float(target_price) if target_price is not None else None
+                        ),
+                        "percent": float(percent) if percent is not None else None,
+                        "price": float(stock.current_price),
+                        "triggered_at": now.isoformat(),
+                    }
+                )
+            transaction.on_commit(
+                lambda: notify_users(ALERTS_MESSAGE_TYPE, dict(batches))
+            )
+        return len(alerts)
+
+
+_monitor = AlertMonitor()
+
+
+def get_alert_monitor() -> AlertMonitor:
+    """Get this process's alert monitor."""
+    return _monitor
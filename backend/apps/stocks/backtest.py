@@ -0,0 +1,331 @@
+"""
+Vectorized backtesting of rule-based strategies over stored price history.
+
+A strategy is declarative: entry and exit rules compare indicators (price,
+moving averages, RSI, support/resistance levels), e.g.
+
+    {"left": {"indicator": "sma", "period": 20},
+     "op": "crosses_above",
+     "right": {"indicator": "sma", "period": 50}}
+
+Closing prices of all symbols are held in one (days x symbols) matrix and
+every step (indicators, signals, positions, equity) is computed on whole
+matrices with NumPy, so run time is nearly independent of the number of
+symbols and trades. Each symbol gets an equal share of the capital and
+invests position_size of it while in a position. Orders fill at the close
+of the day after their signal, so a rule never trades at the price it has
+just seen.
+"""
+
+from datetime import date
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from django.db.models.functions import TruncDate
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .models import Stock, StockPriceHistory
+from .performance import column_arrays
+
+TRADING_DAYS_PER_YEAR = 252
+
+INDICATORS = {"price", "sma", "ema", "rsi", "support", "resistance"}
+OPERATORS = {">", "<", "crosses_above", "crosses_below"}
+
+
+class BacktestError(Exception):
+    """A backtest that can't be run (invalid strategy or missing data)."""
+
+
+def parse_operand(operand) -> Tuple[str, int]:
+    """Validate a rule operand; returns (indicator, period)."""
+    if isinstance(operand, (int, float)) and not isinstance(operand, bool):
+        return "constant", 0
+    if not isinstance(operand, dict) or operand.get("indicator") not in INDICATORS:
+        raise BacktestError(
+            f"Operands must be numbers or objects with an indicator in: "
+            f"{', '.join(sorted(INDICATORS))}"
+        )
+    if operand["indicator"] == "price":
+        return "price", 0
+    period = operand.get("period")
+    if not isinstance(period, int) or isinstance(period, bool) or period < 1:
+        raise BacktestError(f"{operand['indicator']} needs a positive integer period")
+    return operand["indicator"], period
+
+
+def parse_rule(rule) -> None:
+    """Validate one rule, raising BacktestError."""
+    if not isinstance(rule, dict) or rule.get("op") not in OPERATORS:
+        raise BacktestError(
+            f"Rules need left, right and an op in: {', '.join(sorted(OPERATORS))}"
+        )
+    parse_operand(rule.get("left"))
+    parse_operand(rule.get("right"))
+
+
+def _shift(values: np.ndarray, periods: int = 1) -> np.ndarray:
+    """Shift rows down, filling the first rows with NaN (or False)."""
+    fill = False if values.dtype == bool else np.nan
+    shifted = np.full_like(values, fill)
+    shifted[periods:] = values[:-periods]
+    return shifted
+
+
+def _rolling(prices: np.ndarray, period: int, reduce) -> np.ndarray:
+    """Apply reduce over trailing windows of rows; the first rows are NaN."""
+    result = np.full_like(prices, np.nan)
+    if period <= len(prices):
+        windows = sliding_window_view(prices, period, axis=0)
+        result[period - 1 :] = reduce(windows, axis=-1)
+    return result
+
+
+def _ema(prices: np.ndarray, period: int) -> np.ndarray:
+    """
+    Exponential moving average, seeded with each symbol's first price.
+    Recursive, so it steps through the days, but each step covers all symbols.
+    """
+    alpha = 2 / (period + 1)
+    result = np.empty_like(prices)
+    current = np.full(prices.shape[1], np.nan)
+    for index, row in enumerate(prices):
+        current = np.where(np.isnan(current), row, current + alpha * (row - current))
+        result[index] = current
+    return result
+
+
+def _rsi(prices: np.ndarray, period: int) -> np.ndarray:
+    """RSI with simple averages of gains and losses over the period."""
+    change = np.diff(prices, axis=0, prepend=np.nan)
+    gains = _rolling(np.clip(change, 0, None), period, np.mean)
+    losses = _rolling(np.clip(-change, 0, None), period, np.mean)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(losses == 0, 100.0, 100 - 100 / (1 + gains / losses))
+
+
+def indicator(prices: np.ndarray, operand) -> np.ndarray:
+    """Evaluate an operand for every day and symbol."""
+    name, period = parse_operand(operand)
+    if name == "constant":
+        return np.full_like(prices, float(operand))
+    if name == "price":
+        return prices
+    if name == "sma":
+        return _rolling(prices, period, np.mean)
+    if name == "ema":
+        return _ema(prices, period)
+    if name == "rsi":
+        return _rsi(prices, period)
+    # Support/resistance: lowest/highest close of the previous period days
+    reduce = np.min if name == "support" else np.max
+    return _shift(_rolling(prices, period, reduce))
+
+
+def signal(prices: np.ndarray, rules: Sequence[dict]) -> np.ndarray:
+    """Days and symbols on which all rules hold."""
+    result = np.ones(prices.shape, dtype=bool)
+    for rule in rules:
+        left = indicator(prices, rule["left"])
+        right = indicator(prices, rule["right"])
+        with np.errstate(invalid="ignore"):
+            if rule["op"] == ">":
+                holds = left > right
+            elif rule["op"] == "<":
+                holds = left < right
+            elif rule["op"] == "crosses_above":
+                holds = (left > right) & (_shift(left) <= _shift(right))
+            else:
+                holds = (left < right) & (_shift(left) >= _shift(right))
+        result &= holds
+    return result
+
+
+def forward_fill(values: np.ndarray) -> np.ndarray:
+    """Replace NaNs with the last non-NaN value above them, per column."""
+    rows = np.where(~np.isnan(values), np.arange(len(values))[:, None], 0)
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    return np.take_along_axis(values, rows, axis=0)
+
+
+def run_backtest(
+    prices: np.ndarray,
+    entry: Sequence[dict],
+    exit: Sequence[dict],
+    initial_capital: float,
+    position_size: float = 1.0,
+) -> dict:
+    """
+    Run a strategy over a (days x symbols) matrix of closing prices
+    (NaN before a symbol has data).
+
+    Returns the equity curve (days) and the trades as arrays of symbol
+    index, entry day and exit day (-1 for a trade still open at the end).
+    """
+    days, symbols = prices.shape
+    entries = signal(prices, entry)
+    exits = signal(prices, exit) if exit else np.zeros_like(entries)
+
+    # Wanted position: from an entry signal until the next exit signal
+    state = np.where(entries, 1.0, np.where(exits, 0.0, np.nan))
+    state[0] = np.where(np.isnan(state[0]), 0.0, state[0])
+    state = forward_fill(state)
+
+    # Orders fill at the close of the day after the signal, so the position
+    # earns the price change from the day after that.
+    exposed = np.zeros_like(state)
+    exposed[2:] = state[:-2]
+
+    # Each symbol's sleeve holds cash plus shares bought at the entry close,
+    # so while exposed it is worth (1 - size) + size * price / entry price.
+    opened = (exposed == 1) & (_shift(exposed) != 1)
+    entry_price = forward_fill(np.where(opened, _shift(prices), np.nan))
+    held = prices / entry_price
+    previous_held = np.where(opened, 1.0, _shift(held))
+    with np.errstate(invalid="ignore"):
+        growth = np.where(
+            exposed == 1,
+            (1 - position_size + position_size * held)
+            / (1 - position_size + position_size * previous_held),
+            1.0,
+        )
+    sleeves = np.cumprod(growth, axis=0) * (initial_capital / symbols)
+
+    # Trades start on the day before the first exposed day (the fill) and
+    # end on the last exposed day; both lists sort by symbol, then day.
+    changes = np.diff(exposed, axis=0, prepend=0, append=0).T
+    starts = np.argwhere(changes == 1)
+    ends = np.argwhere(changes == -1)
+    exit_days = ends[:, 1] - 1
+    exit_days[ends[:, 1] == days] = -1
+    return {
+        "equity": sleeves.sum(axis=1),
+        "trade_symbols": starts[:, 0],
+        "trade_entry_days": starts[:, 1] - 1,
+        "trade_exit_days": exit_days,
+    }
+
+
+def statistics(equity: np.ndarray) -> dict:
+    """Total return, maximum drawdown and annualized Sharpe ratio."""
+    returns = equity[1:] / equity[:-1] - 1
+    drawdown = equity / np.maximum.accumulate(equity) - 1
+    volatility = returns.std() if len(returns) else 0
+    return {
+        "total_return_percent": float((equity[-1] / equity[0] - 1) * 100),
+        "max_drawdown_percent": float(drawdown.min() * 100),
+        "sharpe_ratio": (
+            float(returns.mean() / volatility * np.sqrt(TRADING_DAYS_PER_YEAR))
+            if volatility
+            else 0.0
+        ),
+        "drawdown": drawdown,
+    }
+
+
+def load_close_prices(
+    symbols: Sequence[str],
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+) -> Tuple[np.ndarray, List[str], np.ndarray]:
+    """
+    Load daily closes from StockPriceHistory as a (days x symbols) matrix.
+    Returns (dates, symbols found, prices); gaps carry the last close.
+    """
+    stock_symbols = dict(
+        Stock.objects.filter(symbol__in=symbols).values_list("id", "symbol")
+    )
+    history = StockPriceHistory.objects.filter(stock_id__in=list(stock_symbols))
+    if start:
+        history = history.filter(timestamp__date__gte=start)
+    if end:
+        history = history.filter(timestamp__date__lte=end)
+    stock_ids, days, closes = column_arrays(
+        history.order_by().annotate(day=TruncDate("timestamp")),
+        ["stock_id", "day", "close_price"],
+        [np.int64, "datetime64[D]", np.float64],
+    )
+    if not len(days):
+        return days, [], np.empty((0, 0))
+
+    dates, day_index = np.unique(days, return_inverse=True)
+    found_ids, symbol_index = np.unique(stock_ids, return_inverse=True)
+    found = [stock_symbols[stock_id] for stock_id in found_ids.tolist()]
+
+    prices = np.full((len(dates), len(found)), np.nan)
+    prices[day_index, symbol_index] = closes
+    return dates, found, forward_fill(prices)
+
+
+class BacktestService:
+    """
+    Service class for running backtests over stored price history.
+    """
+
+    @staticmethod
+    def run(
+        symbols: Sequence[str],
+        entry: Sequence[dict],
+        exit: Sequence[dict],
+        initial_capital: float,
+        position_size: float,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+    ) -> dict:
+        """Backtest a strategy and format the results for the API."""
+        dates, found, prices = load_close_prices(symbols, start, end)
+        missing = sorted(set(symbols) - set(found))
+        if missing:
+            raise BacktestError(f"No price history for: {', '.join(missing)}")
+        if len(dates) < 2:
+            raise BacktestError("Not enough price history in the selected range")
+
+        result = run_backtest(prices, entry, exit, initial_capital, position_size)
+        stats = statistics(result["equity"])
+        day_labels = [str(day) for day in dates]
+
+        trades = []
+        for symbol_index, entry_day, exit_day in zip(
+            result["trade_symbols"].tolist(),
+            result["trade_entry_days"].tolist(),
+            result["trade_exit_days"].tolist(),
+        ):
+            entry_price = float(prices[entry_day, symbol_index])
+            closed = exit_day >= 0
+            exit_price = float(prices[exit_day, symbol_index]) if closed else None
+            trades.append(
+                {
+                    "symbol": found[symbol_index],
+                    "entry_date": day_labels[entry_day],
+                    "entry_price": round(entry_price, 2),
+                    "exit_date": day_labels[exit_day] if closed else None,
+                    "exit_price": round(exit_price, 2) if closed else None,
+                    "return_percent": (
+                        round((exit_price / entry_price - 1) * 100, 2)
+                        if closed
+                        else None
+                    ),
+                }
+            )
+        trades.sort(key=lambda trade: (trade["entry_date"], trade["symbol"]))
+
+        return {
+            "symbols": found,
+            "start": day_labels[0],
+            "end": day_labels[-1],
+            "initial_capital": initial_capital,
+            "final_equity": round(float(result["equity"][-1]), 2),
+            "total_return_percent": round(stats["total_return_percent"], 2),
+            "max_drawdown_percent": round(stats["max_drawdown_percent"], 2),
+            "sharpe_ratio": round(stats["sharpe_ratio"], 3),
+            "trades_count": len(trades),
+            "equity_curve": [
+                {"date": day, "equity": round(value, 2), "drawdown": round(dd, 4)}
+                for day, value, dd in zip(
+                    day_labels,
+                    result["equity"].tolist(),
+                    stats["drawdown"].tolist(),
+                )
+            ],
+            "trades": trades,
+        }
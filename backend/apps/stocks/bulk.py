@@ -0,0 +1,76 @@
+"""
+Multi-row write statements for the bulk jobs.
+
+Under psycopg2, cursor.executemany() sends one statement per row. These
+helpers send one statement per batch of BULK_BATCH_SIZE rows instead: an
+INSERT with a multi-row VALUES list (optionally an upsert), and an UPDATE
+joined to a VALUES list of (key, new values) rows.
+"""
+
+from typing import Iterable, List, Sequence
+
+BULK_BATCH_SIZE = 1000
+
+
+def _batches(rows: Iterable[Sequence], batch_size: int) -> Iterable[List[Sequence]]:
+    batch: List[Sequence] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _values(batch: List[Sequence], width: int) -> str:
+    row = "(" + ", ".join(["%s"] * width) + ")"
+    return ", ".join([row] * len(batch))
+
+
+def insert_values(
+    cursor,
+    table: str,
+    columns: Sequence[str],
+    rows: Iterable[Sequence],
+    conflict: Sequence[str] = (),
+    update: Sequence[str] = (),
+    batch_size: int = BULK_BATCH_SIZE,
+) -> None:
+    """
+    INSERT rows into table, batch_size rows per statement. With conflict
+    columns, rows that conflict on them update the update columns instead.
+    """
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES "
+    suffix = ""
+    if conflict:
+        suffix = f" ON CONFLICT ({', '.join(conflict)}) DO UPDATE SET " + ", ".join(
+            f"{column} = EXCLUDED.{column}" for column in update
+        )
+    for batch in _batches(rows, batch_size):
+        cursor.execute(
+            sql + _values(batch, len(columns)) + suffix,
+            [value for row in batch for value in row],
+        )
+
+
+def update_from_values(
+    cursor,
+    table: str,
+    key: str,
+    columns: Sequence[str],
+    rows: Iterable[Sequence],
+    batch_size: int = BULK_BATCH_SIZE,
+) -> None:
+    """
+    Set columns of the table rows whose key is each row's first value to
+    the row's other values, batch_size rows per statement.
+    """
+    names = [key, *columns]
+    assignments = ", ".join(f"{column} = v.{column}" for column in columns)
+    for batch in _batches(rows, batch_size):
+        cursor.execute(
+            f"WITH v ({', '.join(names)}) AS (VALUES {_values(batch, len(names))}) "
+            f"UPDATE {table} SET {assignments} FROM v WHERE {table}.{key} = v.{key}",
+            [value for row in batch for value in row],
+        )
@@ -3,6 +3,9 @@ Stock configuration for FinLearn.
 Easy to modify - just change this list to update tracked stocks.
 """
 
+from datetime import time
+from pathlib import Path
+
 # List of stocks to track
 # Format: (symbol, company_name, sector)
 TRACKED_STOCKS = [
@@ -24,5 +27,65 @@ STOCK_SYMBOLS = [stock[0] for stock in TRACKED_STOCKS]
 # Stock update interval in seconds (for WebSocket)
 UPDATE_INTERVAL = 30  # Update every 30 seconds
 
+# Market replay (python manage.py replay_market): playback speed as a
+# multiple of real trading time (39 plays a 6.5-hour session in 10 minutes)
+# and the number of price ticks generated per replayed trading day
+REPLAY_SPEED = 39
+REPLAY_TICKS_PER_DAY = 60
+
+# Where and when the tracked stocks' trading session closes: a daily bar's
+# close is only visible to scenario clocks from then on
+MARKET_TIMEZONE = "America/New_York"
+MARKET_CLOSE = time(16, 0)
+
+# Seconds a process keeps its in-memory price history (time-travel
+# scenarios, risk analytics) before reloading it (loading new history also reloads it)
+PRICE_TIMELINE_TTL = 3600
+
+# Risk analytics: daily returns used (252 = one year) and the benchmark for
+# beta, a tracked symbol or None for the equal-weighted tracked stocks
+RISK_LOOKBACK_DAYS = 252
+RISK_BENCHMARK = None
+
+# Annual risk-free rate used in the optimizer's Sharpe ratios
+RISK_FREE_RATE = 0.0
+
+# Monte Carlo projections (ws/projection/): worker processes per server
+# process, paths per worker task (one progress message each), limits and
+# the days sampled per path (evenly spaced, at most 50,000 x 126 float32
+# values, 25 MB, are gathered in the server process)
+PROJECTION_WORKERS = 2
+PROJECTION_CHUNK_PATHS = 1000
+PROJECTION_MAX_PATHS = 50_000
+PROJECTION_MAX_DAYS = 1260
+PROJECTION_POINTS = 126
+
+# Recurring buys (python manage.py run_recurring_orders): due orders
+# executed per transaction
+RECURRING_ORDER_CHUNK_SIZE = 5000
+
+# Seconds a process keeps its in-memory leaderboards (updated on each price
+# tick and on read) before rebuilding them from the database
+LEADERBOARD_TTL = 3600
+
+# Seconds a user's cached trading statistics are kept. Entries are keyed
+# by the user's latest transaction, so a new trade already bypasses them.
+STATS_CACHE_TTL = 3600
+
+# Corporate actions (python manage.py apply_corporate_actions): the feed,
+# "local" (a JSON file, see README) or "yfinance"; the local feed's file;
+# and the days before and after today fetched on each run (missed runs
+# catch up within the lookback, upcoming actions are recorded ahead)
+CORPORATE_ACTIONS_FEED = "local"
+CORPORATE_ACTIONS_FILE = Path(__file__).resolve().parents[2] / "corporate_actions.json"
+CORPORATE_ACTIONS_LOOKBACK_DAYS = 7
+CORPORATE_ACTIONS_HORIZON_DAYS = 30
+
+# Name of the shared-memory quote board shared by all worker processes
+QUOTE_BOARD_NAME = "finlearn_quotes"
+
+# Order in which sells consume tax lots: "fifo" (oldest first) or "lifo"
+TAX_LOT_METHOD = "fifo"
+
 # Initial virtual balance for new users
 INITIAL_VIRTUAL_BALANCE = 100000.00
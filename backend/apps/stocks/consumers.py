@@ -4,12 +4,24 @@ WebSocket consumers for real-time stock data.
 
 import asyncio
 import json
+import logging
+from decimal import Decimal
 
 from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 
-from .config import UPDATE_INTERVAL
+from .backtest import TRADING_DAYS_PER_YEAR
+from .config import PROJECTION_MAX_DAYS, PROJECTION_MAX_PATHS, UPDATE_INTERVAL
+from .projection import ProjectionError, ProjectionService
 from .services import StockService
+from .streams import (
+    STOCK_PRICES_GROUP,
+    holder_group_name,
+    portfolio_group_name,
+    stock_payload,
+)
+
+logger = logging.getLogger(__name__)
 
 
 class StockPriceConsumer(AsyncWebsocketConsumer):
@@ -20,8 +32,9 @@ class StockPriceConsumer(AsyncWebsocketConsumer):
 
     async def connect(self):
         """Handle WebSocket connection."""
-        self.room_group_name = "stock_prices"
+        self.room_group_name = STOCK_PRICES_GROUP
         self.update_task = None
+        self.price_version = None
 
         # Join room group
         await self.channel_layer.group_add(self.room_group_name, self.channel_name)
@@ -61,16 +74,28 @@ class StockPriceConsumer(AsyncWebsocketConsumer):
             await self.send(text_data=json.dumps({"error": "Invalid JSON"}))
 
     async def periodic_update(self):
-        """Periodically send stock price updates."""
+        """Periodically send stock price updates, skipping unchanged snapshots."""
         while True:
             await asyncio.sleep(UPDATE_INTERVAL)
-            await self.send_stock_prices()
+            await self.send_stock_prices(only_if_changed=True)
+
+    async def send_stock_prices(self, only_if_changed: bool = False):
+        """
+        Fetch and send current stock prices.
+        The snapshot carries the same version token used as the REST ETag.
+        """
+        price_version = await database_sync_to_async(StockService.get_price_version)()
+        version = price_version[0] if price_version else None
+
+        if only_if_changed and version is not None and version == self.price_version:
+            return
 
-    async def send_stock_prices(self):
-        """Fetch and send current stock prices."""
         stocks = await self.get_stocks_from_db()
+        self.price_version = version
 
-        await self.send(text_data=json.dumps({"type": "prices", "data": stocks}))
+        await self.send(
+            text_data=json.dumps({"type": "prices", "version": version, "data": stocks})
+        )
 
     async def send_stock_history(self, symbol: str, period: str):
         """Fetch and send stock price history."""
@@ -91,31 +116,245 @@ class StockPriceConsumer(AsyncWebsocketConsumer):
 
     @database_sync_to_async
     def get_stocks_from_db(self):
-        """Get all stocks from database."""
+        """Get all stocks from the shared quote board, or the database."""
         from .models import Stock
 
-        stocks = Stock.objects.all()
-
-        return [
-            {
-                "id": stock.id,
-                "symbol": stock.symbol,
-                "name": stock.name,
-                "sector": stock.sector,
-                "current_price": float(stock.current_price),
-                "previous_close": float(stock.previous_close),
-                "day_high": float(stock.day_high),
-                "day_low": float(stock.day_low),
-                "volume": stock.volume,
-                "price_change": float(stock.price_change),
-                "price_change_percent": float(stock.price_change_percent),
-                "last_updated": (
-                    stock.last_updated.isoformat() if stock.last_updated else None
-                ),
-            }
-            for stock in stocks
-        ]
+        stocks = StockService.get_stock_snapshot()
+        if stocks is None:
+            stocks = Stock.objects.all()
+
+        return [stock_payload(stock) for stock in stocks]
 
     async def stock_price_update(self, event):
         """Handle stock price update from channel layer."""
-        await self.send(text_data=json.dumps({"type": "prices", "data": event["data"]}))
+        self.price_version = event.get("version")
+        await self.send(
+            text_data=json.dumps(
+                {
+                    "type": "prices",
+                    "version": self.price_version,
+                    "data": event["data"],
+                }
+            )
+        )
+
+
+class PortfolioConsumer(AsyncWebsocketConsumer):
+    """
+    Authenticated WebSocket streaming the connected user's portfolio value.
+
+    Holdings are loaded once and cached; the connection joins the holder
+    group of each stock held, so price ticks only arrive for those stocks
+    and are revalued in memory without touching the database. Holdings are
+    reloaded when the user trades.
+    """
+
+    async def connect(self):
+        """Accept authenticated connections and subscribe to their holdings."""
+        user = self.scope.get("user")
+        if user is None or not user.is_authenticated:
+            await self.close()
+            return
+
+        self.user_id = user.id
+        self.holdings = {}
+        self.virtual_balance = Decimal("0")
+        self.group_name = portfolio_group_name(self.user_id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+        await self.reload_holdings()
+        await self.send_valuation()
+
+    async def disconnect(self, close_code):
+        """Leave the portfolio group and every holder group."""
+        if not hasattr(self, "group_name"):
+            return
+        await self.channel_layer.group_discard(self.group_name, self.channel_name)
+        for stock_id in self.holdings:
+            await self.channel_layer.group_discard(
+                holder_group_name(stock_id), self.channel_name
+            )
+
+    async def reload_holdings(self):
+        """Reload holdings and move between holder groups to match them."""
+        holdings, self.virtual_balance = await self.get_holdings()
+
+        for stock_id in self.holdings.keys() - holdings.keys():
+            await self.channel_layer.group_discard(
+                holder_group_name(stock_id), self.channel_name
+            )
+        for stock_id in holdings.keys() - self.holdings.keys():
+            await self.channel_layer.group_add(
+                holder_group_name(stock_id), self.channel_name
+            )
+        self.holdings = holdings
+
+    @database_sync_to_async
+    def get_holdings(self):
+        """Get {stock_id: holding} and the virtual balance for the user."""
+        from django.contrib.auth import get_user_model
+
+        from .models import Portfolio
+
+        holdings = {
+            row["stock_id"]: row
+            for row in Portfolio.objects.filter(
+                user_id=self.user_id, shares__gt=0
+            ).values(
+                "stock_id",
+                "stock__symbol",
+                "shares",
+                "average_buy_price",
+                "stock__current_price",
+            )
+        }
+        balance = (
+            get_user_model()
+            .objects.filter(pk=self.user_id)
+            .values_list("virtual_balance", flat=True)
+            .first()
+        )
+        return holdings, balance or Decimal("0")
+
+    async def send_valuation(self):
+        """Send the portfolio valued at the latest known prices."""
+        total_value = Decimal("0")
+        total_cost = Decimal("0")
+        holdings = []
+        for stock_id, row in self.holdings.items():
+            value = row["shares"] * row["stock__current_price"]
+            cost = row["shares"] * row["average_buy_price"]
+            total_value += value
+            total_cost += cost
+            holdings.append(
+                {
+                    "stock_id": stock_id,
+                    "symbol": row["stock__symbol"],
+                    "shares": float(row["shares"]),
+                    "current_price": float(row["stock__current_price"]),
+                    "current_value": float(value),
+                    "profit_loss": float(value - cost),
+                }
+            )
+
+        total_profit_loss = total_value - total_cost
+        await self.send(
+            text_data=json.dumps(
+                {
+                    "type": "portfolio",
+                    "data": {
+                        "total_value": float(total_value),
+                        "total_cost": float(total_cost),
+                        "total_profit_loss": float(total_profit_loss),
+                        "profit_loss_percent": (
+                            float(total_profit_loss / total_cost * 100)
+                            if total_cost
+                            else 0
+                        ),
+                        "holdings_count": len(holdings),
+                        "virtual_balance": float(self.virtual_balance),
+                        "holdings": holdings,
+                    },
+                }
+            )
+        )
+
+    async def portfolio_tick(self, event):
+        """Revalue the portfolio at a held stock's new price."""
+        row = self.holdings.get(event["stock_id"])
+        if row is None:
+            return  # Sold since the tick was sent
+        row["stock__current_price"] = Decimal(str(event["price"]))
+        await self.send_valuation()
+
+    async def portfolio_changed(self, event):
+        """Reload holdings after a trade and send the new valuation."""
+        await self.reload_holdings()
+        await self.send_valuation()
+
+
+class ProjectionConsumer(AsyncWebsocketConsumer):
+    """
+    Authenticated WebSocket running Monte Carlo projections of the user's
+    portfolio. The simulation runs in a process pool; progress messages
+    arrive as chunks of paths finish, followed by the percentile bands.
+    """
+
+    async def connect(self):
+        """Accept authenticated connections."""
+        user = self.scope.get("user")
+        if user is None or not user.is_authenticated:
+            await self.close()
+            return
+
+        self.user = user
+        self.task = None
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        """Stop a running projection."""
+        if getattr(self, "task", None):
+            self.task.cancel()
+
+    async def receive(self, text_data):
+        """Handle {"action": "project", "days": 252, "paths": 10000}."""
+        try:
+            data = json.loads(text_data)
+        except json.JSONDecodeError:
+            await self.send(text_data=json.dumps({"error": "Invalid JSON"}))
+            return
+        if data.get("action") != "project":
+            return
+
+        if self.task and not self.task.done():
+            await self.send(
+                text_data=json.dumps({"error": "A projection is already running"})
+            )
+            return
+
+        days = data.get("days", TRADING_DAYS_PER_YEAR)
+        paths = data.get("paths", 10_000)
+        if not (
+            isinstance(days, int)
+            and isinstance(paths, int)
+            and 1 <= days <= PROJECTION_MAX_DAYS
+            and 1 <= paths <= PROJECTION_MAX_PATHS
+        ):
+            await self.send(
+                text_data=json.dumps(
+                    {
+                        "error": f"days must be 1-{PROJECTION_MAX_DAYS} and "
+                        f"paths 1-{PROJECTION_MAX_PATHS}"
+                    }
+                )
+            )
+            return
+
+        self.task = asyncio.create_task(self.project(days, paths))
+
+    async def project(self, days: int, paths: int):
+        """
+        Run one projection and send its progress and result, or an error:
+        nothing awaits this task, so its exceptions would go unreported.
+        """
+        try:
+            await self._project(days, paths)
+        except ProjectionError as e:
+            await self.send(text_data=json.dumps({"error": str(e)}))
+        except Exception:
+            logger.exception("Projection failed")
+            await self.send(text_data=json.dumps({"error": "Projection failed"}))
+
+    async def _project(self, days: int, paths: int):
+        inputs = await database_sync_to_async(ProjectionService.get_inputs)(self.user)
+
+        async def on_progress(done: int, total: int):
+            await self.send(
+                text_data=json.dumps(
+                    {"type": "projection_progress", "done": done, "total": total}
+                )
+            )
+
+        result = await ProjectionService.run(inputs, days, paths, on_progress)
+        await self.send(text_data=json.dumps({"type": "projection", "data": result}))
@@ -0,0 +1,350 @@
+"""
+Corporate actions (stock splits and cash dividends) applied to holdings.
+
+Actions come from a feed: a local JSON file standing in for a provider,
+or yfinance. The apply_corporate_actions job records new ones and applies
+each due action (ex-date today or earlier) once, in one transaction, with
+one set-based UPDATE per table however many users hold the stock:
+
+- a split by r multiplies shares by r and divides prices by r in every
+  position, open tax lot and scenario position, divides the prices (and
+  multiplies the volume) of the bars before the ex-date, divides the
+  prices of the stock's active alerts, adjusts the quote if it predates
+  the ex-date and cancels the stock's open orders;
+- a dividend credits shares times the amount per share, to the cent, to
+  the cash balance of every holder.
+
+Holders are those holding the stock when the action is applied, so the
+job should run before trading opens on the ex-date.
+"""
+
+import json
+import logging
+from datetime import date, datetime
+from datetime import time as day_time
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+import yfinance as yf
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import (
+    BigIntegerField,
+    DecimalField,
+    ExpressionWrapper,
+    F,
+    OuterRef,
+    Subquery,
+    Value,
+)
+from django.db.models.functions import Cast, Round
+from django.utils import timezone
+
+from .config import CORPORATE_ACTIONS_FEED, CORPORATE_ACTIONS_FILE
+from .models import (
+    CorporateAction,
+    Order,
+    Portfolio,
+    PriceAlert,
+    ScenarioPosition,
+    Stock,
+    StockPriceHistory,
+    TaxLot,
+)
+from .streams import notify_portfolios_changed
+from .timeline import invalidate_price_timeline
+
+logger = logging.getLogger(__name__)
+
+RATIO_STEP = Decimal("0.000001")
+AMOUNT_STEP = Decimal("0.0001")
+
+SPLIT_CANCEL_REASON = "Cancelled by a stock split"
+
+
+class CorporateActionData(NamedTuple):
+    """A corporate action as reported by a feed."""
+
+    symbol: str
+    action_type: str  # "split" or "dividend"
+    ex_date: date
+    ratio: Optional[Decimal] = None  # Split: new shares per old share
+    amount: Optional[Decimal] = None  # Dividend: cash per share
+
+
+class LocalCorporateActionFeed:
+    """
+    Actions read from a JSON file: a list of objects such as
+    {"symbol": "AAPL", "type": "split", "ex_date": "2020-08-31", "ratio": "4"}
+    or {"symbol": "KO", "type": "dividend", "ex_date": "2024-06-14",
+    "amount": "0.485"}. A missing file is an empty feed.
+    """
+
+    def __init__(self, path: Path = CORPORATE_ACTIONS_FILE):
+        self.path = Path(path)
+
+    def fetch(
+        self, symbols: Iterable[str], start: date, end: date
+    ) -> List[CorporateActionData]:
+        if not self.path.exists():
+            return []
+        symbols = set(symbols)
+        actions = []
+        for entry in json.loads(self.path.read_text()):
+            try:
+                action = CorporateActionData(
+                    symbol=entry["symbol"],
+                    action_type=entry["type"],
+                    ex_date=date.fromisoformat(entry["ex_date"]),
+                    ratio=(
+                        Decimal(str(entry["ratio"]))
+                        if entry["type"] == "split"
+                        else None
+                    ),
+                    amount=(
+                        Decimal(str(entry["amount"]))
+                        if entry["type"] == "dividend"
+                        else None
+                    ),
+                )
+            except (KeyError, TypeError, ValueError, InvalidOperation):
+                logger.warning(f"Skipping malformed corporate action: {entry!r}")
+                continue
+            if action.symbol in symbols and start <= action.ex_date <= end:
+                actions.append(action)
+        return actions
+
+
+class YFinanceCorporateActionFeed:
+    """Past splits and dividends reported by yfinance."""
+
+    def fetch(
+        self, symbols: Iterable[str], start: date, end: date
+    ) -> List[CorporateActionData]:
+        actions = []
+        for symbol in symbols:
+            try:
+                ticker = yf.Ticker(symbol)
+                reported = [
+                    ("split", ticker.splits),
+                    ("dividend", ticker.dividends),
+                ]
+            except Exception as e:
+                logger.error(f"Error fetching corporate actions for {symbol}: {e}")
+                continue
+            for action_type, series in reported:
+                for timestamp, value in series.items():
+                    ex_date = timestamp.date()
+                    if not start <= ex_date <= end or not value:
+                        continue
+                    value = Decimal(str(value))
+                    actions.append(
+                        CorporateActionData(
+                            symbol,
+                            action_type,
+                            ex_date,
+                            ratio=value if action_type == "split" else None,
+                            amount=value if action_type == "dividend" else None,
+                        )
+                    )
+        return actions
+
+
+CORPORATE_ACTION_FEEDS = {
+    "local": LocalCorporateActionFeed,
+    "yfinance": YFinanceCorporateActionFeed,
+}
+
+
+def get_corporate_action_feed():
+    """The feed configured by CORPORATE_ACTIONS_FEED."""
+    return CORPORATE_ACTION_FEEDS[CORPORATE_ACTIONS_FEED]()
+
+
+def day_start(day: date) -> datetime:
+    """Midnight at the start of a day, in the current time zone."""
+    return timezone.make_aware(datetime.combine(day, day_time.min))
+
+
+class CorporateActionService:
+    """
+    Service class for recording and applying corporate actions.
+    """
+
+    @staticmethod
+    def record(actions: Iterable[CorporateActionData]) -> int:
+        """
+        Store the actions not recorded yet, skipping those for untracked
+        stocks or with a non-positive ratio or amount (and 1-for-1
+        splits). Returns the number recorded.
+        """
+        stocks = dict(Stock.objects.values_list("symbol", "id"))
+        rows: Dict[tuple, CorporateAction] = {}
+        for action in actions:
+            value = action.ratio if action.action_type == "split" else action.amount
+            if (
+                action.symbol not in stocks
+                or action.action_type not in ("split", "dividend")
+                or value is None
+                or value <= 0
+                or (action.action_type == "split" and value == 1)
+            ):
+                continue
+            key = (stocks[action.symbol], action.action_type, action.ex_date)
+            rows[key] = CorporateAction(
+                stock_id=key[0],
+                action_type=action.action_type,
+                ex_date=action.ex_date,
+                ratio=(
+                    value.quantize(RATIO_STEP)
+                    if action.action_type == "split"
+                    else None
+                ),
+                amount=(
+                    value.quantize(AMOUNT_STEP)
+                    if action.action_type == "dividend"
+                    else None
+                ),
+            )
+        if not rows:
+            return 0
+
+        existing = set(
+            CorporateAction.objects.filter(
+                ex_date__gte=min(key[2] for key in rows),
+                ex_date__lte=max(key[2] for key in rows),
+            ).values_list("stock_id", "action_type", "ex_date")
+        )
+        new = [row for key, row in rows.items() if key not in existing]
+        # A concurrent run may have recorded some in the meantime
+        CorporateAction.objects.bulk_create(new, ignore_conflicts=True)
+        return len(new)
+
+    @staticmethod
+    def sync(start: date, end: date, feed=None) -> int:
+        """Record the actions the feed reports with an ex-date in a range."""
+        feed = feed or get_corporate_action_feed()
+        symbols = Stock.objects.values_list("symbol", flat=True)
+        return CorporateActionService.record(feed.fetch(list(symbols), start, end))
+
+    @staticmethod
+    def apply_due(today: Optional[date] = None) -> List[CorporateAction]:
+        """Apply every pending action with an ex-date up to today, in order."""
+        today = today or timezone.localdate()
+        pending = CorporateAction.objects.filter(
+            applied_at__isnull=True, ex_date__lte=today
+        ).order_by("ex_date", "id")
+        applied = []
+        for action_id in pending.values_list("id", flat=True):
+            action = CorporateActionService.apply(action_id)
+            if action is not None:
+                applied.append(action)
+        return applied
+
+    @staticmethod
+    def apply(action_id: int) -> Optional[CorporateAction]:
+        """
+        Apply a pending action to every holder in one transaction. Returns
+        the action, or None if it was already applied (or is being applied
+        by another run).
+        """
+        with transaction.atomic():
+            action = (
+                CorporateAction.objects.select_for_update(skip_locked=True)
+                .select_related("stock")
+                .filter(pk=action_id, applied_at__isnull=True)
+                .first()
+            )
+            if action is None:
+                return None
+
+            positions = Portfolio.objects.filter(stock_id=action.stock_id, shares__gt=0)
+            user_ids = list(positions.values_list("user_id", flat=True))
+            if action.action_type == "split":
+                CorporateActionService._apply_split(action)
+            else:
+                CorporateActionService._apply_dividend(action, positions)
+
+            action.applied_at = timezone.now()
+            action.holders = len(user_ids)
+            action.save(update_fields=["applied_at", "holders"])
+
+            transaction.on_commit(lambda: notify_portfolios_changed(user_ids))
+            if action.action_type == "split":
+                transaction.on_commit(invalidate_price_timeline)
+        return action
+
+    @staticmethod
+    def _apply_split(action: CorporateAction) -> None:
+        ratio = Value(action.ratio)
+        ex_start = day_start(action.ex_date)
+
+        Portfolio.objects.filter(stock_id=action.stock_id, shares__gt=0).update(
+            shares=Round(F("shares") * ratio, 4),
+            average_buy_price=Round(F("average_buy_price") / ratio, 2),
+        )
+        TaxLot.objects.filter(stock_id=action.stock_id, remaining_shares__gt=0).update(
+            shares=Round(F("shares") * ratio, 4),
+            remaining_shares=Round(F("remaining_shares") * ratio, 4),
+            cost_per_share=Round(F("cost_per_share") / ratio, 2),
+        )
+        ScenarioPosition.objects.filter(stock_id=action.stock_id).update(
+            shares=Round(F("shares") * ratio, 4),
+            average_buy_price=Round(F("average_buy_price") / ratio, 2),
+        )
+        StockPriceHistory.objects.filter(
+            stock_id=action.stock_id, timestamp__lt=ex_start
+        ).update(
+            open_price=Round(F("open_price") / ratio, 2),
+            high_price=Round(F("high_price") / ratio, 2),
+            low_price=Round(F("low_price") / ratio, 2),
+            close_price=Round(F("close_price") / ratio, 2),
+            volume=Cast(
+                Round(
+                    ExpressionWrapper(
+                        F("volume") * ratio,
+                        output_field=DecimalField(max_digits=24, decimal_places=6),
+                    )
+                ),
+                BigIntegerField(),
+            ),
+        )
+        # Alert monitors notice the split on their next tick and reload
+        PriceAlert.objects.filter(
+            watchlist__stock_id=action.stock_id, is_active=True
+        ).update(
+            target_price=Round(F("target_price") / ratio, 2),
+            reference_price=Round(F("reference_price") / ratio, 2),
+        )
+        # Their trigger prices and shares no longer mean what the user chose
+        Order.objects.filter(stock_id=action.stock_id, status="open").update(
+            status="cancelled", rejection_reason=SPLIT_CANCEL_REASON
+        )
+
+        # A quote from before the ex-date is in pre-split prices
+        stock = action.stock
+        if stock.last_updated < ex_start:
+            for field in ("current_price", "previous_close", "day_high", "day_low"):
+                price = getattr(stock, field) / action.ratio
+                setattr(stock, field, price.quantize(Decimal("0.01")))
+            stock.volume = round(stock.volume * action.ratio)
+            stock.save()
+
+    @staticmethod
+    def _apply_dividend(action: CorporateAction, positions) -> None:
+        payout = Round(
+            ExpressionWrapper(
+                F("shares") * Value(action.amount),
+                output_field=DecimalField(max_digits=24, decimal_places=8),
+            ),
+            2,
+        )
+        get_user_model().objects.filter(pk__in=positions.values("user_id")).update(
+            virtual_balance=F("virtual_balance")
+            + Subquery(
+                positions.filter(user_id=OuterRef("pk"))
+                .annotate(payout=payout)
+                .values("payout")[:1]
+            )
+        )
@@ -0,0 +1,118 @@
+"""
+Streaming CSV / NDJSON exports.
+
+Rows are read with QuerySet.iterator(chunk_size=...), which uses a
+server-side cursor on PostgreSQL, and written to a StreamingHttpResponse
+one chunk at a time, so memory stays constant whatever the number of rows.
+
+The project is served over ASGI, where Django reads a synchronous
+iterator to the end (in a thread) before sending anything. The streams
+are therefore async generators, each fetching one chunk at a time from
+the database with sync_to_async.
+"""
+
+import csv
+import json
+from itertools import islice
+from typing import AsyncIterator, List, Tuple
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+# (column name, queryset lookup)
+TRANSACTION_EXPORT_FIELDS: List[Tuple[str, str]] = [
+    ("id", "id"),
+    ("executed_at", "executed_at"),
+    ("symbol", "stock__symbol"),
+    ("transaction_type", "transaction_type"),
+    ("shares", "shares"),
+    ("price_per_share", "price_per_share"),
+    ("total_amount", "total_amount"),
+    ("cost_basis", "cost_basis"),
+    ("realized_profit_loss", "realized_profit_loss"),
+]
+
+HOLDING_EXPORT_FIELDS: List[Tuple[str, str]] = [
+    ("symbol", "stock__symbol"),
+    ("name", "stock__name"),
+    ("shares", "shares"),
+    ("average_buy_price", "average_buy_price"),
+    ("current_price", "stock__current_price"),
+    ("updated_at", "updated_at"),
+]
+
+
+class _Echo:
+    """File-like object whose write() returns the value, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+class ExportRenderer(BaseRenderer):
+    """
+    Lets DRF content negotiation accept ?format=csv|ndjson.
+    Exports are streamed directly; only error bodies go through render().
+    """
+
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, cls=DjangoJSONEncoder).encode(self.charset)
+
+
+class CSVRenderer(ExportRenderer):
+    media_type = EXPORT_FORMATS["csv"]
+    format = "csv"
+
+
+class NDJSONRenderer(ExportRenderer):
+    media_type = EXPORT_FORMATS["ndjson"]
+    format = "ndjson"
+
+
+async def _chunks(queryset, lookups) -> AsyncIterator[list]:
+    # The cursor is opened and advanced on the request's database thread
+    rows = queryset.values_list(*lookups).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    fetch = sync_to_async(lambda: list(islice(rows, EXPORT_CHUNK_SIZE)))
+    while chunk := await fetch():
+        yield chunk
+
+
+async def stream_csv(queryset, fields) -> AsyncIterator[str]:
+    """Yield a CSV header, then one string per chunk of rows."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow([name for name, _ in fields])
+    async for chunk in _chunks(queryset, [lookup for _, lookup in fields]):
+        yield "".join(writer.writerow(row) for row in chunk)
+
+
+async def stream_ndjson(queryset, fields) -> AsyncIterator[str]:
+    """Yield one JSON object per row, one string per chunk of rows."""
+    names = [name for name, _ in fields]
+    encoder = DjangoJSONEncoder()
+    async for chunk in _chunks(queryset, [lookup for _, lookup in fields]):
+        yield "".join(encoder.encode(dict(zip(names, row))) + "\n" for row in chunk)
+
+
+def export_response(
+    queryset, fields, export_format: str, filename: str
+) -> StreamingHttpResponse:
+    """Stream a queryset as a CSV or NDJSON file download."""
+    stream = stream_csv if export_format == "csv" else stream_ndjson
+    response = StreamingHttpResponse(
+        stream(queryset, fields), content_type=EXPORT_FORMATS[export_format]
+    )
+    response["Content-Disposition"] = (
+        f'attachment; filename="{filename}.{export_format}"'
+    )
+    return response
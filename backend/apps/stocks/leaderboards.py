@@ -0,0 +1,631 @@
+"""
+Portfolio-return leaderboards: global, and per private league.
+
+Each process keeps every user's net asset value (cash plus holdings at the
+latest prices) in a numpy array, one slot per user, with the holders of
+each stock and their shares as arrays too. A ranking is a sorted array of
+int64 keys, each packing a value in cents (negated, so the best comes
+first) and a slot: a user's rank and the window around it are found by
+binary search, in O(log n), and moving users costs a binary search each
+plus one memmove of the array, never a re-sort.
+
+A price tick only touches the holders of the stocks that ticked: their NAV
+moves by shares times the price change, and only they move in the global
+ranking and in their leagues' rankings. Before a board is read, the
+process catches up with what it hasn't seen: prices ticked by another
+process, users who traded, signed up or held a stock with a corporate
+action applied (reloaded from the database) and leagues whose members
+changed. Everything is rebuilt from the database every LEADERBOARD_TTL
+seconds, which also bounds the drift from changes that leave no
+transaction behind.
+"""
+
+import threading
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.db.models import Max
+from django.utils import timezone
+
+from .config import INITIAL_VIRTUAL_BALANCE, LEADERBOARD_TTL
+from .models import (
+    CorporateAction,
+    League,
+    LeagueMembership,
+    Portfolio,
+    PortfolioSnapshot,
+    Stock,
+    Transaction,
+)
+from .orders import SYNC_ID_OVERLAP
+
+# Ranking keys are -cents << SLOT_BITS | slot, so equal values rank by slot
+# (given in user id order). Values are capped at MAX_CENTS.
+SLOT_BITS = 24
+SLOT_MASK = (1 << SLOT_BITS) - 1
+MAX_CENTS = (1 << 38) - 1
+
+Entry = Tuple[int, int, float]  # (rank, slot, value)
+
+
+def ranking_keys(slots: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Ranking keys of slots with values in dollars."""
+    cents = np.clip(np.round(values * 100), -MAX_CENTS, MAX_CENTS).astype(np.int64)
+    return (-cents << SLOT_BITS) | slots.astype(np.int64)
+
+
+def ranking_key(slot: int, value: float) -> int:
+    return int(ranking_keys(np.array([slot]), np.array([value]))[0])
+
+
+class Ranking:
+    """
+    Sorted ranking keys (best value first), with O(log n) rank lookups and
+    windows.
+    """
+
+    def __init__(self, keys: Optional[np.ndarray] = None):
+        self.keys = np.sort(keys) if keys is not None else np.empty(0, np.int64)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def replace(self, old: np.ndarray, new: np.ndarray) -> None:
+        """Remove keys that are in the ranking and insert new ones."""
+        moved = old != new if len(old) == len(new) else slice(None)
+        old, new = np.sort(old[moved]), np.sort(new[moved])
+        if len(old):
+            positions = np.searchsorted(self.keys, old)
+            found = positions < len(self.keys)
+            found[found] = self.keys[positions[found]] == old[found]
+            self.keys = np.delete(self.keys, positions[found])
+        if len(new):
+            self.keys = np.insert(self.keys, np.searchsorted(self.keys, new), new)
+
+    def rank(self, key: int) -> Optional[int]:
+        position = int(np.searchsorted(self.keys, key))
+        if position < len(self.keys) and self.keys[position] == key:
+            return position + 1
+        return None
+
+    def slice(self, start: int, stop: int) -> List[Entry]:
+        """Entries from position start (0-based) up to, not including, stop."""
+        start = max(start, 0)
+        return [
+            (start + offset + 1, key & SLOT_MASK, -(key >> SLOT_BITS) / 100)
+            for offset, key in enumerate(self.keys[start:stop].tolist())
+        ]
+
+    def around(self, key: int, size: int) -> List[Entry]:
+        """The key's entry with up to size entries above and below it."""
+        rank = self.rank(key)
+        if rank is None:
+            return []
+        return self.slice(rank - 1 - size, rank + size)
+
+
+class LeagueBoard:
+    """
+    A league's members ranked by what the league's starting balance would
+    be worth invested like their portfolio since the league started.
+    """
+
+    def __init__(
+        self,
+        league_id: int,
+        version: int,
+        start_date: date,
+        starting_balance: float,
+        members: Dict[int, Tuple[int, Optional[float], date]],
+    ):
+        self.league_id = league_id
+        self.version = version
+        self.start_date = start_date
+        self.starting_balance = starting_balance
+        self.members = members  # slot -> (user_id, baseline NAV, date joined)
+        self.slots = np.array(sorted(members), dtype=np.int64)
+        self.ranking = Ranking()
+        self.set_baselines()
+
+    @property
+    def started(self) -> bool:
+        return self.start_date <= timezone.localdate()
+
+    def set_baselines(self) -> None:
+        self.baselines = np.array(
+            [self.members[slot][1] or np.nan for slot in self.slots.tolist()],
+            dtype=float,
+        )
+
+    def keys(self, nav: np.ndarray) -> np.ndarray:
+        """The members' ranking keys, given all NAVs."""
+        growth = nav[self.slots] / self.baselines
+        values = self.starting_balance * np.where(np.isnan(growth), 1.0, growth)
+        return ranking_keys(self.slots, values)
+
+    def key(self, slot: int, nav: np.ndarray) -> Optional[int]:
+        position = int(np.searchsorted(self.slots, slot))
+        if position == len(self.slots) or self.slots[position] != slot:
+            return None
+        baseline = self.baselines[position]
+        growth = 1.0 if np.isnan(baseline) else nav[slot] / baseline
+        return ranking_key(slot, self.starting_balance * growth)
+
+
+class Leaderboards:
+    """
+    In-memory NAVs of all users, the global ranking and league rankings,
+    kept up to date incrementally.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.loaded_at: Optional[float] = None
+        self.clear()
+
+    def clear(self) -> None:
+        self.prices: Dict[int, float] = {}
+        self.slot_of: Dict[int, int] = {}
+        self.user_ids: List[int] = []
+        self.usernames: List[str] = []
+        self.nav = np.empty(0)
+        self.ranked = np.empty(0, dtype=bool)
+        self.ranking = Ranking()
+
+        # stock -> slot -> shares (as arrays once needed), slot -> stocks
+        self.holders: Dict[int, Dict[int, float]] = defaultdict(dict)
+        self.holder_arrays: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        self.holdings: Dict[int, Set[int]] = defaultdict(set)
+
+        self.leagues: Dict[int, LeagueBoard] = {}
+        self.slot_leagues: Dict[int, Set[int]] = defaultdict(set)
+        self.in_league = np.empty(0, dtype=bool)
+
+        self.max_user_id = 0
+        self.max_transaction_id = 0
+        self.seen_transactions: Set[int] = set()
+        self.applied_actions: Set[int] = set()
+
+    # Loading
+
+    def load(
+        self,
+        prices: Dict[int, float],
+        users: Iterable[Tuple[int, str, float]],
+        positions: Iterable[Tuple[int, int, float]],
+    ) -> None:
+        """Replace the state with (id, username, cash) users and positions."""
+        with self.lock:
+            self.clear()
+            self.prices = dict(prices)
+            cash = []
+            for user_id, username, balance in sorted(users):
+                self.slot_of[user_id] = len(self.user_ids)
+                self.user_ids.append(user_id)
+                self.usernames.append(username)
+                cash.append(balance)
+            self.max_user_id = max(self.user_ids, default=0)
+
+            for user_id, stock_id, shares in positions:
+                slot = self.slot_of.get(user_id)
+                if slot is not None:
+                    self.holders[stock_id][slot] = shares
+                    self.holdings[slot].add(stock_id)
+
+            self.nav = np.array(cash, dtype=float)
+            for stock_id in self.holders:
+                slots, shares = self._holder_arrays(stock_id)
+                self.nav[slots] += shares * self.prices.get(stock_id, 0.0)
+            self.ranked = np.ones(len(self.nav), dtype=bool)
+            self.in_league = np.zeros(len(self.nav), dtype=bool)
+            self.ranking = Ranking(ranking_keys(np.arange(len(self.nav)), self.nav))
+
+    def rebuild(self) -> None:
+        """Load everything from the database."""
+        users = (
+            get_user_model()
+            .objects.filter(is_staff=False)
+            .values_list("id", "username", "virtual_balance")
+        )
+        positions = Portfolio.objects.filter(
+            user__is_staff=False, shares__gt=0
+        ).values_list("user_id", "stock_id", "shares")
+        with self.lock:
+            max_transaction_id = Transaction.objects.aggregate(latest=Max("id"))[
+                "latest"
+            ]
+            applied_actions = set(self._recent_actions())
+            self.load(
+                self._current_prices(),
+                [
+                    (user_id, username, float(cash))
+                    for user_id, username, cash in users.iterator(chunk_size=10000)
+                ],
+                (
+                    (user_id, stock_id, float(shares))
+                    for user_id, stock_id, shares in positions.iterator(
+                        chunk_size=10000
+                    )
+                ),
+            )
+            self.max_user_id = max(
+                self.max_user_id,
+                get_user_model().objects.aggregate(latest=Max("id"))["latest"] or 0,
+            )
+            self.max_transaction_id = max_transaction_id or 0
+            self.applied_actions = applied_actions
+            self._sync_leagues()
+            self.loaded_at = time.monotonic()
+
+    @staticmethod
+    def _recent_actions() -> Dict[int, int]:
+        """
+        Corporate actions (id -> stock) applied within the TTL; older ones
+        are already in the state, which is never older than the TTL.
+        """
+        since = timezone.now() - timedelta(seconds=LEADERBOARD_TTL)
+        return dict(
+            CorporateAction.objects.filter(applied_at__gte=since).values_list(
+                "id", "stock_id"
+            )
+        )
+
+    @staticmethod
+    def _current_prices() -> Dict[int, float]:
+        return {
+            stock_id: float(price)
+            for stock_id, price in Stock.objects.values_list("id", "current_price")
+        }
+
+    def _holder_arrays(self, stock_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        if stock_id not in self.holder_arrays:
+            holders = self.holders.get(stock_id, {})
+            self.holder_arrays[stock_id] = (
+                np.fromiter(holders.keys(), dtype=np.int64, count=len(holders)),
+                np.fromiter(holders.values(), dtype=float, count=len(holders)),
+            )
+        return self.holder_arrays[stock_id]
+
+    # Incremental updates
+
+    def on_tick(self, stocks: Iterable[Stock]) -> None:
+        """Revalue and re-rank only the holders of the stocks that ticked."""
+        with self.lock:
+            if self.loaded_at is not None:
+                self._apply_prices(
+                    {stock.id: float(stock.current_price) for stock in stocks}
+                )
+
+    def _apply_prices(self, prices: Dict[int, float]) -> None:
+        moves = []
+        for stock_id, price in prices.items():
+            old = self.prices.get(stock_id, 0.0)  # Valued at 0 until priced
+            self.prices[stock_id] = price
+            if old != price and self.holders.get(stock_id):
+                moves.append((*self._holder_arrays(stock_id), price - old))
+        if not moves:
+            return
+
+        changed = (
+            moves[0][0]
+            if len(moves) == 1
+            else np.unique(np.concatenate([slots for slots, _, _ in moves]))
+        )
+        old_nav = self.nav[changed]
+        for slots, shares, change in moves:
+            self.nav[slots] += shares * change
+        self._rerank(changed, old_nav)
+
+    def _rerank(self, slots: np.ndarray, old_nav: np.ndarray) -> None:
+        """Move ranked slots whose NAV was old_nav in their rankings."""
+        ranked = self.ranked[slots]
+        slots, old_nav = slots[ranked], old_nav[ranked]
+        self.ranking.replace(
+            ranking_keys(slots, old_nav), ranking_keys(slots, self.nav[slots])
+        )
+
+        in_league = slots[self.in_league[slots]]
+        if not len(in_league):
+            return
+        before = self.nav.copy()
+        before[slots] = old_nav
+        league_ids = set()
+        for slot in in_league.tolist():
+            league_ids.update(self.slot_leagues[slot])
+        for league_id in league_ids:
+            board = self.leagues[league_id]
+            board.ranking.replace(board.keys(before), board.keys(self.nav))
+
+    def sync(self) -> None:
+        """Catch up with the database (or rebuild, once the state is stale)."""
+        with self.lock:
+            if (
+                self.loaded_at is None
+                or time.monotonic() - self.loaded_at > LEADERBOARD_TTL
+            ):
+                self.rebuild()
+                return
+
+            self._apply_prices(self._current_prices())
+
+            # Users who traded since the last sync. Transactions may commit
+            # out of id order, so recent ids are re-scanned like resting
+            # orders (see orders.py).
+            floor = max(0, self.max_transaction_id - SYNC_ID_OVERLAP)
+            changed = set()
+            for transaction_id, user_id in Transaction.objects.filter(
+                id__gt=floor
+            ).values_list("id", "user_id"):
+                if transaction_id not in self.seen_transactions:
+                    self.seen_transactions.add(transaction_id)
+                    changed.add(user_id)
+                self.max_transaction_id = max(self.max_transaction_id, transaction_id)
+            floor = self.max_transaction_id - SYNC_ID_OVERLAP
+            self.seen_transactions = {
+                transaction_id
+                for transaction_id in self.seen_transactions
+                if transaction_id > floor
+            }
+
+            # Holders of stocks split or paying a dividend since the last
+            # sync (their shares or cash changed without a transaction)
+            for action_id, stock_id in self._recent_actions().items():
+                if action_id not in self.applied_actions:
+                    self.applied_actions.add(action_id)
+                    changed.update(
+                        self.user_ids[slot] for slot in self.holders.get(stock_id, ())
+                    )
+
+            signed_up = list(
+                get_user_model()
+                .objects.filter(id__gt=self.max_user_id)
+                .values_list("id", flat=True)
+            )
+            self.max_user_id = max(signed_up, default=self.max_user_id)
+            changed.update(signed_up)
+            if changed:
+                self._reload_users(changed)
+
+            # Users deleted (or made staff) leave no transaction behind
+            if (
+                get_user_model().objects.filter(is_staff=False).count()
+                != self.ranked.sum()
+            ):
+                self.rebuild()
+                return
+            self._sync_leagues()
+
+    def _reload_users(self, user_ids: Set[int]) -> None:
+        """Reload the cash and positions of some users and re-rank them."""
+        users = {
+            user_id: (username, float(cash))
+            for user_id, username, cash in get_user_model()
+            .objects.filter(id__in=user_ids, is_staff=False)
+            .values_list("id", "username", "virtual_balance")
+        }
+        positions = defaultdict(dict)
+        for user_id, stock_id, shares in Portfolio.objects.filter(
+            user_id__in=users, shares__gt=0
+        ).values_list("user_id", "stock_id", "shares"):
+            positions[user_id][stock_id] = float(shares)
+
+        new = [user_id for user_id in sorted(users) if user_id not in self.slot_of]
+        for user_id in new:
+            self.slot_of[user_id] = len(self.user_ids)
+            self.user_ids.append(user_id)
+            self.usernames.append(users[user_id][0])
+        self.nav = np.concatenate([self.nav, np.zeros(len(new))])
+        self.ranked = np.concatenate([self.ranked, np.zeros(len(new), dtype=bool)])
+        self.in_league = np.concatenate(
+            [self.in_league, np.zeros(len(new), dtype=bool)]
+        )
+
+        slots = np.array(
+            sorted(
+                self.slot_of[user_id] for user_id in user_ids if user_id in self.slot_of
+            ),
+            dtype=np.int64,
+        )
+        ranked = slots[self.ranked[slots]]
+        old_keys = ranking_keys(ranked, self.nav[ranked])
+        for slot in slots.tolist():
+            for stock_id in self.holdings.pop(slot, ()):
+                del self.holders[stock_id][slot]
+                self.holder_arrays.pop(stock_id, None)
+
+            user_id = self.user_ids[slot]
+            if user_id not in users:  # Deleted, or made staff
+                self.ranked[slot] = False
+                for league_id in self.slot_leagues.get(slot, ()):
+                    self.leagues[league_id].version = None  # Reload it
+                continue
+
+            username, cash = users[user_id]
+            self.usernames[slot] = username
+            self.nav[slot] = cash
+            self.ranked[slot] = True
+            for stock_id, shares in positions[user_id].items():
+                self.holders[stock_id][slot] = shares
+                self.holder_arrays.pop(stock_id, None)
+                self.holdings[slot].add(stock_id)
+                self.nav[slot] += shares * self.prices.get(stock_id, 0.0)
+
+        # Re-rank them, and their leagues from scratch (leagues they have
+        # left are reloaded by the league sync)
+        ranked = slots[self.ranked[slots]]
+        self.ranking.replace(old_keys, ranking_keys(ranked, self.nav[ranked]))
+        league_ids = set()
+        for slot in slots[self.in_league[slots]].tolist():
+            league_ids.update(self.slot_leagues[slot])
+        for league_id in league_ids:
+            board = self.leagues[league_id]
+            board.ranking = Ranking(board.keys(self.nav))
+
+    def _sync_leagues(self) -> None:
+        """Reload leagues created, changed or started since the last sync."""
+        rows = League.objects.values_list(
+            "id", "version", "start_date", "starting_balance"
+        )
+        leagues = {
+            league_id: (version, start_date, float(starting_balance))
+            for league_id, version, start_date, starting_balance in rows
+        }
+        stale = [
+            league_id
+            for league_id, (version, _, _) in leagues.items()
+            if league_id not in self.leagues
+            or self.leagues[league_id].version != version
+            or (
+                self.leagues[league_id].started
+                and np.isnan(self.leagues[league_id].baselines).any()
+            )
+        ]
+        dropped = set(self.leagues) - set(leagues)
+        if not stale and not dropped:
+            return
+
+        members: Dict[int, Dict[int, tuple]] = defaultdict(dict)
+        for league_id, user_id, baseline, joined_at in LeagueMembership.objects.filter(
+            league_id__in=stale
+        ).values_list("league_id", "user_id", "baseline_nav", "joined_at"):
+            slot = self.slot_of.get(user_id)
+            if slot is not None and self.ranked[slot]:
+                members[league_id][slot] = (
+                    user_id,
+                    float(baseline) if baseline is not None else None,
+                    timezone.localdate(joined_at),
+                )
+
+        for league_id in dropped.union(stale):
+            board = self.leagues.pop(league_id, None)
+            if board is not None:
+                for slot in board.members:
+                    self.slot_leagues[slot].discard(league_id)
+        for league_id in stale:
+            board = LeagueBoard(league_id, *leagues[league_id], members[league_id])
+            if board.started:
+                self._resolve_baselines(board)
+            board.ranking = Ranking(board.keys(self.nav))
+            self.leagues[league_id] = board
+            for slot in board.members:
+                self.slot_leagues[slot].add(league_id)
+
+        self.in_league[:] = False
+        self.in_league[
+            [slot for slot, league_ids in self.slot_leagues.items() if league_ids]
+        ] = True
+
+    def _resolve_baselines(self, board: LeagueBoard) -> None:
+        """
+        Fix the baselines of members of a started league that have none:
+        for members who joined before it started, their NAV at the end of
+        the day before, from the nightly snapshots; otherwise (or without a
+        snapshot) their current NAV.
+        """
+        missing = {
+            user_id: slot
+            for slot, (user_id, baseline, _) in board.members.items()
+            if baseline is None
+        }
+        if not missing:
+            return
+        snapshots = dict(
+            PortfolioSnapshot.objects.filter(
+                user_id__in=[
+                    user_id
+                    for user_id, slot in missing.items()
+                    if board.members[slot][2] < board.start_date
+                ],
+                date=board.start_date - timedelta(days=1),
+            ).values_list("user_id", "nav")
+        )
+        for user_id, slot in missing.items():
+            baseline = snapshots.get(user_id) or Decimal(str(round(self.nav[slot], 2)))
+            # Only if no other process has set it meanwhile
+            LeagueMembership.objects.filter(
+                league_id=board.league_id, user_id=user_id, baseline_nav__isnull=True
+            ).update(baseline_nav=baseline)
+        for user_id, baseline in LeagueMembership.objects.filter(
+            league_id=board.league_id, user_id__in=missing
+        ).values_list("user_id", "baseline_nav"):
+            slot = missing[user_id]
+            board.members[slot] = (user_id, float(baseline), board.members[slot][2])
+        board.set_baselines()
+
+    # Reading
+
+    def _board(
+        self,
+        ranking: Ranking,
+        key: Optional[int],
+        base: float,
+        limit: int,
+        window: int,
+    ) -> dict:
+        def entries(ranked: List[Entry]) -> List[dict]:
+            return [
+                {
+                    "rank": rank,
+                    "username": self.usernames[slot],
+                    "return_percent": round((value / base - 1) * 100, 4),
+                    "value": value,
+                }
+                for rank, slot, value in ranked
+            ]
+
+        around = ranking.around(key, window) if key is not None else []
+        me = [entry for entry in around if entry[1] == key & SLOT_MASK]
+        return {
+            "total": len(ranking),
+            "top": entries(ranking.slice(0, limit)),
+            "me": entries(me)[0] if me else None,
+            "around_me": entries(around),
+        }
+
+    def get_global(self, user_id: Optional[int], limit: int, window: int) -> dict:
+        """Users ranked by the return of their portfolio on the initial balance."""
+        self.sync()
+        with self.lock:
+            slot = self.slot_of.get(user_id)
+            key = None
+            if slot is not None and self.ranked[slot]:
+                key = ranking_key(slot, self.nav[slot])
+            return self._board(
+                self.ranking, key, INITIAL_VIRTUAL_BALANCE, limit, window
+            )
+
+    def get_league(
+        self, league_id: int, user_id: Optional[int], limit: int, window: int
+    ) -> dict:
+        """A league's members ranked by their return since it started."""
+        self.sync()
+        with self.lock:
+            board = self.leagues.get(league_id)
+            if board is None:
+                return self._board(Ranking(), None, 1.0, limit, window)
+            slot = self.slot_of.get(user_id)
+            return {
+                "start_date": board.start_date.isoformat(),
+                "started": board.started,
+                "starting_balance": board.starting_balance,
+                **self._board(
+                    board.ranking,
+                    board.key(slot, self.nav) if slot is not None else None,
+                    board.starting_balance,
+                    limit,
+                    window,
+                ),
+            }
+
+
+_leaderboards = Leaderboards()
+
+
+def get_leaderboards() -> Leaderboards:
+    """Get this process's leaderboards."""
+    return _leaderboards
@@ -0,0 +1,99 @@
+"""
+Tax-lot ledger for realized profit and loss.
+
+Every buy opens a lot; every sell consumes open lots in lot order (FIFO by
+default) and records the consumed cost on the sell transaction, together
+with the realized P&L. Both are maintained inside the trade's database
+transaction, so realized and per-lot unrealized figures are plain indexed
+reads rather than replays of the transaction history.
+"""
+
+from collections import deque
+from decimal import Decimal
+from typing import Deque, Dict, Iterable, List, Tuple
+
+from django.utils import timezone
+
+from .config import TAX_LOT_METHOD
+from .models import TaxLot, Transaction
+
+
+class LotLedger:
+    """
+    Service for opening and consuming tax lots.
+    """
+
+    @staticmethod
+    def lot_order() -> List[str]:
+        """Order in which sells consume lots."""
+        if TAX_LOT_METHOD == "lifo":
+            return ["-acquired_at", "-id"]
+        return ["acquired_at", "id"]
+
+    @staticmethod
+    def new_lot(trade: Transaction) -> TaxLot:
+        """Build (unsaved) the lot opened by a buy transaction."""
+        return TaxLot(
+            user=trade.user,
+            stock=trade.stock,
+            transaction=trade,
+            shares=trade.shares,
+            remaining_shares=trade.shares,
+            cost_per_share=trade.price_per_share,
+            acquired_at=trade.executed_at or timezone.now(),
+        )
+
+    @staticmethod
+    def open_lots(user, stock_ids: Iterable[int]) -> Dict[int, Deque[TaxLot]]:
+        """
+        Lock and load the user's open lots for some stocks, per stock in
+        consumption order.
+        """
+        lots: Dict[int, Deque[TaxLot]] = {stock_id: deque() for stock_id in stock_ids}
+        for lot in (
+            TaxLot.objects.select_for_update()
+            .filter(user=user, stock_id__in=list(lots), remaining_shares__gt=0)
+            .order_by(*LotLedger.lot_order())
+        ):
+            lots[lot.stock_id].append(lot)
+        return lots
+
+    @staticmethod
+    def add(lots: Deque[TaxLot], lot: TaxLot) -> None:
+        """Add a newly opened lot to a stock's open lots, in consumption order."""
+        if TAX_LOT_METHOD == "lifo":
+            lots.appendleft(lot)
+        else:
+            lots.append(lot)
+
+    @staticmethod
+    def consume(
+        lots: Deque[TaxLot], shares: Decimal, fallback_cost: Decimal
+    ) -> Tuple[Decimal, List[TaxLot]]:
+        """
+        Take shares from the front of a stock's open lots.
+
+        Returns the (unrounded) cost of the shares taken and the lots
+        changed. Shares not covered by any lot (positions older than the
+        ledger) are costed at fallback_cost, the position's average price.
+        """
+        cost = Decimal("0")
+        changed = []
+        while shares > 0 and lots:
+            lot = lots[0]
+            taken = min(lot.remaining_shares, shares)
+            lot.remaining_shares -= taken
+            cost += taken * lot.cost_per_share
+            shares -= taken
+            changed.append(lot)
+            if lot.remaining_shares == 0:
+                lots.popleft()
+        return cost + shares * fallback_cost, changed
+
+    @staticmethod
+    def close(user, stock, shares: Decimal, fallback_cost: Decimal) -> Decimal:
+        """Consume lots for a sell and return their (unrounded) cost."""
+        lots = LotLedger.open_lots(user, [stock.id])[stock.id]
+        cost, changed = LotLedger.consume(lots, shares, fallback_cost)
+        TaxLot.objects.bulk_update(changed, ["remaining_shares"])
+        return cost
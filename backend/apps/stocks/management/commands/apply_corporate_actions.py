@@ -0,0 +1,66 @@
+"""
+Management command to record and apply stock splits and dividends.
+Meant to run daily (e.g. from cron) before trading opens.
+"""
+
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.stocks.config import (
+    CORPORATE_ACTIONS_HORIZON_DAYS,
+    CORPORATE_ACTIONS_LOOKBACK_DAYS,
+)
+from apps.stocks.corporate_actions import CorporateActionService
+
+
+class Command(BaseCommand):
+    help = "Record corporate actions from the feed and apply the due ones."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since",
+            type=date.fromisoformat,
+            default=None,
+            help="First ex-date fetched (YYYY-MM-DD). Defaults to "
+            f"{CORPORATE_ACTIONS_LOOKBACK_DAYS} days ago.",
+        )
+        parser.add_argument(
+            "--until",
+            type=date.fromisoformat,
+            default=None,
+            help="Last ex-date fetched (YYYY-MM-DD). Defaults to "
+            f"{CORPORATE_ACTIONS_HORIZON_DAYS} days ahead.",
+        )
+        parser.add_argument(
+            "--no-fetch",
+            action="store_true",
+            help="Only apply actions already recorded (e.g. in the admin).",
+        )
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        since = options["since"] or today - timedelta(
+            days=CORPORATE_ACTIONS_LOOKBACK_DAYS
+        )
+        until = options["until"] or today + timedelta(
+            days=CORPORATE_ACTIONS_HORIZON_DAYS
+        )
+
+        start = time.perf_counter()
+        recorded = 0
+        if not options["no_fetch"]:
+            recorded = CorporateActionService.sync(since, until)
+        applied = CorporateActionService.apply_due(today)
+        elapsed = time.perf_counter() - start
+
+        for action in applied:
+            self.stdout.write(f"Applied {action} to {action.holders} holders.")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Recorded {recorded} and applied {len(applied)} corporate "
+                f"actions in {elapsed:.2f}s."
+            )
+        )
@@ -0,0 +1,99 @@
+"""
+Management command to benchmark price alert evaluation.
+
+Loads many random alerts into an in-memory alert monitor and measures how
+long price ticks take to find the crossed ones, compared with checking
+every alert on every tick. Each tick's crossings are verified against that
+full scan. No database access.
+"""
+
+import time
+from decimal import Decimal
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.stocks.alerts import AlertMonitor, alert_thresholds
+from apps.stocks.models import Stock
+
+
+class Command(BaseCommand):
+    help = "Benchmark price alert evaluation with many active alerts."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--alerts", type=int, default=1_000_000, help="Number of alerts."
+        )
+        parser.add_argument("--symbols", type=int, default=10, help="Number of stocks.")
+        parser.add_argument(
+            "--ticks", type=int, default=1000, help="Price ticks per stock."
+        )
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(42)
+        count, symbols = options["alerts"], options["symbols"]
+
+        # Alerts set at a price of 100: targets 1-50% away, or moves of 1-50%
+        stock_ids = rng.integers(0, symbols, count)
+        conditions = rng.choice(["above", "below", "move"], count)
+        distance = np.round(rng.uniform(1, 50, count), 2)
+        reference = Decimal("100")
+
+        rows = []
+        lower = np.full(count, -np.inf)  # Fires at or below (falls)
+        upper = np.full(count, np.inf)  # Fires at or above (rises)
+        for alert_id, (stock_id, condition, percent) in enumerate(
+            zip(stock_ids.tolist(), conditions.tolist(), distance.tolist())
+        ):
+            percent = Decimal(str(percent))
+            target = (
+                reference + percent if condition == "above" else reference - percent
+            )
+            rows.append((alert_id, stock_id, condition, target, percent, reference))
+            for price, rises in alert_thresholds(condition, target, percent, reference):
+                if rises:
+                    upper[alert_id] = price
+                else:
+                    lower[alert_id] = price
+
+        monitor = AlertMonitor()
+        start = time.perf_counter()
+        monitor.load(rows)
+        load_time = time.perf_counter() - start
+
+        # A random walk per stock; each tick moves every stock once
+        stocks = [
+            Stock(id=stock_id, symbol=f"S{stock_id}", current_price=reference)
+            for stock_id in range(symbols)
+        ]
+        prices = np.full(symbols, 100.0)
+        fired = np.zeros(count, dtype=bool)
+        tick_time = scan_time = 0.0
+        crossings = 0
+        for _ in range(options["ticks"]):
+            prices = np.round(prices * np.exp(rng.normal(0, 0.01, symbols)), 2)
+            for stock, price in zip(stocks, prices.tolist()):
+                stock.current_price = Decimal(str(price))
+
+            start = time.perf_counter()
+            crossed = monitor.crossed(stocks)
+            tick_time += time.perf_counter() - start
+
+            start = time.perf_counter()
+            price = prices[stock_ids]
+            expected = ~fired & ((price >= upper) | (price <= lower))
+            scan_time += time.perf_counter() - start
+
+            if set(crossed) != set(np.flatnonzero(expected).tolist()):
+                raise CommandError("Crossed alerts differ from a full scan.")
+            fired |= expected
+            crossings += len(crossed)
+
+        ticks = options["ticks"]
+        self.stdout.write(
+            f"Loaded {count} alerts in {load_time:.2f}s. {ticks} ticks of "
+            f"{symbols} stocks: {tick_time / ticks * 1e6:.1f}us/tick "
+            f"(full scan {scan_time / ticks * 1e6:.1f}us/tick), "
+            f"{crossings} alerts fired."
+        )
+        self.stdout.write(self.style.SUCCESS("Crossings match a full scan."))
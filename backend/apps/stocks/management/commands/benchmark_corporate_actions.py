@@ -0,0 +1,349 @@
+"""
+Management command to benchmark applying corporate actions.
+
+Creates throwaway users holding a benchmark stock (with a tax lot each),
+a price history, open orders and price alerts, then applies a split and a
+dividend with the same service the apply_corporate_actions job uses and
+checks the result: every position and open lot must hold the split shares
+at the split price, the bars before the ex-date and the alerts' prices
+must be split-adjusted, no order may be left open and every holder's
+balance must be credited exactly shares times the dividend. The number of
+queries must not grow with the number of holders.
+"""
+
+import time
+from datetime import timedelta
+from decimal import ROUND_HALF_UP, Decimal
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.stocks.corporate_actions import CorporateActionService, day_start
+from apps.stocks.models import (
+    CorporateAction,
+    Order,
+    Portfolio,
+    PriceAlert,
+    Stock,
+    StockPriceHistory,
+    TaxLot,
+    Transaction,
+    Watchlist,
+)
+
+BENCH_USERNAME_PREFIX = "__corporate_actions_benchmark_"
+BENCH_SYMBOL = "BENCHCA"
+
+CENT = Decimal("0.01")
+SHARE_STEP = Decimal("0.0001")
+
+
+class Command(BaseCommand):
+    help = "Benchmark applying a split and a dividend to many holders."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--holders", type=int, default=100_000, help="Number of holders."
+        )
+        parser.add_argument(
+            "--bars", type=int, default=1000, help="Daily bars before the ex-date."
+        )
+        parser.add_argument(
+            "--orders", type=int, default=10_000, help="Open orders on the stock."
+        )
+        parser.add_argument(
+            "--ratio", type=Decimal, default=Decimal("4"), help="Split ratio."
+        )
+        parser.add_argument(
+            "--dividend",
+            type=Decimal,
+            default=Decimal("0.2345"),
+            help="Dividend per share (after the split).",
+        )
+
+    def handle(self, *args, **options):
+        self._clean_up()
+        rng = np.random.default_rng(42)
+        today = timezone.localdate()
+        ratio, dividend = options["ratio"], options["dividend"]
+
+        stock = Stock.objects.create(
+            symbol=BENCH_SYMBOL,
+            name="Benchmark Stock",
+            current_price=Decimal("400.00"),
+            previous_close=Decimal("396.00"),
+        )
+        users, initial = self._create_holders(stock, options["holders"], rng)
+        self._create_bars(stock, options["bars"], today, rng)
+        Order.objects.bulk_create(
+            [
+                Order(
+                    user=users[user],
+                    stock=stock,
+                    transaction_type="buy",
+                    order_type="limit",
+                    shares=Decimal("1"),
+                    trigger_price=Decimal("350.00"),
+                )
+                for user in rng.integers(0, len(users), options["orders"]).tolist()
+            ],
+            batch_size=5000,
+        )
+        self._create_alerts(users, stock, rng)
+
+        try:
+            before = {
+                "positions": dict(
+                    Portfolio.objects.filter(stock=stock).values_list(
+                        "user_id", "average_buy_price"
+                    )
+                ),
+                "shares": dict(
+                    Portfolio.objects.filter(stock=stock).values_list(
+                        "user_id", "shares"
+                    )
+                ),
+                "bars": dict(
+                    StockPriceHistory.objects.filter(stock=stock).values_list(
+                        "id", "close_price"
+                    )
+                ),
+                "alerts": {
+                    alert_id: (target_price, reference_price)
+                    for alert_id, target_price, reference_price in (
+                        PriceAlert.objects.filter(watchlist__stock=stock).values_list(
+                            "id", "target_price", "reference_price"
+                        )
+                    )
+                },
+            }
+            split, split_time, split_queries = self._apply(
+                stock, "split", today, ratio=ratio
+            )
+            self._verify_split(stock, before, ratio, today)
+
+            payout, payout_time, payout_queries = self._apply(
+                stock, "dividend", today, amount=dividend
+            )
+            self._verify_dividend(users, initial, before["shares"], ratio, dividend)
+        finally:
+            self._clean_up()
+
+        holders = len(users)
+        self.stdout.write(
+            f"{holders} holders, {options['bars']} bars, {options['orders']} "
+            f"orders. Split: {split_time:.2f}s in {split_queries} queries "
+            f"({holders / split_time:.0f} holders/s). Dividend: "
+            f"{payout_time:.2f}s in {payout_queries} queries "
+            f"({holders / payout_time:.0f} holders/s)."
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Positions, lots, bars, alerts, orders and balances match."
+            )
+        )
+
+    def _create_holders(self, stock, count, rng):
+        """One position, buy transaction and tax lot per throwaway user."""
+        User = get_user_model()
+        initial = {
+            f"{BENCH_USERNAME_PREFIX}{index}__": Decimal(str(balance))
+            for index, balance in enumerate(np.round(rng.uniform(0, 10_000, count), 2))
+        }
+        users = User.objects.bulk_create(
+            [
+                User(username=username, virtual_balance=balance)
+                for username, balance in initial.items()
+            ],
+            batch_size=5000,
+        )
+        if users[0].pk is None:
+            users = list(User.objects.filter(username__in=initial))
+
+        shares = [
+            Decimal(str(amount)).quantize(SHARE_STEP)
+            for amount in np.round(rng.uniform(0.5, 200, len(users)), 4)
+        ]
+        prices = [
+            Decimal(str(price)).quantize(CENT)
+            for price in np.round(rng.uniform(100, 500, len(users)), 2)
+        ]
+        Portfolio.objects.bulk_create(
+            [
+                Portfolio(
+                    user=user, stock=stock, shares=amount, average_buy_price=price
+                )
+                for user, amount, price in zip(users, shares, prices)
+            ],
+            batch_size=5000,
+        )
+        buys = Transaction.objects.bulk_create(
+            [
+                Transaction(
+                    user=user,
+                    stock=stock,
+                    transaction_type="buy",
+                    shares=amount,
+                    price_per_share=price,
+                    total_amount=(amount * price).quantize(CENT),
+                )
+                for user, amount, price in zip(users, shares, prices)
+            ],
+            batch_size=5000,
+        )
+        if buys[0].pk is None:
+            buys = list(Transaction.objects.filter(stock=stock).order_by("id"))
+        now = timezone.now()
+        TaxLot.objects.bulk_create(
+            [
+                TaxLot(
+                    user_id=buy.user_id,
+                    stock=stock,
+                    transaction=buy,
+                    shares=buy.shares,
+                    remaining_shares=buy.shares,
+                    cost_per_share=buy.price_per_share,
+                    acquired_at=now,
+                )
+                for buy in buys
+            ],
+            batch_size=5000,
+        )
+        return users, initial
+
+    def _create_bars(self, stock, count, today, rng):
+        closes = 400 * np.exp(np.cumsum(rng.normal(0, 0.01, count)))
+        StockPriceHistory.objects.bulk_create(
+            [
+                StockPriceHistory(
+                    stock=stock,
+                    timestamp=day_start(today - timedelta(days=count - index)),
+                    open_price=Decimal(str(round(close * 0.995, 2))),
+                    high_price=Decimal(str(round(close * 1.01, 2))),
+                    low_price=Decimal(str(round(close * 0.99, 2))),
+                    close_price=Decimal(str(round(close, 2))),
+                    volume=int(volume),
+                )
+                for index, (close, volume) in enumerate(
+                    zip(closes.tolist(), rng.integers(10**6, 10**8, count).tolist())
+                )
+            ],
+            batch_size=5000,
+        )
+
+    def _create_alerts(self, users, stock, rng):
+        """A watchlist entry with a target alert and a move alert per user."""
+        entries = Watchlist.objects.bulk_create(
+            [Watchlist(user=user, stock=stock) for user in users], batch_size=5000
+        )
+        if entries[0].pk is None:
+            entries = list(Watchlist.objects.filter(stock=stock))
+        targets = np.round(rng.uniform(300, 500, len(entries)), 2).tolist()
+        PriceAlert.objects.bulk_create(
+            [
+                alert
+                for entry, target in zip(entries, targets)
+                for alert in (
+                    PriceAlert(
+                        watchlist=entry,
+                        condition="above" if target > 400 else "below",
+                        target_price=Decimal(str(target)),
+                        reference_price=Decimal("400.00"),
+                    ),
+                    PriceAlert(
+                        watchlist=entry,
+                        condition="move",
+                        percent=Decimal("5.00"),
+                        reference_price=Decimal("400.00"),
+                    ),
+                )
+            ],
+            batch_size=5000,
+        )
+
+    def _apply(self, stock, action_type, today, **values):
+        action = CorporateAction.objects.create(
+            stock=stock, action_type=action_type, ex_date=today, **values
+        )
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            applied = CorporateActionService.apply(action.pk)
+            elapsed = time.perf_counter() - start
+        if applied is None or applied.holders == 0:
+            raise CommandError(f"The {action_type} was not applied.")
+        return applied, elapsed, len(queries)
+
+    def _verify_split(self, stock, before, ratio, today):
+        positions = Portfolio.objects.filter(stock=stock).values_list(
+            "user_id", "shares", "average_buy_price"
+        )
+        for user_id, shares, price in positions:
+            expected_shares = (before["shares"][user_id] * ratio).quantize(
+                SHARE_STEP, rounding=ROUND_HALF_UP
+            )
+            expected_price = (before["positions"][user_id] / ratio).quantize(
+                CENT, rounding=ROUND_HALF_UP
+            )
+            if shares != expected_shares or price != expected_price:
+                raise CommandError(
+                    f"Position mismatch for user {user_id}: {shares} @ {price} "
+                    f"!= {expected_shares} @ {expected_price}"
+                )
+
+        held = dict(positions.values_list("user_id", "shares"))
+        in_lots = dict(
+            TaxLot.objects.filter(stock=stock).values_list(
+                "user_id", "remaining_shares"
+            )
+        )
+        if held != in_lots:
+            raise CommandError("Tax lots don't match the split positions.")
+
+        for bar_id, close in StockPriceHistory.objects.filter(
+            stock=stock, timestamp__lt=day_start(today)
+        ).values_list("id", "close_price"):
+            expected = (before["bars"][bar_id] / ratio).quantize(
+                CENT, rounding=ROUND_HALF_UP
+            )
+            if close != expected:
+                raise CommandError(f"Bar {bar_id} close {close} != {expected}")
+
+        for alert_id, target_price, reference_price in PriceAlert.objects.filter(
+            watchlist__stock=stock
+        ).values_list("id", "target_price", "reference_price"):
+            expected = tuple(
+                None if price is None else (price / ratio).quantize(CENT, ROUND_HALF_UP)
+                for price in before["alerts"][alert_id]
+            )
+            if (target_price, reference_price) != expected:
+                raise CommandError(
+                    f"Alert {alert_id} prices {target_price}, {reference_price} "
+                    f"!= {expected[0]}, {expected[1]}"
+                )
+
+        if Order.objects.filter(stock=stock, status="open").exists():
+            raise CommandError("Open orders were left behind.")
+
+    def _verify_dividend(self, users, initial, shares, ratio, dividend):
+        for user in get_user_model().objects.filter(pk__in=[u.pk for u in users]):
+            split_shares = (shares[user.pk] * ratio).quantize(
+                SHARE_STEP, rounding=ROUND_HALF_UP
+            )
+            expected = initial[user.username] + (split_shares * dividend).quantize(
+                CENT, rounding=ROUND_HALF_UP
+            )
+            if user.virtual_balance != expected:
+                raise CommandError(
+                    f"Balance mismatch for {user.username}: "
+                    f"{user.virtual_balance} != {expected}"
+                )
+
+    def _clean_up(self):
+        get_user_model().objects.filter(
+            username__startswith=BENCH_USERNAME_PREFIX
+        ).delete()
+        Stock.objects.filter(symbol=BENCH_SYMBOL).delete()
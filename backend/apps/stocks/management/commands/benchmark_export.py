@@ -0,0 +1,101 @@
+"""
+Management command to benchmark the streaming transaction export.
+
+Inserts many transactions for a throwaway user, streams them through the
+export endpoint with the ASGI request handler (as served by Daphne) and
+reports throughput and peak Python memory, which should stay flat as
+--rows grows.
+"""
+
+import time
+import tracemalloc
+from decimal import Decimal
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient
+
+from apps.stocks.models import Stock, Transaction
+
+BENCH_USERNAME = "__export_benchmark__"
+BENCH_SYMBOL = "BENCH"
+INSERT_BATCH_SIZE = 10_000
+
+
+class Command(BaseCommand):
+    help = "Benchmark streaming CSV/NDJSON export of a large trade history."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows", type=int, default=1_000_000, help="Number of transactions."
+        )
+        parser.add_argument(
+            "--format", choices=["csv", "ndjson"], default="csv", dest="export_format"
+        )
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        User.objects.filter(username=BENCH_USERNAME).delete()
+        Stock.objects.filter(symbol=BENCH_SYMBOL).delete()
+
+        user = User.objects.create(username=BENCH_USERNAME)
+        stock = Stock.objects.create(symbol=BENCH_SYMBOL, name="Benchmark Stock")
+        rows = options["rows"]
+
+        try:
+            start = time.perf_counter()
+            for offset in range(0, rows, INSERT_BATCH_SIZE):
+                Transaction.objects.bulk_create(
+                    Transaction(
+                        user=user,
+                        stock=stock,
+                        transaction_type="buy" if i % 2 else "sell",
+                        shares=Decimal("1.5000"),
+                        price_per_share=Decimal("37.13"),
+                        total_amount=Decimal("55.70"),
+                    )
+                    for i in range(offset, min(offset + INSERT_BATCH_SIZE, rows))
+                )
+            self.stdout.write(
+                f"Inserted {rows} transactions in {time.perf_counter() - start:.1f}s."
+            )
+
+            client = AsyncClient()
+            client.force_login(user)
+
+            tracemalloc.start()
+            start = time.perf_counter()
+            size, lines = async_to_sync(self._download)(
+                client, options["export_format"]
+            )
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        finally:
+            Transaction.objects.filter(user__username=BENCH_USERNAME).delete()
+            User.objects.filter(username=BENCH_USERNAME).delete()
+            Stock.objects.filter(symbol=BENCH_SYMBOL).delete()
+
+        expected = rows + (options["export_format"] == "csv")
+        if lines != expected:
+            raise CommandError(f"Exported {lines} lines, expected {expected}.")
+
+        self.stdout.write(
+            f"Exported {rows} rows ({size / 1e6:.1f} MB) in {elapsed:.1f}s "
+            f"({rows / elapsed:.0f} rows/s), peak memory {peak / 1e6:.1f} MB."
+        )
+
+    @staticmethod
+    async def _download(client, export_format):
+        """Read the export the way the ASGI handler sends it."""
+        response = await client.get(
+            "/api/stocks/transactions/export/", {"format": export_format}
+        )
+        if not response.is_async:
+            raise CommandError("The export is not streamed asynchronously.")
+        size = lines = 0
+        async for chunk in response:
+            size += len(chunk)
+            lines += chunk.count(b"\n")
+        return size, lines
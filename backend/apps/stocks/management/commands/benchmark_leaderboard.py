@@ -0,0 +1,111 @@
+"""
+Management command to benchmark leaderboard updates.
+
+Loads many random portfolios into in-memory leaderboards and measures how
+long price ticks take to re-rank the holders of the stocks that ticked,
+compared with revaluing and sorting every portfolio on every tick, and how
+long rank and "around me" reads take. The final ranking is verified against
+that full recompute. No database access.
+"""
+
+import time
+from decimal import Decimal
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.stocks.config import INITIAL_VIRTUAL_BALANCE
+from apps.stocks.leaderboards import Leaderboards, ranking_key
+from apps.stocks.models import Stock
+
+
+class Command(BaseCommand):
+    help = "Benchmark incremental leaderboard ranking with many users."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--users", type=int, default=100_000, help="Number of users."
+        )
+        parser.add_argument("--symbols", type=int, default=50, help="Number of stocks.")
+        parser.add_argument(
+            "--positions", type=int, default=3, help="Stocks held per user."
+        )
+        parser.add_argument(
+            "--ticks", type=int, default=1000, help="Price ticks (one stock each)."
+        )
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(42)
+        users, symbols = options["users"], options["symbols"]
+
+        prices = np.round(rng.uniform(10, 500, symbols), 2)
+        cash = np.round(rng.uniform(0, INITIAL_VIRTUAL_BALANCE, users), 2)
+        holdings = np.zeros((users, symbols))
+        positions = []
+        for user_id in range(users):
+            for stock_id in rng.choice(symbols, options["positions"], replace=False):
+                shares = round(float(rng.uniform(1, 100)), 4)
+                holdings[user_id, stock_id] = shares
+                positions.append((user_id, int(stock_id), shares))
+
+        boards = Leaderboards()
+        start = time.perf_counter()
+        boards.load(
+            dict(enumerate(prices.tolist())),
+            ((user_id, f"user{user_id}", cash[user_id]) for user_id in range(users)),
+            positions,
+        )
+        boards.loaded_at = time.monotonic()
+        load_time = time.perf_counter() - start
+
+        # A random walk; each tick moves one stock
+        stocks = [
+            Stock(id=stock_id, symbol=f"S{stock_id}", current_price=Decimal("0"))
+            for stock_id in range(symbols)
+        ]
+        tick_time = recompute_time = 0.0
+        for _ in range(options["ticks"]):
+            stock_id = int(rng.integers(symbols))
+            prices[stock_id] = round(
+                prices[stock_id] * float(np.exp(rng.normal(0, 0.01))), 2
+            )
+            stock = stocks[stock_id]
+            stock.current_price = Decimal(str(prices[stock_id]))
+
+            start = time.perf_counter()
+            boards.on_tick([stock])
+            tick_time += time.perf_counter() - start
+
+            start = time.perf_counter()
+            nav = cash + holdings @ prices
+            expected = np.lexsort((np.arange(users), -nav))
+            recompute_time += time.perf_counter() - start
+
+        # Users are in slots in id order, so slots are user ids here
+        if not np.allclose(boards.nav, nav, rtol=0, atol=1e-6):
+            raise CommandError("Values differ from a full recompute.")
+        ranked = [slot for _, slot, _ in boards.ranking.slice(0, users)]
+        if sorted(ranked) != list(range(users)):
+            raise CommandError("Ranking lost or duplicated users.")
+        # Ranked by value in cents: users within a cent of each other may swap
+        if not np.allclose(nav[ranked], nav[expected], rtol=0, atol=0.01):
+            raise CommandError("Ranking differs from a full recompute.")
+
+        sample = rng.integers(users, size=1000).tolist()
+        start = time.perf_counter()
+        for user_id in sample:
+            boards.ranking.rank(ranking_key(user_id, boards.nav[user_id]))
+        rank_time = (time.perf_counter() - start) / len(sample)
+        start = time.perf_counter()
+        for user_id in sample:
+            boards.ranking.around(ranking_key(user_id, boards.nav[user_id]), 5)
+        around_time = (time.perf_counter() - start) / len(sample)
+
+        ticks = options["ticks"]
+        self.stdout.write(
+            f"Loaded {users} users in {load_time:.2f}s. {ticks} ticks: "
+            f"{tick_time / ticks * 1e3:.2f}ms/tick "
+            f"(full recompute {recompute_time / ticks * 1e3:.2f}ms/tick). "
+            f"Rank {rank_time * 1e6:.1f}us, around me {around_time * 1e6:.1f}us."
+        )
+        self.stdout.write(self.style.SUCCESS("Ranking matches a full recompute."))
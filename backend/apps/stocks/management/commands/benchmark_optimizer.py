@@ -0,0 +1,92 @@
+"""
+Management command to benchmark the mean-variance optimizer.
+
+Optimizes a random universe and checks the result against a large sample
+of random long-only portfolios: none may have a lower variance than the
+minimum-variance portfolio or a higher Sharpe ratio than the max-Sharpe
+one. Then times rebalance plans from the cached optimization. No database
+access.
+"""
+
+import time
+from decimal import Decimal
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.stocks.optimizer import Optimization, rebalance_orders
+from apps.stocks.risk import ReturnsMatrix
+
+
+class Command(BaseCommand):
+    help = "Benchmark the efficient frontier and rebalance plans."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--symbols", type=int, default=10, help="Stocks in the universe."
+        )
+        parser.add_argument(
+            "--samples", type=int, default=200_000, help="Random portfolios."
+        )
+        parser.add_argument(
+            "--plans", type=int, default=1000, help="Rebalance plans to time."
+        )
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(42)
+        size = options["symbols"]
+        returns = rng.normal(0.0004, 0.01, (252, 1)) * rng.uniform(
+            0.5, 1.5, size
+        ) + rng.normal(rng.uniform(-0.0005, 0.001, size), 0.015, (252, size))
+        symbols = [f"S{i}" for i in range(size)]
+        matrix = ReturnsMatrix(list(range(size)), symbols, returns)
+
+        start = time.perf_counter()
+        optimization = Optimization(matrix, symbols)
+        built = time.perf_counter() - start
+
+        annual = 252
+        means = matrix.means * annual
+        covariance = matrix.covariance * annual
+        samples = rng.dirichlet(np.ones(size) * 0.3, options["samples"])
+        sample_volatility = np.sqrt(
+            np.einsum("ij,jk,ik->i", samples, covariance, samples)
+        )
+        sample_sharpe = samples @ means / sample_volatility
+
+        best = optimization.optimal
+        min_volatility = optimization.volatility[best["min_variance"]]
+        max_sharpe = optimization.sharpe[best["max_sharpe"]]
+        if sample_volatility.min() < min_volatility - 1e-6:
+            raise CommandError("A sampled portfolio has a lower variance.")
+        if sample_sharpe.max() > max_sharpe + 1e-3:
+            raise CommandError("A sampled portfolio has a higher Sharpe ratio.")
+
+        target = dict(enumerate(optimization.weights[best["max_sharpe"]].tolist()))
+        prices = {
+            i: Decimal(str(round(p, 2)))
+            for i, p in enumerate(rng.uniform(10, 500, size))
+        }
+        start = time.perf_counter()
+        for _ in range(options["plans"]):
+            shares = {
+                i: Decimal(int(n)) for i, n in enumerate(rng.integers(0, 50, size))
+            }
+            rebalance_orders(target, prices, shares, Decimal("10000"))
+        planned = time.perf_counter() - start
+
+        self.stdout.write(
+            f"Frontier of {len(optimization.frontier())} points over {size} stocks "
+            f"in {built * 1000:.0f}ms"
+        )
+        self.stdout.write(
+            f"Min volatility {min_volatility:.4f} (best sampled "
+            f"{sample_volatility.min():.4f}), max Sharpe {max_sharpe:.4f} "
+            f"(best sampled {sample_sharpe.max():.4f})"
+        )
+        self.stdout.write(
+            f"{options['plans']} rebalance plans in {planned * 1000:.0f}ms"
+        )
+        self.stdout.write(
+            self.style.SUCCESS("No sampled portfolio beats the optimizer.")
+        )
@@ -0,0 +1,55 @@
+"""
+Management command to benchmark the limit/stop order books.
+
+Loads many random open orders into an in-memory book and measures how long
+price ticks take to find and remove the triggered ones. No database access.
+"""
+
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.stocks.orders import SymbolBook
+
+
+class Command(BaseCommand):
+    help = "Benchmark order book tick matching with many open orders."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--orders", type=int, default=100_000, help="Number of open orders."
+        )
+        parser.add_argument(
+            "--ticks", type=int, default=10_000, help="Number of price ticks."
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+        book = SymbolBook()
+
+        start = time.perf_counter()
+        # Orders waiting for a rise sit above the opening price of 100,
+        # orders waiting for a fall sit below it.
+        for order_id in range(options["orders"]):
+            rises = rng.random() < 0.5
+            trigger = rng.uniform(100, 150) if rises else rng.uniform(50, 100)
+            book.add(order_id, round(trigger, 2), triggers_on_rise=rises)
+        load_time = time.perf_counter() - start
+
+        # A random walk around the middle of the book, so each tick
+        # triggers only the orders close to the current price.
+        price = 100.0
+        triggered = 0
+        start = time.perf_counter()
+        for _ in range(options["ticks"]):
+            price = round(price + rng.gauss(0, 0.05), 2)
+            triggered += len(book.pop_triggered(price))
+        tick_time = time.perf_counter() - start
+
+        self.stdout.write(
+            f"Loaded {options['orders']} orders in {load_time:.2f}s. "
+            f"{options['ticks']} ticks in {tick_time * 1000:.1f}ms "
+            f"({tick_time / options['ticks'] * 1e6:.1f}us/tick), "
+            f"{triggered} orders triggered, {len(book)} still open."
+        )
@@ -0,0 +1,78 @@
+"""
+Management command to benchmark "price as of T" lookups for time-travel
+scenarios.
+
+Builds an in-memory price timeline over random daily bars, then prices
+random (stock, clock) pairs, as many users at different clocks would, and
+checks a sample against a linear scan. No database access.
+"""
+
+import time
+from datetime import datetime
+from datetime import timezone as dt_timezone
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.stocks.timeline import PriceTimeline
+
+DAY_SECONDS = 24 * 60 * 60
+START = int(datetime(2010, 1, 4, tzinfo=dt_timezone.utc).timestamp())
+
+
+class Command(BaseCommand):
+    help = "Benchmark historical price lookups from the in-memory timeline."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--symbols", type=int, default=100, help="Number of stocks."
+        )
+        parser.add_argument(
+            "--days", type=int, default=2520, help="Daily bars per stock."
+        )
+        parser.add_argument(
+            "--lookups", type=int, default=100_000, help="Lookups to time."
+        )
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(42)
+        symbols, days = options["symbols"], options["days"]
+
+        # Weekday-like calendar: skip a random day now and then
+        offsets = np.cumsum(rng.choice([1, 1, 1, 1, 3], days)) * DAY_SECONDS
+        series = {
+            stock_id: (START + offsets, 100 * np.cumprod(1 + rng.normal(0, 0.01, days)))
+            for stock_id in range(1, symbols + 1)
+        }
+        timeline = PriceTimeline(series, {})
+
+        stock_ids = rng.integers(1, symbols + 1, options["lookups"]).tolist()
+        span = int(offsets[-1]) + 5 * DAY_SECONDS
+        clocks = [
+            datetime.fromtimestamp(START + int(offset), tz=dt_timezone.utc)
+            for offset in rng.integers(0, span, options["lookups"])
+        ]
+
+        start = time.perf_counter()
+        prices = [
+            timeline.price_at(stock_id, clock)
+            for stock_id, clock in zip(stock_ids, clocks)
+        ]
+        elapsed = time.perf_counter() - start
+
+        for stock_id, clock, price in list(zip(stock_ids, clocks, prices))[:1000]:
+            times, closes = series[stock_id]
+            before = [
+                close
+                for seconds, close in zip(times, closes)
+                if seconds <= clock.timestamp()
+            ]
+            expected = f"{before[-1]:.2f}" if before else None
+            if (str(price) if price is not None else None) != expected:
+                raise CommandError(f"Wrong price for stock {stock_id} at {clock}")
+
+        self.stdout.write(
+            f"{options['lookups']} lookups over {symbols} stocks x {days} days "
+            f"in {elapsed:.2f}s ({elapsed / options['lookups'] * 1e6:.1f} us each)"
+        )
+        self.stdout.write(self.style.SUCCESS("Prices match a linear scan."))
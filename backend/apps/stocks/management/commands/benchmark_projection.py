@@ -0,0 +1,91 @@
+"""
+Management command to benchmark Monte Carlo projections.
+
+Projects a random correlated portfolio through the process pool while a
+heartbeat task measures how late the event loop runs it, then checks the
+simulated mean final value against its analytic expectation. No database
+access.
+"""
+
+import asyncio
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.stocks.projection import ProjectionInputs, ProjectionService
+
+
+class Command(BaseCommand):
+    help = "Benchmark a Monte Carlo projection in the worker pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--paths", type=int, default=10_000, help="Simulated paths."
+        )
+        parser.add_argument(
+            "--days", type=int, default=252, help="Trading days projected."
+        )
+        parser.add_argument(
+            "--holdings", type=int, default=10, help="Stocks in the portfolio."
+        )
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(42)
+        holdings = options["holdings"]
+        returns = rng.normal(0.0005, 0.01, (252, 1)) + rng.normal(
+            0, 0.012, (252, holdings)
+        )
+        inputs = ProjectionInputs(
+            symbols=[f"S{i}" for i in range(holdings)],
+            values=rng.uniform(1000, 5000, holdings),
+            means=returns.mean(axis=0),
+            covariance=np.cov(returns, rowvar=False),
+        )
+        result, elapsed, lag, updates = asyncio.run(self.project(inputs, options))
+
+        expected = float(inputs.values @ (1 + inputs.means) ** options["days"])
+        error = abs(result["expected_value"] / expected - 1)
+        self.stdout.write(
+            f"{options['paths']} paths x {options['days']} days of {holdings} "
+            f"stocks in {elapsed:.2f}s, {updates} progress updates"
+        )
+        self.stdout.write(f"Longest event loop stall: {lag * 1000:.1f}ms")
+        self.stdout.write(
+            f"Mean final value {result['expected_value']:.2f}, "
+            f"expected {expected:.2f} ({error:.2%} off)"
+        )
+        if error > 0.02:
+            raise CommandError("Simulated mean is far from its expectation.")
+        self.stdout.write(self.style.SUCCESS("Projection matches expectation."))
+
+    async def project(self, inputs, options):
+        updates = 0
+        lag = 0.0
+        running = True
+
+        async def on_progress(done, total):
+            nonlocal updates
+            updates += 1
+
+        async def heartbeat():
+            # Sleeps 10ms at a time; any extra delay is time the loop was blocked
+            nonlocal lag
+            while running:
+                start = time.perf_counter()
+                await asyncio.sleep(0.01)
+                lag = max(lag, time.perf_counter() - start - 0.01)
+
+        # Warm up the pool so worker start-up isn't timed
+        await ProjectionService.run(inputs, 2, 10, on_progress)
+        updates = 0
+
+        monitor = asyncio.create_task(heartbeat())
+        start = time.perf_counter()
+        result = await ProjectionService.run(
+            inputs, options["days"], options["paths"], on_progress, seed=1
+        )
+        elapsed = time.perf_counter() - start
+        running = False
+        await monitor
+        return result, elapsed, lag, updates
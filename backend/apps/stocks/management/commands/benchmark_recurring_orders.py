@@ -0,0 +1,162 @@
+"""
+Management command to benchmark the bulk execution of recurring buys.
+
+Creates throwaway users with many due orders over a few benchmark stocks,
+executes them with the same service the run_recurring_orders job uses, and
+checks the result: each user's balance must equal the starting balance
+minus the recorded buys, each position and its tax lots the shares bought,
+and no due order may be left behind.
+"""
+
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from apps.stocks.models import Portfolio, RecurringOrder, Stock, TaxLot, Transaction
+from apps.stocks.recurring import RecurringOrderService
+
+BENCH_USERNAME_PREFIX = "__recurring_benchmark_"
+BENCH_SYMBOL_PREFIX = "BENCHR"
+
+
+class Command(BaseCommand):
+    help = "Benchmark bulk execution of due recurring buys and verify balances."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--orders", type=int, default=50_000, help="Number of due orders."
+        )
+        parser.add_argument(
+            "--users", type=int, default=10_000, help="Number of users."
+        )
+        parser.add_argument("--stocks", type=int, default=5, help="Number of stocks.")
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        self._clean_up()
+
+        rng = np.random.default_rng(42)
+        now = timezone.now()
+        stocks = Stock.objects.bulk_create(
+            [
+                Stock(
+                    symbol=f"{BENCH_SYMBOL_PREFIX}{index}",
+                    name="Benchmark Stock",
+                    current_price=price,
+                    previous_close=price,
+                )
+                for index, price in enumerate(
+                    Decimal(str(p))
+                    for p in np.round(rng.uniform(5, 500, options["stocks"]), 2)
+                )
+            ]
+        )
+        # Balances from nothing to plenty, so some orders can't be funded
+        initial = {
+            f"{BENCH_USERNAME_PREFIX}{index}__": Decimal(str(balance))
+            for index, balance in enumerate(
+                np.round(rng.uniform(0, 2000, options["users"]), 2)
+            )
+        }
+        users = User.objects.bulk_create(
+            [
+                User(username=username, virtual_balance=balance)
+                for username, balance in initial.items()
+            ]
+        )
+        if users[0].pk is None:
+            users = list(User.objects.filter(username__in=initial))
+
+        frequencies = [frequency for frequency, _ in RecurringOrder.FREQUENCIES]
+        RecurringOrder.objects.bulk_create(
+            [
+                RecurringOrder(
+                    user=users[user],
+                    stock=stocks[stock],
+                    amount=Decimal(str(amount)),
+                    frequency=frequencies[frequency],
+                    next_run_at=now - timedelta(minutes=int(minutes)),
+                )
+                for user, stock, amount, frequency, minutes in zip(
+                    rng.integers(0, len(users), options["orders"]).tolist(),
+                    rng.integers(0, len(stocks), options["orders"]).tolist(),
+                    np.round(rng.uniform(10, 250, options["orders"]), 2).tolist(),
+                    rng.integers(0, len(frequencies), options["orders"]).tolist(),
+                    rng.integers(0, 60 * 24 * 30, options["orders"]).tolist(),
+                )
+            ],
+            batch_size=5000,
+        )
+
+        try:
+            start = time.perf_counter()
+            outcomes = RecurringOrderService.run_due(now)
+            elapsed = time.perf_counter() - start
+            self._verify(users, initial, outcomes, now)
+        finally:
+            self._clean_up()
+
+        total = sum(outcomes.values())
+        self.stdout.write(
+            f"{total} due orders in {elapsed:.2f}s ({total / elapsed:.0f} orders/s): "
+            f"{outcomes['filled']} filled, "
+            f"{outcomes['insufficient_balance']} with insufficient balance."
+        )
+        self.stdout.write(self.style.SUCCESS("Balances, positions and lots match."))
+
+    def _verify(self, users, initial, outcomes, now):
+        """Compare final state with the sums of the recorded transactions."""
+        bought = {
+            row["user_id"]: row
+            for row in Transaction.objects.filter(user__in=users)
+            .values("user_id")
+            .annotate(amount=Sum("total_amount"), trades=Count("id"))
+        }
+        trades = sum(row["trades"] for row in bought.values())
+        if trades != outcomes["filled"]:
+            raise CommandError(f"Trades mismatch: {trades} != {outcomes['filled']}")
+
+        for user in get_user_model().objects.filter(pk__in=[u.pk for u in users]):
+            spent = bought[user.pk]["amount"] if user.pk in bought else Decimal("0")
+            expected = initial[user.username] - spent
+            if user.virtual_balance != expected or user.virtual_balance < 0:
+                raise CommandError(
+                    f"Balance mismatch for {user.username}: "
+                    f"{user.virtual_balance} != {expected}"
+                )
+
+        shares = {
+            (row["user_id"], row["stock_id"]): row["shares"]
+            for row in Transaction.objects.filter(user__in=users)
+            .values("user_id", "stock_id")
+            .annotate(shares=Sum("shares"))
+        }
+        held = dict(
+            (((user_id, stock_id), amount))
+            for user_id, stock_id, amount in Portfolio.objects.filter(
+                user__in=users
+            ).values_list("user_id", "stock_id", "shares")
+        )
+        in_lots = {
+            (row["user_id"], row["stock_id"]): row["shares"]
+            for row in TaxLot.objects.filter(user__in=users)
+            .values("user_id", "stock_id")
+            .annotate(shares=Sum("remaining_shares"))
+        }
+        if not shares == held == in_lots:
+            raise CommandError("Positions or tax lots don't match the trades.")
+
+        if RecurringOrder.objects.filter(user__in=users, next_run_at__lte=now).exists():
+            raise CommandError("Due orders were left behind.")
+
+    def _clean_up(self):
+        get_user_model().objects.filter(
+            username__startswith=BENCH_USERNAME_PREFIX
+        ).delete()
+        Stock.objects.filter(symbol__startswith=BENCH_SYMBOL_PREFIX).delete()
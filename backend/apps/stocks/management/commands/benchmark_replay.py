@@ -0,0 +1,140 @@
+"""
+Management command to benchmark the market replay.
+
+Creates throwaway stocks with random daily bars, plays them as fast as
+possible (no waiting between ticks) and reports the sustained tick rate
+and the queries run per tick, split into reads and writes. Price lookups
+never hit the database: bars are preloaded, so the only reads left come
+from the order matching engine and the alert monitor. The throwaway stocks
+have no holders, orders or alerts, channel messages are dropped and the
+stocks are deleted afterwards, so no real user or connection is affected.
+"""
+
+import time
+from collections import Counter
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from apps.stocks.corporate_actions import day_start
+from apps.stocks.models import Stock, StockPriceHistory
+from apps.stocks.replay import MarketReplay
+
+BENCH_SYMBOL_PREFIX = "BENCHP"
+BENCH_START = date(2000, 1, 3)
+
+
+class Command(BaseCommand):
+    help = "Measure the sustained tick rate of a market replay."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--ticks", type=int, default=2000, help="Number of ticks to play."
+        )
+        parser.add_argument(
+            "--ticks-per-day", type=int, default=60, help="Price ticks per day."
+        )
+        parser.add_argument("--stocks", type=int, default=10, help="Number of stocks.")
+        parser.add_argument(
+            "--days", type=int, default=250, help="Daily bars per stock."
+        )
+
+    def handle(self, *args, **options):
+        self._clean_up()
+        symbols = self._create_stocks(options["stocks"], options["days"])
+
+        try:
+            start = time.perf_counter()
+            replay = MarketReplay.load(symbols, ticks_per_day=options["ticks_per_day"])
+            loaded = time.perf_counter() - start
+            if not len(replay.days):
+                raise CommandError("No price history to replay.")
+            self.stdout.write(
+                f"Loaded {len(replay.days)} days of {len(replay.cursors)} stocks "
+                f"in {loaded:.2f}s."
+            )
+
+            played = 0
+            kinds = Counter()
+            history_reads = 0
+
+            def count(execute, sql, params, many, context):
+                # Counted here rather than from connection.queries, which
+                # only keeps the last 9,000
+                nonlocal history_reads
+                kinds[sql.split()[0].upper()] += 1
+                history_reads += "stock_price_history" in sql
+                return execute(sql, params, many, context)
+
+            # Keep the benchmark's ticks away from live connections
+            channel_layer = mock.patch("apps.stocks.streams._group_send_many")
+            with channel_layer, connection.execute_wrapper(count):
+                start = time.perf_counter()
+                for _, _, changed in replay.ticks():
+                    replay.publish(changed)
+                    played += 1
+                    if played == options["ticks"]:
+                        break
+                elapsed = time.perf_counter() - start
+        finally:
+            self._clean_up()
+
+        self.stdout.write(
+            f"{played} ticks in {elapsed:.2f}s ({played / elapsed:.0f} ticks/s)"
+        )
+        self.stdout.write(
+            "Queries per tick: "
+            + ", ".join(
+                f"{kind} {count / played:.1f}" for kind, count in sorted(kinds.items())
+            )
+        )
+        if history_reads:
+            raise CommandError(f"{history_reads} price history reads during replay.")
+        self.stdout.write(self.style.SUCCESS("No price history reads during replay."))
+
+    def _create_stocks(self, count, days):
+        """Throwaway stocks with a random walk of daily bars each."""
+        rng = np.random.default_rng(42)
+        stocks = Stock.objects.bulk_create(
+            [
+                Stock(
+                    symbol=f"{BENCH_SYMBOL_PREFIX}{index}",
+                    name="Benchmark Stock",
+                    current_price=Decimal("100.00"),
+                )
+                for index in range(count)
+            ]
+        )
+        if stocks and stocks[0].pk is None:
+            stocks = list(Stock.objects.filter(symbol__startswith=BENCH_SYMBOL_PREFIX))
+
+        closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (days, count)), axis=0))
+        opens = closes * np.exp(rng.normal(0, 0.005, (days, count)))
+        StockPriceHistory.objects.bulk_create(
+            [
+                StockPriceHistory(
+                    stock=stock,
+                    timestamp=day_start(BENCH_START + timedelta(days=day)),
+                    open_price=Decimal(f"{opens[day, column]:.2f}"),
+                    high_price=Decimal(
+                        f"{max(opens[day, column], closes[day, column]) * 1.01:.2f}"
+                    ),
+                    low_price=Decimal(
+                        f"{min(opens[day, column], closes[day, column]) * 0.99:.2f}"
+                    ),
+                    close_price=Decimal(f"{closes[day, column]:.2f}"),
+                    volume=int(volume),
+                )
+                for column, stock in enumerate(stocks)
+                for day, volume in enumerate(rng.integers(10**6, 10**8, days).tolist())
+            ],
+            batch_size=5000,
+        )
+        return [stock.symbol for stock in stocks]
+
+    def _clean_up(self):
+        Stock.objects.filter(symbol__startswith=BENCH_SYMBOL_PREFIX).delete()
@@ -0,0 +1,82 @@
+"""
+Management command to benchmark portfolio risk analytics.
+
+Builds the shared returns matrix for a random universe, then computes the
+risk of many random portfolios from it and checks volatility and beta
+against a direct computation on each portfolio's own return series. No
+database access.
+"""
+
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.stocks.risk import ReturnsMatrix, portfolio_risk
+
+
+class Command(BaseCommand):
+    help = "Benchmark risk figures computed from the shared returns matrix."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--symbols", type=int, default=500, help="Stocks in the universe."
+        )
+        parser.add_argument(
+            "--days", type=int, default=252, help="Daily returns (one year)."
+        )
+        parser.add_argument(
+            "--portfolios", type=int, default=10_000, help="Portfolios to value."
+        )
+        parser.add_argument(
+            "--holdings", type=int, default=10, help="Stocks per portfolio."
+        )
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(42)
+        symbols, days = options["symbols"], options["days"]
+        market = rng.normal(0.0004, 0.01, (days, 1))
+        returns = market * rng.uniform(0.5, 1.5, symbols) + rng.normal(
+            0, 0.015, (days, symbols)
+        )
+
+        start = time.perf_counter()
+        matrix = ReturnsMatrix(
+            list(range(symbols)), [f"S{i}" for i in range(symbols)], returns
+        )
+        built = time.perf_counter() - start
+
+        portfolios = [
+            (
+                rng.choice(symbols, options["holdings"], replace=False).tolist(),
+                rng.dirichlet(np.ones(options["holdings"])),
+            )
+            for _ in range(options["portfolios"])
+        ]
+
+        start = time.perf_counter()
+        results = [
+            portfolio_risk(matrix, columns, weights) for columns, weights in portfolios
+        ]
+        elapsed = time.perf_counter() - start
+
+        benchmark = returns.mean(axis=1)
+        for (columns, weights), (_, volatility, beta, _) in list(
+            zip(portfolios, results)
+        )[:100]:
+            series = returns[:, columns] @ weights
+            expected_beta = np.cov(series, benchmark)[0, 1] / benchmark.var(ddof=1)
+            if not np.isclose(volatility, series.std(ddof=1)) or not np.isclose(
+                beta, expected_beta
+            ):
+                raise CommandError(f"Risk mismatch for columns {columns}")
+
+        self.stdout.write(
+            f"Returns matrix of {symbols} stocks x {days} days built in "
+            f"{built * 1000:.1f}ms"
+        )
+        self.stdout.write(
+            f"{options['portfolios']} portfolios of {options['holdings']} holdings "
+            f"in {elapsed:.2f}s ({elapsed / options['portfolios'] * 1e6:.0f} us each)"
+        )
+        self.stdout.write(self.style.SUCCESS("Volatility and beta match."))
@@ -0,0 +1,152 @@
+"""
+Management command to benchmark the nightly NAV snapshot job.
+
+Creates throwaway users with random cash and positions over a few
+benchmark stocks, runs the same job as snapshot_portfolios twice (first
+inserting, then overwriting the day's snapshots) and checks every
+throwaway user's snapshot against a Decimal valuation of their portfolio.
+"""
+
+import time
+from datetime import date
+from decimal import ROUND_HALF_UP, Decimal
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.stocks.models import Portfolio, PortfolioSnapshot, Stock
+from apps.stocks.performance import PerformanceService
+
+BENCH_USERNAME_PREFIX = "__snapshot_benchmark_"
+BENCH_SYMBOL_PREFIX = "BENCHS"
+BENCH_DATE = date(2000, 1, 3)
+
+CENT = Decimal("0.01")
+
+
+class Command(BaseCommand):
+    help = "Benchmark the nightly NAV snapshot job for many users."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--users", type=int, default=100_000, help="Number of users."
+        )
+        parser.add_argument(
+            "--positions", type=int, default=5, help="Positions per user."
+        )
+        parser.add_argument("--stocks", type=int, default=50, help="Number of stocks.")
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        self._clean_up()
+
+        rng = np.random.default_rng(42)
+        users, positions = options["users"], options["positions"]
+        if not 0 < positions <= options["stocks"]:
+            raise CommandError("--positions must be between 1 and --stocks.")
+
+        stocks = Stock.objects.bulk_create(
+            [
+                Stock(
+                    symbol=f"{BENCH_SYMBOL_PREFIX}{index}",
+                    name="Benchmark Stock",
+                    current_price=Decimal(str(price)),
+                )
+                for index, price in enumerate(
+                    np.round(rng.uniform(1, 1000, options["stocks"]), 2).tolist()
+                )
+            ]
+        )
+        initial = {
+            f"{BENCH_USERNAME_PREFIX}{index}__": Decimal(str(balance))
+            for index, balance in enumerate(
+                np.round(rng.uniform(0, 100_000, users), 2).tolist()
+            )
+        }
+        created = User.objects.bulk_create(
+            [
+                User(username=username, virtual_balance=balance)
+                for username, balance in initial.items()
+            ],
+            batch_size=5000,
+        )
+        if created[0].pk is None:
+            created = list(User.objects.filter(username__in=initial))
+
+        # Consecutive stocks from a random first one, so each is held once
+        first = rng.integers(0, len(stocks), users)
+        shares = np.round(rng.uniform(0.01, 100, (users, positions)), 4)
+        Portfolio.objects.bulk_create(
+            (
+                Portfolio(
+                    user=user,
+                    stock=stocks[(start + offset) % len(stocks)],
+                    shares=Decimal(str(amount)),
+                    average_buy_price=Decimal("1.00"),
+                )
+                for user, start, row in zip(created, first.tolist(), shares.tolist())
+                for offset, amount in enumerate(row)
+            ),
+            batch_size=5000,
+        )
+
+        try:
+            timings = []
+            for _ in range(2):
+                start = time.perf_counter()
+                written = PerformanceService.take_snapshots(BENCH_DATE)
+                timings.append(time.perf_counter() - start)
+            self._verify(created)
+        finally:
+            self._clean_up()
+
+        insert_time, overwrite_time = timings
+        self.stdout.write(
+            f"Snapshot of {written} users ({users * positions} benchmark "
+            f"positions): {insert_time:.2f}s inserting "
+            f"({written / insert_time:.0f} users/s), {overwrite_time:.2f}s "
+            "overwriting."
+        )
+        self.stdout.write(self.style.SUCCESS("Snapshots match the portfolios."))
+
+    def _verify(self, users):
+        """Compare each throwaway user's snapshot with a Decimal valuation."""
+        user_ids = [user.pk for user in users]
+        holdings = dict.fromkeys(user_ids, Decimal("0"))
+        for user_id, shares, price in Portfolio.objects.filter(
+            user_id__in=user_ids
+        ).values_list("user_id", "shares", "stock__current_price"):
+            holdings[user_id] += shares * price
+
+        snapshots = {
+            user_id: (cash, holdings_value, nav)
+            for user_id, cash, holdings_value, nav in PortfolioSnapshot.objects.filter(
+                user_id__in=user_ids, date=BENCH_DATE
+            ).values_list("user_id", "cash", "holdings_value", "nav")
+        }
+        if len(snapshots) != len(users):
+            raise CommandError(
+                f"Wrote {len(snapshots)} snapshots for {len(users)} users."
+            )
+
+        for user in get_user_model().objects.filter(pk__in=user_ids):
+            cash, holdings_value, nav = snapshots[user.pk]
+            expected = holdings[user.pk].quantize(CENT, rounding=ROUND_HALF_UP)
+            # Valued in floating point: allow a cent of rounding
+            if (
+                cash != user.virtual_balance
+                or abs(holdings_value - expected) > CENT
+                or nav != cash + holdings_value
+            ):
+                raise CommandError(
+                    f"Snapshot mismatch for {user.username}: "
+                    f"{cash} + {holdings_value} = {nav}, expected "
+                    f"{user.virtual_balance} + {expected}"
+                )
+
+    def _clean_up(self):
+        get_user_model().objects.filter(
+            username__startswith=BENCH_USERNAME_PREFIX
+        ).delete()
+        Stock.objects.filter(symbol__startswith=BENCH_SYMBOL_PREFIX).delete()
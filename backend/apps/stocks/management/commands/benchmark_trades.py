@@ -0,0 +1,131 @@
+"""
+Management command to benchmark concurrent trade execution.
+
+Fires many buy/sell orders for one user from parallel threads, then checks
+that no update was lost: the final balance and position must match the
+recorded transactions exactly, and so must the shares left in tax lots.
+"""
+
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Sum
+
+from apps.stocks.models import Portfolio, Stock, TaxLot, Transaction
+from apps.stocks.trading import TradeError, TradingService
+
+BENCH_USERNAME = "__trade_benchmark__"
+BENCH_SYMBOL = "BENCH"
+
+
+class Command(BaseCommand):
+    help = "Benchmark parallel trades and verify exact balance conservation."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--trades", type=int, default=1000, help="Number of trades to run."
+        )
+        parser.add_argument(
+            "--workers", type=int, default=16, help="Number of parallel threads."
+        )
+        parser.add_argument(
+            "--balance",
+            type=Decimal,
+            default=Decimal("10000.00"),
+            help="Starting balance (low values exercise insufficient funds).",
+        )
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        User.objects.filter(username=BENCH_USERNAME).delete()
+        Stock.objects.filter(symbol=BENCH_SYMBOL).delete()
+
+        initial_balance = options["balance"]
+        user = User.objects.create(
+            username=BENCH_USERNAME, virtual_balance=initial_balance
+        )
+        stock = Stock.objects.create(
+            symbol=BENCH_SYMBOL,
+            name="Benchmark Stock",
+            current_price=Decimal("37.13"),
+            previous_close=Decimal("37.13"),
+        )
+
+        rng = random.Random(42)
+        orders = [
+            (
+                rng.choice(["buy", "buy", "sell"]),
+                Decimal(rng.randint(1, 400)) / Decimal("100"),
+            )
+            for _ in range(options["trades"])
+        ]
+
+        def run(order):
+            transaction_type, shares = order
+            try:
+                TradingService.execute(user, stock, shares, transaction_type)
+                return True
+            except TradeError:
+                return False
+            finally:
+                connection.close()
+
+        try:
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+                outcomes = list(pool.map(run, orders))
+            elapsed = time.perf_counter() - start
+
+            self._verify(user, stock, initial_balance)
+        finally:
+            User.objects.filter(username=BENCH_USERNAME).delete()
+            Stock.objects.filter(symbol=BENCH_SYMBOL).delete()
+
+        executed = sum(outcomes)
+        self.stdout.write(
+            f"{len(orders)} orders in {elapsed:.2f}s "
+            f"({len(orders) / elapsed:.0f} orders/s): "
+            f"{executed} executed, {len(orders) - executed} rejected."
+        )
+        self.stdout.write(self.style.SUCCESS("Balance and position conserved."))
+
+    def _verify(self, user, stock, initial_balance):
+        """Compare final state with the sums of the recorded transactions."""
+        totals = {
+            row["transaction_type"]: row
+            for row in Transaction.objects.filter(user=user)
+            .values("transaction_type")
+            .annotate(amount=Sum("total_amount"), shares=Sum("shares"))
+        }
+        zero = {"amount": Decimal("0"), "shares": Decimal("0")}
+        bought, sold = totals.get("buy", zero), totals.get("sell", zero)
+
+        user.refresh_from_db(fields=["virtual_balance"])
+        expected_balance = initial_balance - bought["amount"] + sold["amount"]
+        if user.virtual_balance != expected_balance:
+            raise CommandError(
+                f"Balance mismatch: {user.virtual_balance} != {expected_balance}"
+            )
+
+        held = (
+            Portfolio.objects.filter(user=user, stock=stock)
+            .values_list("shares", flat=True)
+            .first()
+        ) or Decimal("0")
+        expected_shares = bought["shares"] - sold["shares"]
+        if held != expected_shares:
+            raise CommandError(f"Position mismatch: {held} != {expected_shares}")
+
+        in_lots = TaxLot.objects.filter(user=user, stock=stock).aggregate(
+            total=Sum("remaining_shares")
+        )["total"] or Decimal("0")
+        if in_lots != held:
+            raise CommandError(f"Tax lots mismatch: {in_lots} != {held}")
+
+        if user.virtual_balance < 0 or held < 0:
+            raise CommandError("Balance or position went negative.")
@@ -0,0 +1,29 @@
+"""
+Management command to download daily price history for the tracked stocks.
+Fills StockPriceHistory, which backtests run on.
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.stocks.config import STOCK_SYMBOLS
+from apps.stocks.services import StockService
+
+
+class Command(BaseCommand):
+    help = "Download daily price history for the tracked stocks."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--period",
+            default="10y",
+            help="yfinance period (1mo, 1y, 5y, 10y, max). Defaults to 10y.",
+        )
+        parser.add_argument(
+            "symbols", nargs="*", help="Symbols to load. Defaults to all tracked."
+        )
+
+    def handle(self, *args, **options):
+        for symbol in options["symbols"] or STOCK_SYMBOLS:
+            stored = StockService.store_price_history(symbol, options["period"])
+            self.stdout.write(f"{symbol}: {stored} days")
+        self.stdout.write(self.style.SUCCESS("Price history loaded."))
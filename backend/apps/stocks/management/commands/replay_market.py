@@ -0,0 +1,85 @@
+"""
+Management command to replay stored price history as a live market.
+
+Plays the daily bars of StockPriceHistory (see load_price_history) through
+the same path as live price updates, at a speed multiplier of real trading
+time. Stop it with Ctrl+C; prices stay at the last replayed tick until the
+next live refresh.
+"""
+
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.stocks.config import REPLAY_SPEED, REPLAY_TICKS_PER_DAY, STOCK_SYMBOLS
+from apps.stocks.replay import MarketReplay, tick_seconds
+
+
+class Command(BaseCommand):
+    help = "Replay stored daily prices as live ticks at an accelerated speed."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--start",
+            type=date.fromisoformat,
+            default=None,
+            help="First day to replay (YYYY-MM-DD). Defaults to the oldest bar.",
+        )
+        parser.add_argument(
+            "--end",
+            type=date.fromisoformat,
+            default=None,
+            help="Last day to replay (YYYY-MM-DD). Defaults to the newest bar.",
+        )
+        parser.add_argument(
+            "--speed",
+            type=float,
+            default=REPLAY_SPEED,
+            help=f"Multiple of real trading time. Defaults to {REPLAY_SPEED} "
+            "(one trading day per 10 minutes).",
+        )
+        parser.add_argument(
+            "--ticks-per-day",
+            type=int,
+            default=REPLAY_TICKS_PER_DAY,
+            help=f"Price ticks per trading day. Defaults to {REPLAY_TICKS_PER_DAY}.",
+        )
+        parser.add_argument(
+            "symbols", nargs="*", help="Symbols to replay. Defaults to all tracked."
+        )
+
+    def handle(self, *args, **options):
+        if options["speed"] <= 0 or options["ticks_per_day"] < 1:
+            raise CommandError("--speed and --ticks-per-day must be positive.")
+
+        replay = MarketReplay.load(
+            options["symbols"] or STOCK_SYMBOLS,
+            options["start"],
+            options["end"],
+            options["ticks_per_day"],
+        )
+        if not len(replay.days):
+            raise CommandError("No price history to replay; run load_price_history.")
+
+        interval = tick_seconds(options["speed"], options["ticks_per_day"])
+        self.stdout.write(
+            f"Replaying {len(replay.days)} days of {len(replay.cursors)} stocks "
+            f"from {replay.days[0]}, one tick every {interval:.2f}s."
+        )
+
+        # Ticks are scheduled from the start time, so slow ticks don't drift
+        next_tick = time.monotonic()
+        current_day = None
+        try:
+            for day, _, changed in replay.ticks():
+                if day != current_day:
+                    current_day = day
+                    self.stdout.write(f"{day}")
+                time.sleep(max(0.0, next_tick - time.monotonic()))
+                replay.publish(changed)
+                next_tick += interval
+        except KeyboardInterrupt:
+            self.stdout.write(f"Replay stopped on {current_day}.")
+            return
+        self.stdout.write(self.style.SUCCESS("Replay finished."))
@@ -0,0 +1,36 @@
+"""
+Management command to execute due recurring buys.
+Meant to run periodically (e.g. every few minutes from cron).
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.stocks.config import RECURRING_ORDER_CHUNK_SIZE
+from apps.stocks.recurring import RecurringOrderService
+
+
+class Command(BaseCommand):
+    help = "Execute every recurring buy that is due."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=RECURRING_ORDER_CHUNK_SIZE,
+            help="Orders executed per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        outcomes = RecurringOrderService.run_due(chunk_size=options["chunk_size"])
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Ran {sum(outcomes.values())} recurring orders in {elapsed:.2f}s: "
+                f"{outcomes['filled']} filled, "
+                f"{outcomes['insufficient_balance']} with insufficient balance, "
+                f"{outcomes['no_price']} without a price."
+            )
+        )
@@ -0,0 +1,33 @@
+"""
+Management command to record end-of-day portfolio NAV snapshots.
+Meant to run nightly (e.g. from cron) after the last price update.
+"""
+
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from apps.stocks.performance import PerformanceService
+
+
+class Command(BaseCommand):
+    help = "Record the net asset value of every user's portfolio for a day."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--date",
+            type=date.fromisoformat,
+            default=None,
+            help="Snapshot date (YYYY-MM-DD). Defaults to today.",
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        written = PerformanceService.take_snapshots(options["date"])
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote {written} portfolio snapshots in {elapsed:.2f}s."
+            )
+        )
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.10 on 2026-10-19 08:55
+
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def backfill_price_change(apps, schema_editor):
+    Stock = apps.get_model("stocks", "Stock")
+
+    stocks = list(Stock.objects.exclude(previous_close=0))
+    for stock in stocks:
+        change = stock.current_price - stock.previous_close
+        stock.price_change = change.quantize(Decimal("0.01"))
+        stock.price_change_percent = (change / stock.previous_close * 100).quantize(
+            Decimal("0.0001")
+        )
+    Stock.objects.bulk_update(stocks, ["price_change", "price_change_percent"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stocks", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="stock",
+            name="price_change",
+            field=models.DecimalField(
+                db_index=True, decimal_places=2, default=0, max_digits=12
+            ),
+        ),
+        migrations.AddField(
+            model_name="stock",
+            name="price_change_percent",
+            field=models.DecimalField(
+                db_index=True, decimal_places=4, default=0, max_digits=10
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="stock",
+            index=models.Index(
+                fields=["sector", "price_change_percent"],
+                name="stocks_sector_change_idx",
+            ),
+        ),
+        migrations.RunPython(backfill_price_change, migrations.RunPython.noop),
+    ]
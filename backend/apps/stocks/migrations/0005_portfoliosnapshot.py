@@ -0,0 +1,50 @@
+# Generated by Django 5.2.10 on 2026-10-19 09:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stocks", "0004_order"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PortfolioSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("cash", models.DecimalField(decimal_places=2, max_digits=14)),
+                (
+                    "holdings_value",
+                    models.DecimalField(decimal_places=2, max_digits=14),
+                ),
+                ("nav", models.DecimalField(decimal_places=2, max_digits=14)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="portfolio_snapshots",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "portfolio_snapshots",
+                "ordering": ["date"],
+                "unique_together": {("user", "date")},
+            },
+        ),
+    ]
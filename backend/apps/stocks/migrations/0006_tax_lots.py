@@ -0,0 +1,148 @@
+# Generated by Django 5.2.10 on 2026-10-19 09:14
+
+from collections import defaultdict, deque
+from decimal import ROUND_HALF_UP, Decimal
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_tax_lots(apps, schema_editor):
+    """Replay existing trades FIFO to open lots and record realized P&L."""
+    Transaction = apps.get_model("stocks", "Transaction")
+    TaxLot = apps.get_model("stocks", "TaxLot")
+
+    open_lots = defaultdict(deque)
+    lots, sells = [], []
+    trades = Transaction.objects.filter(user__isnull=False).order_by(
+        "executed_at", "id"
+    )
+    for trade in trades.iterator():
+        positions = open_lots[(trade.user_id, trade.stock_id)]
+        if trade.transaction_type == "buy":
+            lot = TaxLot(
+                user_id=trade.user_id,
+                stock_id=trade.stock_id,
+                transaction_id=trade.id,
+                shares=trade.shares,
+                remaining_shares=trade.shares,
+                cost_per_share=trade.price_per_share,
+                acquired_at=trade.executed_at,
+            )
+            positions.append(lot)
+            lots.append(lot)
+            continue
+
+        shares, cost = trade.shares, Decimal("0")
+        while shares > 0 and positions:
+            lot = positions[0]
+            taken = min(lot.remaining_shares, shares)
+            lot.remaining_shares -= taken
+            cost += taken * lot.cost_per_share
+            shares -= taken
+            if lot.remaining_shares == 0:
+                positions.popleft()
+        # Shares sold without a recorded buy are costed at the sale price
+        cost += shares * trade.price_per_share
+        trade.cost_basis = cost.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+        trade.realized_profit_loss = trade.total_amount - trade.cost_basis
+        sells.append(trade)
+
+    TaxLot.objects.bulk_create(lots, batch_size=1000)
+    Transaction.objects.bulk_update(
+        sells, ["cost_basis", "realized_profit_loss"], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stocks", "0005_portfoliosnapshot"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TaxLot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("shares", models.DecimalField(decimal_places=4, max_digits=12)),
+                (
+                    "remaining_shares",
+                    models.DecimalField(decimal_places=4, max_digits=12),
+                ),
+                (
+                    "cost_per_share",
+                    models.DecimalField(decimal_places=2, max_digits=12),
+                ),
+                ("acquired_at", models.DateTimeField()),
+            ],
+            options={
+                "db_table": "tax_lots",
+                "ordering": ["acquired_at", "id"],
+            },
+        ),
+        migrations.AddField(
+            model_name="transaction",
+            name="cost_basis",
+            field=models.DecimalField(
+                blank=True, decimal_places=2, max_digits=12, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="transaction",
+            name="realized_profit_loss",
+            field=models.DecimalField(
+                blank=True, decimal_places=2, max_digits=12, null=True
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["user", "stock"], name="transactions_user_stock_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="taxlot",
+            name="stock",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE, to="stocks.stock"
+            ),
+        ),
+        migrations.AddField(
+            model_name="taxlot",
+            name="transaction",
+            field=models.OneToOneField(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="lot",
+                to="stocks.transaction",
+            ),
+        ),
+        migrations.AddField(
+            model_name="taxlot",
+            name="user",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="tax_lots",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="taxlot",
+            index=models.Index(
+                condition=models.Q(("remaining_shares__gt", 0)),
+                fields=["user", "stock", "acquired_at"],
+                name="tax_lots_open_idx",
+            ),
+        ),
+        migrations.RunPython(backfill_tax_lots, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.10 on 2026-10-19 09:16
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stocks", "0006_tax_lots"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["user", "executed_at", "id"], name="transactions_user_time_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.2.10 on 2026-10-19 09:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stocks", "0009_recurring_orders"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PriceAlert",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "condition",
+                    models.CharField(
+                        choices=[
+                            ("above", "Rises to"),
+                            ("below", "Falls to"),
+                            ("move", "Moves by percent"),
+                        ],
+                        max_length=5,
+                    ),
+                ),
+                (
+                    "target_price",
+                    models.DecimalField(
+                        blank=True, decimal_places=2, max_digits=12, null=True
+                    ),
+                ),
+                (
+                    "percent",
+                    models.DecimalField(
+                        blank=True, decimal_places=2, max_digits=6, null=True
+                    ),
+                ),
+                (
+                    "reference_price",
+                    models.DecimalField(decimal_places=2, max_digits=12),
+                ),
+                ("is_active", models.BooleanField(default=True)),
+                ("triggered_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "triggered_price",
+                    models.DecimalField(
+                        blank=True, decimal_places=2, max_digits=12, null=True
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "watchlist",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="alerts",
+                        to="stocks.watchlist",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "price_alerts",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["is_active", "id"], name="price_alerts_active_id_idx"
+                    )
+                ],
+            },
+        ),
+    ]
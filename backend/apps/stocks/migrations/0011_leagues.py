@@ -0,0 +1,110 @@
+# Generated by Django 5.2.10 on 2026-10-19 09:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+import apps.stocks.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stocks", "0010_price_alerts"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="League",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100)),
+                ("start_date", models.DateField()),
+                (
+                    "starting_balance",
+                    models.DecimalField(decimal_places=2, max_digits=14),
+                ),
+                (
+                    "invite_code",
+                    models.CharField(
+                        default=apps.stocks.models.new_invite_code,
+                        max_length=12,
+                        unique=True,
+                    ),
+                ),
+                ("version", models.PositiveIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "owner",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="owned_leagues",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "leagues",
+                "ordering": ["-created_at"],
+            },
+        ),
+        migrations.CreateModel(
+            name="LeagueMembership",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "baseline_nav",
+                    models.DecimalField(
+                        blank=True, decimal_places=2, max_digits=14, null=True
+                    ),
+                ),
+                ("joined_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "league",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="memberships",
+                        to="stocks.league",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="league_memberships",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "league_memberships",
+                "unique_together": {("league", "user")},
+            },
+        ),
+        migrations.AddField(
+            model_name="league",
+            name="members",
+            field=models.ManyToManyField(
+                related_name="leagues",
+                through="stocks.LeagueMembership",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.10 on 2026-10-19 10:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stocks", "0011_leagues"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CorporateAction",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "action_type",
+                    models.CharField(
+                        choices=[("split", "Split"), ("dividend", "Dividend")],
+                        max_length=8,
+                    ),
+                ),
+                ("ex_date", models.DateField()),
+                (
+                    "ratio",
+                    models.DecimalField(
+                        blank=True, decimal_places=6, max_digits=12, null=True
+                    ),
+                ),
+                (
+                    "amount",
+                    models.DecimalField(
+                        blank=True, decimal_places=4, max_digits=12, null=True
+                    ),
+                ),
+                ("applied_at", models.DateTimeField(blank=True, null=True)),
+                ("holders", models.PositiveIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "stock",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="corporate_actions",
+                        to="stocks.stock",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "corporate_actions",
+                "ordering": ["-ex_date", "-id"],
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("applied_at__isnull", True)),
+                        fields=["ex_date", "id"],
+                        name="corporate_actions_pending_idx",
+                    )
+                ],
+                "unique_together": {("stock", "action_type", "ex_date")},
+            },
+        ),
+    ]
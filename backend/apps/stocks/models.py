@@ -3,10 +3,14 @@ Stock models for FinLearn.
 Paper trading simulation with real stock data.
 """
 
+import secrets
 from decimal import Decimal
 
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
+
+from .quotes import publish_stock
 
 
 class Stock(models.Model):
@@ -26,29 +30,61 @@ class Stock(models.Model):
     volume = models.BigIntegerField(default=0)
     market_cap = models.BigIntegerField(default=0)
 
+    # Derived from current_price/previous_close; stored so that sorting and
+    # top-movers queries can run in SQL. Kept in sync by save().
+    price_change = models.DecimalField(
+        max_digits=12, decimal_places=2, default=0, db_index=True
+    )
+    price_change_percent = models.DecimalField(
+        max_digits=10, decimal_places=4, default=0, db_index=True
+    )
+
     last_updated = models.DateTimeField(auto_now=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    PRICE_FIELDS = {"current_price", "previous_close"}
+
     class Meta:
         db_table = "stocks"
         ordering = ["symbol"]
+        indexes = [
+            models.Index(
+                fields=["sector", "price_change_percent"],
+                name="stocks_sector_change_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.symbol} - {self.name}"
 
-    @property
-    def price_change(self) -> Decimal:
-        """Calculate price change from previous close."""
-        if self.previous_close == 0:
-            return Decimal("0")
-        return self.current_price - self.previous_close
+    def save(self, *args, **kwargs):
+        self.refresh_price_change()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and self.PRICE_FIELDS & set(update_fields):
+            kwargs["update_fields"] = {
+                *update_fields,
+                "price_change",
+                "price_change_percent",
+            }
+        super().save(*args, **kwargs)
+        transaction.on_commit(lambda: publish_stock(self))
+
+    def refresh_price_change(self) -> None:
+        """Recalculate the stored price change columns from previous close."""
+        self.price_change, self.price_change_percent = self.calculate_price_change(
+            self.current_price, self.previous_close
+        )
 
-    @property
-    def price_change_percent(self) -> Decimal:
-        """Calculate percentage price change."""
-        if self.previous_close == 0:
-            return Decimal("0")
-        return ((self.current_price - self.previous_close) / self.previous_close) * 100
+    @staticmethod
+    def calculate_price_change(current_price, previous_close):
+        """Calculate (change, change percent) from previous close."""
+        current_price = Decimal(str(current_price))
+        previous_close = Decimal(str(previous_close))
+        if previous_close == 0:
+            return Decimal("0"), Decimal("0")
+        change = current_price - previous_close
+        percent = (change / previous_close) * 100
+        return change.quantize(Decimal("0.01")), percent.quantize(Decimal("0.0001"))
 
 
 class StockPriceHistory(models.Model):
@@ -150,11 +186,26 @@ class Transaction(models.Model):
     price_per_share = models.DecimalField(max_digits=12, decimal_places=2)
     total_amount = models.DecimalField(max_digits=12, decimal_places=2)
 
+    # Sells only: cost of the tax lots consumed, and proceeds minus that cost
+    cost_basis = models.DecimalField(
+        max_digits=12, decimal_places=2, null=True, blank=True
+    )
+    realized_profit_loss = models.DecimalField(
+        max_digits=12, decimal_places=2, null=True, blank=True
+    )
+
     executed_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         db_table = "transactions"
         ordering = ["-executed_at"]
+        indexes = [
+            models.Index(fields=["user", "stock"], name="transactions_user_stock_idx"),
+            models.Index(
+                fields=["user", "executed_at", "id"],
+                name="transactions_user_time_idx",
+            ),
+        ]
 
     def __str__(self):
         return (
@@ -163,6 +214,49 @@ class Transaction(models.Model):
         )
 
 
+class TaxLot(models.Model):
+    """
+    Shares acquired by one buy, consumed by later sells in lot order
+    (FIFO by default, see TAX_LOT_METHOD) to compute realized P&L.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="tax_lots"
+    )
+    stock = models.ForeignKey(Stock, on_delete=models.CASCADE)
+    transaction = models.OneToOneField(
+        Transaction, on_delete=models.CASCADE, related_name="lot"
+    )
+
+    shares = models.DecimalField(max_digits=12, decimal_places=4)
+    remaining_shares = models.DecimalField(max_digits=12, decimal_places=4)
+    cost_per_share = models.DecimalField(max_digits=12, decimal_places=2)
+
+    acquired_at = models.DateTimeField()
+
+    class Meta:
+        db_table = "tax_lots"
+        ordering = ["acquired_at", "id"]
+        indexes = [
+            models.Index(
+                fields=["user", "stock", "acquired_at"],
+                name="tax_lots_open_idx",
+                condition=models.Q(remaining_shares__gt=0),
+            ),
+        ]
+
+    def __str__(self):
+        return (
+            f"{self.remaining_shares}/{self.shares} "
+            f"{self.stock.symbol} @ ${self.cost_per_share}"
+        )
+
+    @property
+    def cost_basis(self):
+        """Cost of the shares still held from this lot."""
+        return self.remaining_shares * self.cost_per_share
+
+
 class Watchlist(models.Model):
     """
     User's watchlist for tracking stocks.
@@ -185,3 +279,386 @@ class Watchlist(models.Model):
 
     def __str__(self):
         return f"{self.user} watching {self.stock.symbol}"
+
+
+class PriceAlert(models.Model):
+    """
+    Alert on a watched stock. Fires once, when the price rises to a target,
+    falls to a target, or moves by a percentage (either way) from the price
+    when the alert was set. Evaluated on every price tick (see alerts.py).
+    """
+
+    CONDITIONS = [
+        ("above", "Rises to"),
+        ("below", "Falls to"),
+        ("move", "Moves by percent"),
+    ]
+
+    watchlist = models.ForeignKey(
+        Watchlist, on_delete=models.CASCADE, related_name="alerts"
+    )
+
+    condition = models.CharField(max_length=5, choices=CONDITIONS)
+    target_price = models.DecimalField(
+        max_digits=12, decimal_places=2, null=True, blank=True
+    )
+    percent = models.DecimalField(max_digits=6, decimal_places=2, null=True, blank=True)
+    reference_price = models.DecimalField(max_digits=12, decimal_places=2)
+
+    is_active = models.BooleanField(default=True)
+    triggered_at = models.DateTimeField(null=True, blank=True)
+    triggered_price = models.DecimalField(
+        max_digits=12, decimal_places=2, null=True, blank=True
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "price_alerts"
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["is_active", "id"], name="price_alerts_active_id_idx"),
+        ]
+
+    def __str__(self):
+        if self.condition == "move":
+            return f"{self.watchlist} moves {self.percent}%"
+        return f"{self.watchlist} {self.condition} ${self.target_price}"
+
+
+class Order(models.Model):
+    """
+    Resting limit or stop order, executed by the matching engine when the
+    stock's price reaches the trigger price.
+    """
+
+    ORDER_TYPES = [
+        ("limit", "Limit"),
+        ("stop", "Stop"),
+    ]
+
+    STATUS_CHOICES = [
+        ("open", "Open"),
+        ("filled", "Filled"),
+        ("cancelled", "Cancelled"),
+        ("rejected", "Rejected"),
+    ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="orders"
+    )
+    stock = models.ForeignKey(Stock, on_delete=models.CASCADE)
+
+    transaction_type = models.CharField(
+        max_length=4, choices=Transaction.TRANSACTION_TYPES
+    )
+    order_type = models.CharField(max_length=5, choices=ORDER_TYPES)
+    shares = models.DecimalField(max_digits=12, decimal_places=4)
+    trigger_price = models.DecimalField(max_digits=12, decimal_places=2)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="open")
+    rejection_reason = models.CharField(max_length=200, blank=True)
+    transaction = models.OneToOneField(
+        Transaction,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="order",
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    executed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "orders"
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["user", "status"], name="orders_user_status_idx"),
+            models.Index(fields=["status", "id"], name="orders_status_id_idx"),
+        ]
+
+    def __str__(self):
+        return (
+            f"{self.order_type.upper()} {self.transaction_type.upper()} "
+            f"{self.shares} {self.stock.symbol} @ ${self.trigger_price}"
+        )
+
+    @property
+    def triggers_on_rise(self) -> bool:
+        """
+        Whether the order triggers when the price rises to the trigger price.
+        Buy limits and sell stops trigger when the price falls to it instead.
+        """
+        return (self.transaction_type == "buy") == (self.order_type == "stop")
+
+
+class RecurringOrder(models.Model):
+    """
+    Recurring buy of a fixed amount of a stock (dollar-cost averaging),
+    executed by the run_recurring_orders job once next_run_at is reached.
+    """
+
+    FREQUENCIES = [
+        ("daily", "Daily"),
+        ("weekly", "Weekly"),
+        ("biweekly", "Every two weeks"),
+        ("monthly", "Monthly"),
+    ]
+
+    STATUS_CHOICES = [
+        ("filled", "Filled"),
+        ("insufficient_balance", "Insufficient balance"),
+        ("no_price", "No price"),
+    ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="recurring_orders",
+    )
+    stock = models.ForeignKey(Stock, on_delete=models.CASCADE)
+
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    frequency = models.CharField(max_length=8, choices=FREQUENCIES, default="weekly")
+    next_run_at = models.DateTimeField(default=timezone.now)
+    is_active = models.BooleanField(default=True)
+
+    last_run_at = models.DateTimeField(null=True, blank=True)
+    last_status = models.CharField(max_length=20, choices=STATUS_CHOICES, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "recurring_orders"
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["next_run_at", "id"],
+                name="recurring_orders_due_idx",
+                condition=models.Q(is_active=True),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.frequency.upper()} BUY ${self.amount} {self.stock.symbol}"
+
+
+class CorporateAction(models.Model):
+    """
+    Stock split or cash dividend, recorded from the corporate-actions feed
+    and applied to holdings once by the apply_corporate_actions job.
+    """
+
+    ACTION_TYPES = [
+        ("split", "Split"),
+        ("dividend", "Dividend"),
+    ]
+
+    stock = models.ForeignKey(
+        Stock, on_delete=models.CASCADE, related_name="corporate_actions"
+    )
+    action_type = models.CharField(max_length=8, choices=ACTION_TYPES)
+    ex_date = models.DateField()
+
+    # Split: new shares per old share (4 for a 4-for-1 split, 0.1 for a
+    # 1-for-10 reverse split). Dividend: cash per share.
+    ratio = models.DecimalField(max_digits=12, decimal_places=6, null=True, blank=True)
+    amount = models.DecimalField(max_digits=12, decimal_places=4, null=True, blank=True)
+
+    applied_at = models.DateTimeField(null=True, blank=True)
+    holders = models.PositiveIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "corporate_actions"
+        ordering = ["-ex_date", "-id"]
+        unique_together = ["stock", "action_type", "ex_date"]
+        indexes = [
+            models.Index(
+                fields=["ex_date", "id"],
+                name="corporate_actions_pending_idx",
+                condition=models.Q(applied_at__isnull=True),
+            ),
+        ]
+
+    def __str__(self):
+        if self.action_type == "split":
+            ratio = self.ratio.normalize()
+            return f"{self.stock.symbol} {ratio}-for-1 split on {self.ex_date}"
+        return f"{self.stock.symbol} ${self.amount} dividend on {self.ex_date}"
+
+
+class PortfolioSnapshot(models.Model):
+    """
+    End-of-day net asset value (cash plus holdings) of a user's portfolio.
+    Written by the nightly snapshot_portfolios job, one row per user and day.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="portfolio_snapshots",
+    )
+    date = models.DateField()
+
+    cash = models.DecimalField(max_digits=14, decimal_places=2)
+    holdings_value = models.DecimalField(max_digits=14, decimal_places=2)
+    nav = models.DecimalField(max_digits=14, decimal_places=2)
+
+    class Meta:
+        db_table = "portfolio_snapshots"
+        ordering = ["date"]
+        unique_together = ["user", "date"]
+
+    def __str__(self):
+        return f"{self.user} {self.date}: ${self.nav}"
+
+
+def new_invite_code() -> str:
+    return secrets.token_urlsafe(6)
+
+
+class League(models.Model):
+    """
+    Private trading league. Members are ranked by the return of their
+    portfolio since start_date, valued as if each had started with
+    starting_balance. Users join with the league's invite code.
+    """
+
+    name = models.CharField(max_length=100)
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="owned_leagues",
+    )
+    members = models.ManyToManyField(
+        settings.AUTH_USER_MODEL, through="LeagueMembership", related_name="leagues"
+    )
+
+    start_date = models.DateField()
+    starting_balance = models.DecimalField(max_digits=14, decimal_places=2)
+    invite_code = models.CharField(max_length=12, unique=True, default=new_invite_code)
+
+    # Bumped when members join or leave, so in-memory rankings reload them
+    version = models.PositiveIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "leagues"
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.name} (from {self.start_date})"
+
+
+class LeagueMembership(models.Model):
+    """
+    A user's membership of a league, with their net asset value when the
+    league started: the base of their league return.
+    """
+
+    league = models.ForeignKey(
+        League, on_delete=models.CASCADE, related_name="memberships"
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="league_memberships",
+    )
+
+    # Set once the league has started (see leaderboards.py)
+    baseline_nav = models.DecimalField(
+        max_digits=14, decimal_places=2, null=True, blank=True
+    )
+
+    joined_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "league_memberships"
+        unique_together = ["league", "user"]
+
+    def __str__(self):
+        return f"{self.user} in {self.league}"
+
+
+class Scenario(models.Model):
+    """
+    Private paper-trading scenario that starts at a historical date and
+    runs on the user's own clock. Trades are priced from StockPriceHistory
+    as of the clock; cash and positions are separate from the live portfolio.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="scenarios"
+    )
+    name = models.CharField(max_length=100, blank=True)
+
+    start_date = models.DateField()
+    clock = models.DateTimeField()
+
+    initial_balance = models.DecimalField(max_digits=14, decimal_places=2)
+    cash_balance = models.DecimalField(max_digits=14, decimal_places=2)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "scenarios"
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.user} scenario from {self.start_date} @ {self.clock}"
+
+
+class ScenarioPosition(models.Model):
+    """
+    Shares of a stock held in a scenario.
+    """
+
+    scenario = models.ForeignKey(
+        Scenario, on_delete=models.CASCADE, related_name="positions"
+    )
+    stock = models.ForeignKey(Stock, on_delete=models.CASCADE)
+
+    shares = models.DecimalField(max_digits=12, decimal_places=4, default=0)
+    average_buy_price = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = "scenario_positions"
+        unique_together = ["scenario", "stock"]
+
+    def __str__(self):
+        return f"{self.scenario_id} - {self.stock.symbol}: {self.shares} shares"
+
+
+class ScenarioTrade(models.Model):
+    """
+    Trade executed in a scenario, at the historical price of its clock.
+    """
+
+    scenario = models.ForeignKey(
+        Scenario, on_delete=models.CASCADE, related_name="trades"
+    )
+    stock = models.ForeignKey(Stock, on_delete=models.CASCADE)
+
+    transaction_type = models.CharField(
+        max_length=4, choices=Transaction.TRANSACTION_TYPES
+    )
+    shares = models.DecimalField(max_digits=12, decimal_places=4)
+    price_per_share = models.DecimalField(max_digits=12, decimal_places=2)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2)
+
+    # Scenario clock at execution; created_at is the real time
+    executed_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "scenario_trades"
+        ordering = ["-executed_at", "-id"]
+
+    def __str__(self):
+        return (
+            f"{self.transaction_type.upper()} {self.shares} "
+            f"{self.stock.symbol} @ ${self.price_per_share} ({self.executed_at})"
+        )
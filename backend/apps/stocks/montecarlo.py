@@ -0,0 +1,96 @@
+"""
+Monte Carlo projection of a portfolio's value.
+
+Daily log returns are drawn from a multivariate normal with the mean and
+covariance of the holdings' historical daily returns, so the simulated
+stocks keep their correlations. Each path keeps its value on a grid of
+sample days only, not on every day, and days are simulated a block at a
+time, carrying each path's log growth over, so a worker's memory doesn't
+grow with the horizon. Paths are simulated in chunks with NumPy only: this
+module imports nothing from Django, so it can run in spawned worker
+processes (see projection.py).
+"""
+
+from typing import Dict, Sequence
+
+import numpy as np
+
+PROJECTION_PERCENTILES = [5, 25, 50, 75, 95]
+
+# Random draws per block of simulated days (float64: 2 MB per array)
+SIMULATION_BLOCK_VALUES = 250_000
+
+
+def factor(covariance: np.ndarray) -> np.ndarray:
+    """
+    Matrix L with L @ L.T == covariance, tolerating singular matrices
+    (e.g. perfectly correlated or constant stocks).
+    """
+    eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+    return eigenvectors * np.sqrt(np.clip(eigenvalues, 0, None))
+
+
+def sample_days(days: int, points: int) -> np.ndarray:
+    """At most points days from 1 to days, evenly spaced, ending on days."""
+    return np.unique(np.linspace(1, days, min(days, points)).round().astype(int))
+
+
+def simulate_chunk(
+    means: np.ndarray,
+    covariance: np.ndarray,
+    values: np.ndarray,
+    days: np.ndarray,
+    paths: int,
+    seed,
+) -> np.ndarray:
+    """
+    Simulate paths of buy-and-hold holdings worth values today.
+    Returns a (paths x len(days)) float32 array of portfolio values on the
+    sample days (ascending, 1 = after the first day).
+    """
+    rng = np.random.default_rng(seed)
+    # Log-return drift that keeps the expected simple return at the mean
+    drift = np.log1p(means) - np.diag(covariance) / 2
+    loadings = factor(covariance).T
+    block = max(1, SIMULATION_BLOCK_VALUES // (paths * len(means)))
+
+    result = np.empty((paths, len(days)), dtype=np.float32)
+    log_growth = np.zeros((paths, len(means)))
+    sampled = 0
+    for first in range(0, int(days[-1]), block):
+        last = min(first + block, int(days[-1]))
+        shocks = rng.standard_normal((paths, last - first, len(means))) @ loadings
+        block_growth = log_growth[:, None, :] + np.cumsum(shocks + drift, axis=1)
+        log_growth = block_growth[:, -1]
+
+        # Sample days ending in this block (day d is row d - 1 - first)
+        end = int(np.searchsorted(days, last, side="right"))
+        rows = days[sampled:end] - 1 - first
+        result[:, sampled:end] = np.exp(block_growth[:, rows]) @ values
+        sampled = end
+    return result
+
+
+def summarize(
+    values: np.ndarray,
+    days: np.ndarray,
+    start_value: float,
+    percentiles: Sequence[int] = PROJECTION_PERCENTILES,
+) -> Dict:
+    """Percentile bands per sample day and the distribution of the final value."""
+    bands = np.percentile(values, percentiles, axis=0)
+    final = values[:, -1]
+    return {
+        "paths": len(values),
+        "days": int(days[-1]),
+        "sample_days": days.tolist(),
+        "start_value": round(start_value, 2),
+        "percentiles": list(percentiles),
+        "bands": np.round(bands, 2).tolist(),
+        "final": {
+            f"p{percentile}": round(float(value), 2)
+            for percentile, value in zip(percentiles, bands[:, -1])
+        },
+        "expected_value": round(float(final.mean()), 2),
+        "probability_of_loss": round(float((final < start_value).mean()), 4),
+    }
@@ -0,0 +1,253 @@
+"""
+Mean-variance portfolio optimization and rebalance plans.
+
+Over the tracked stocks with price history, annualized mean returns and
+covariances come from the shared returns matrix (see risk.py). The
+long-only efficient frontier is traced by solving
+
+    minimize  w' S w - risk_tolerance * m' w   over weights w >= 0, sum(w) = 1
+
+for a grid of risk tolerances at once: a batch of accelerated projected
+gradient steps on a (tolerances x stocks) weight matrix, each projected
+back onto the simplex. Tolerance 0 gives the minimum-variance portfolio and
+the frontier point with the best Sharpe ratio the max-Sharpe one. The
+result depends only on the returns matrix, so it is computed once per
+matrix and shared; a request only turns the target weights into orders.
+"""
+
+import threading
+from decimal import ROUND_DOWN, Decimal
+from typing import Dict, List, Optional
+
+import numpy as np
+from django.contrib.auth import get_user_model
+
+from .backtest import TRADING_DAYS_PER_YEAR
+from .config import RISK_FREE_RATE, STOCK_SYMBOLS
+from .models import Portfolio, Stock
+from .risk import ReturnsMatrix, RiskError, get_returns_matrix
+from .trading import CENT, TradingService
+
+OBJECTIVES = ["max_sharpe", "min_variance"]
+DEFAULT_OBJECTIVE = "max_sharpe"
+
+FRONTIER_POINTS = 200
+FRONTIER_ITERATIONS = 3000
+SHARE_STEP = Decimal("0.0001")
+
+
+def project_simplex(values: np.ndarray) -> np.ndarray:
+    """Euclidean projection of each row onto {w >= 0, sum(w) = 1}."""
+    size = values.shape[1]
+    ordered = -np.sort(-values, axis=1)
+    excess = np.cumsum(ordered, axis=1) - 1
+    positive = ordered - excess / np.arange(1, size + 1) > 0
+    last = size - 1 - np.argmax(positive[:, ::-1], axis=1)
+    threshold = excess[np.arange(len(values)), last] / (last + 1)
+    return np.maximum(values - threshold[:, None], 0)
+
+
+def efficient_frontier(
+    means: np.ndarray,
+    covariance: np.ndarray,
+    tolerances: np.ndarray,
+    iterations: int = FRONTIER_ITERATIONS,
+) -> np.ndarray:
+    """
+    Long-only weights minimizing variance minus tolerance times return,
+    one row per risk tolerance (FISTA on all rows at once).
+    """
+    size = len(means)
+    step = 1 / (2 * max(np.linalg.eigvalsh(covariance).max(), 1e-12))
+    weights = np.full((len(tolerances), size), 1 / size)
+    momentum = weights.copy()
+    t = 1.0
+    for _ in range(iterations):
+        gradient = 2 * momentum @ covariance - tolerances[:, None] * means
+        updated = project_simplex(momentum - step * gradient)
+        t_next = (1 + np.sqrt(1 + 4 * t * t)) / 2
+        momentum = updated + (t - 1) / t_next * (updated - weights)
+        if np.abs(updated - weights).max() < 1e-10:
+            weights = updated
+            break
+        weights, t = updated, t_next
+    return weights
+
+
+class Optimization:
+    """
+    Frontier and optimal weights for one returns matrix.
+    """
+
+    def __init__(self, matrix: ReturnsMatrix, symbols=STOCK_SYMBOLS):
+        columns = [
+            index for index, symbol in enumerate(matrix.symbols) if symbol in symbols
+        ]
+        if len(columns) < 2:
+            raise RiskError("Need price history for at least two tracked stocks")
+        self.stock_ids = [matrix.stock_ids[index] for index in columns]
+        self.symbols = [matrix.symbols[index] for index in columns]
+
+        means = matrix.means[columns] * TRADING_DAYS_PER_YEAR
+        covariance = matrix.covariance[np.ix_(columns, columns)] * TRADING_DAYS_PER_YEAR
+
+        # Tolerances from 0 (minimum variance) up to where the frontier
+        # reaches the single best-returning stock
+        spread = max(float(np.ptp(means)), 1e-6)
+        scale = 2 * np.abs(covariance).max() / spread
+        tolerances = np.concatenate(
+            [[0.0], np.geomspace(scale * 1e-3, scale * 1e2, FRONTIER_POINTS - 1)]
+        )
+        weights = efficient_frontier(means, covariance, tolerances)
+
+        returns = weights @ means
+        volatility = np.sqrt(np.einsum("ij,jk,ik->i", weights, covariance, weights))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sharpe = np.where(
+                volatility > 0, (returns - RISK_FREE_RATE) / volatility, 0
+            )
+
+        self.weights = weights
+        self.returns = returns
+        self.volatility = volatility
+        self.sharpe = sharpe
+        self.optimal = {
+            "min_variance": 0,
+            "max_sharpe": int(np.argmax(sharpe)),
+        }
+
+    def portfolio(self, objective: str) -> dict:
+        index = self.optimal[objective]
+        return {
+            "weights": {
+                symbol: round(float(weight), 4)
+                for symbol, weight in zip(self.symbols, self.weights[index])
+            },
+            "expected_return": round(float(self.returns[index]), 4),
+            "volatility": round(float(self.volatility[index]), 4),
+            "sharpe_ratio": round(float(self.sharpe[index]), 4),
+        }
+
+    def frontier(self) -> List[dict]:
+        """Frontier points by increasing volatility, without duplicates."""
+        points = np.unique(
+            np.round(np.stack([self.volatility, self.returns, self.sharpe], 1), 4),
+            axis=0,
+        )
+        return [
+            {"volatility": vol, "expected_return": ret, "sharpe_ratio": sharpe}
+            for vol, ret, sharpe in points.tolist()
+        ]
+
+
+_optimization: Optional[Optimization] = None
+_optimization_matrix: Optional[ReturnsMatrix] = None
+_optimization_lock = threading.Lock()
+
+
+def get_optimization() -> Optimization:
+    """Get this process's optimization, recomputed with the returns matrix."""
+    global _optimization, _optimization_matrix
+
+    matrix = get_returns_matrix()
+    if _optimization_matrix is not matrix:
+        with _optimization_lock:
+            if _optimization_matrix is not matrix:
+                _optimization = Optimization(matrix)
+                _optimization_matrix = matrix
+    return _optimization
+
+
+def rebalance_orders(
+    target_weights: Dict[int, float],
+    prices: Dict[int, Decimal],
+    shares: Dict[int, Decimal],
+    cash: Decimal,
+) -> List[dict]:
+    """
+    Orders moving the positions to the target weights of the cash plus
+    their value: sells first, so buys are funded by them.
+
+    Target shares are rounded down to the smallest tradable fraction and a
+    cent per order is kept back for rounding, so the buys never cost more
+    than the cash available once the sells have executed.
+    """
+    invested = sum(shares.get(stock_id, 0) * prices[stock_id] for stock_id in prices)
+    budget = cash + invested - CENT * len(prices)
+
+    orders = []
+    for stock_id, price in prices.items():
+        if price <= 0:
+            continue
+        target = (
+            budget * Decimal(str(target_weights.get(stock_id, 0))) / price
+        ).quantize(SHARE_STEP, rounding=ROUND_DOWN)
+        change = target - shares.get(stock_id, Decimal("0"))
+        if change:
+            orders.append(
+                {
+                    "stock_id": stock_id,
+                    "transaction_type": "buy" if change > 0 else "sell",
+                    "shares": abs(change),
+                    "price": price,
+                    "amount": TradingService.trade_amount(abs(change), price),
+                }
+            )
+    orders.sort(key=lambda order: order["transaction_type"] != "sell")
+    return orders
+
+
+class OptimizerService:
+    """
+    Service class for portfolio optimization.
+    """
+
+    @staticmethod
+    def get_plan(user, objective: str) -> dict:
+        """Frontier, optimal portfolios and the user's rebalance orders."""
+        optimization = get_optimization()
+        target = optimization.weights[optimization.optimal[objective]]
+        target_weights = dict(zip(optimization.stock_ids, target.tolist()))
+
+        prices = dict(
+            Stock.objects.filter(id__in=optimization.stock_ids).values_list(
+                "id", "current_price"
+            )
+        )
+        shares = dict(
+            Portfolio.objects.filter(
+                user=user, stock_id__in=optimization.stock_ids, shares__gt=0
+            ).values_list("stock_id", "shares")
+        )
+        cash = (
+            get_user_model()
+            .objects.filter(pk=user.pk)
+            .values_list("virtual_balance", flat=True)
+            .get()
+        )
+        orders = rebalance_orders(target_weights, prices, shares, cash)
+
+        symbols = dict(zip(optimization.stock_ids, optimization.symbols))
+        proceeds = sum(o["amount"] for o in orders if o["transaction_type"] == "sell")
+        costs = sum(o["amount"] for o in orders if o["transaction_type"] == "buy")
+        return {
+            "objective": objective,
+            "universe": optimization.symbols,
+            "risk_free_rate": RISK_FREE_RATE,
+            "frontier": optimization.frontier(),
+            "portfolios": {name: optimization.portfolio(name) for name in OBJECTIVES},
+            "rebalance": {
+                "orders": [
+                    {
+                        "stock_id": order["stock_id"],
+                        "symbol": symbols[order["stock_id"]],
+                        "transaction_type": order["transaction_type"],
+                        "shares": float(order["shares"]),
+                        "price": float(order["price"]),
+                        "amount": float(order["amount"]),
+                    }
+                    for order in orders
+                ],
+                "cash_after": float(cash + proceeds - costs),
+            },
+        }
@@ -0,0 +1,224 @@
+"""
+Matching engine for resting limit and stop orders.
+
+Open orders are kept in memory in per-stock books sorted by trigger price.
+Each book has two sides: orders that trigger when the price rises to their
+trigger price (sell limits, buy stops) and orders that trigger when it
+falls to it (buy limits, sell stops). Both sides are stored so that the
+triggered orders always form the tail of a sorted list; a price tick finds
+them with one binary search and removes them as a slice, O(log n + k).
+
+The books are loaded from the database on first use and pick up orders
+placed by other processes on every tick. Triggered orders are claimed with
+a conditional UPDATE (so a cancelled order is never filled) and executed
+through the atomic trade path. An order whose execution fails with an
+unexpected (e.g. database) error is rolled back to open and reloaded into
+its book on the next tick.
+"""
+
+import logging
+import threading
+from bisect import bisect_left, insort
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.users import events
+
+from .models import Order, Stock
+from .trading import TradeError, TradingService
+
+logger = logging.getLogger(__name__)
+
+# Orders may commit out of id order; re-scan this many ids behind the
+# newest one seen so late commits are still picked up.
+SYNC_ID_OVERLAP = 1000
+
+# Below this many entries, SymbolBook.add_many inserts them one by one
+BULK_ADD_MIN = 64
+
+
+class SymbolBook:
+    """
+    Open orders for one stock, as sorted (key, order_id) lists.
+
+    Keys are chosen so triggered orders sit at the end of each list:
+    rising orders are keyed by -trigger (triggered when -trigger >= -price)
+    and falling orders by trigger (triggered when trigger >= price).
+    """
+
+    def __init__(self):
+        self.rising: List[tuple] = []
+        self.falling: List[tuple] = []
+
+    def __len__(self):
+        return len(self.rising) + len(self.falling)
+
+    def add(self, order_id: int, trigger_price: float, triggers_on_rise: bool):
+        if triggers_on_rise:
+            insort(self.rising, (-trigger_price, order_id))
+        else:
+            insort(self.falling, (trigger_price, order_id))
+
+    def add_many(self, entries: List[Tuple[int, float, bool]]) -> None:
+        """
+        Add (order_id, trigger_price, triggers_on_rise) entries. Large
+        batches are appended and sorted once instead of inserted one by one.
+        """
+        if len(entries) < BULK_ADD_MIN:
+            for entry in entries:
+                self.add(*entry)
+            return
+        for order_id, trigger_price, triggers_on_rise in entries:
+            if triggers_on_rise:
+                self.rising.append((-trigger_price, order_id))
+            else:
+                self.falling.append((trigger_price, order_id))
+        self.rising.sort()
+        self.falling.sort()
+
+    def pop_triggered(self, price: float) -> List[int]:
+        """Remove and return the ids of orders triggered at this price."""
+        triggered = []
+        for side, key in ((self.rising, -price), (self.falling, price)):
+            index = bisect_left(side, (key,))
+            if index < len(side):
+                triggered.extend(order_id for _, order_id in side[index:])
+                del side[index:]
+        return triggered
+
+
+class MatchingEngine:
+    """
+    In-memory order books for all stocks, plus the tick handler that
+    executes triggered orders.
+    """
+
+    def __init__(self):
+        self.books: Dict[int, SymbolBook] = defaultdict(SymbolBook)
+        self.known_ids: Set[int] = set()
+        self.max_order_id = 0
+        self.retry_ids: Set[int] = set()
+        self.lock = threading.Lock()
+
+    def add(self, order: Order) -> None:
+        """Add an open order to its stock's book."""
+        with self.lock:
+            self._add(
+                order.id,
+                order.stock_id,
+                order.trigger_price,
+                order.transaction_type,
+                order.order_type,
+            )
+
+    def _add(self, order_id, stock_id, trigger_price, transaction_type, order_type):
+        if order_id in self.known_ids:
+            return
+        self.known_ids.add(order_id)
+        self.max_order_id = max(self.max_order_id, order_id)
+        triggers_on_rise = (transaction_type == "buy") == (order_type == "stop")
+        self.books[stock_id].add(order_id, float(trigger_price), triggers_on_rise)
+
+    def sync(self) -> None:
+        """
+        Load open orders placed since the last sync (all of them at first),
+        and those whose execution failed, if still open.
+        """
+        with self.lock:
+            retry_ids = list(self.retry_ids)
+        new_orders = (
+            Order.objects.filter(
+                Q(id__gt=max(0, self.max_order_id - SYNC_ID_OVERLAP))
+                | Q(id__in=retry_ids),
+                status="open",
+            )
+            .order_by("id")
+            .values_list(
+                "id", "stock_id", "trigger_price", "transaction_type", "order_type"
+            )
+        )
+        with self.lock:
+            for row in new_orders.iterator(chunk_size=10000):
+                self._add(*row)
+            self.retry_ids.difference_update(retry_ids)
+
+    def on_tick(self, stocks: Iterable[Stock]) -> int:
+        """
+        Execute the orders triggered by new stock prices.
+        Returns the number of orders filled.
+        """
+        self.sync()
+
+        triggered: Dict[int, Stock] = {}
+        with self.lock:
+            for stock in stocks:
+                if stock.current_price <= 0 or stock.id not in self.books:
+                    continue
+                for order_id in self.books[stock.id].pop_triggered(
+                    float(stock.current_price)
+                ):
+                    self.known_ids.discard(order_id)
+                    triggered[order_id] = stock
+
+        if not triggered:
+            return 0
+
+        filled = 0
+        failed: Set[int] = set()
+        try:
+            for order in Order.objects.filter(id__in=list(triggered), status="open"):
+                try:
+                    if self._execute(order, triggered[order.id]):
+                        filled += 1
+                except Exception as e:
+                    logger.error(f"Error executing order {order.pk}: {e}")
+                    failed.add(order.pk)
+        except Exception:
+            # Orders not reached are still open: retry them all
+            failed.update(triggered)
+            raise
+        finally:
+            # Rolled back to open but out of the books: reload on next sync
+            with self.lock:
+                self.retry_ids.update(failed)
+        return filled
+
+    @staticmethod
+    def _execute(order: Order, stock: Stock) -> bool:
+        """Claim and execute one triggered order at the tick price."""
+        user = get_user_model()(pk=order.user_id)
+
+        with transaction.atomic():
+            claimed = Order.objects.filter(pk=order.pk, status="open").update(
+                status="filled", executed_at=timezone.now()
+            )
+            if not claimed:
+                return False  # Cancelled or filled elsewhere
+
+            try:
+                trade = TradingService.execute(
+                    user, stock, order.shares, order.transaction_type
+                )
+            except TradeError as e:
+                Order.objects.filter(pk=order.pk).update(
+                    status="rejected", rejection_reason=str(e)
+                )
+                logger.info(f"Order {order.pk} rejected: {e}")
+                return False
+
+            Order.objects.filter(pk=order.pk).update(transaction=trade.transaction)
+            events.emit(events.TRADE, order.user_id)
+        return True
+
+
+_engine = MatchingEngine()
+
+
+def get_matching_engine() -> MatchingEngine:
+    """Get this process's matching engine."""
+    return _engine
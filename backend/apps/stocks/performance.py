@@ -0,0 +1,191 @@
+"""
+Daily net asset value (NAV) snapshots and the performance time series.
+
+The nightly job loads every position, stock price and cash balance as flat
+NumPy arrays and values all portfolios in one vectorized pass (a price
+lookup by stock id, then a per-user sum with bincount), so its cost is a
+few sequential scans, read from one REPEATABLE READ snapshot, and a
+multi-row upsert rather than one query per user.
+Performance requests then read the user's snapshot rows by (user, date).
+"""
+
+from datetime import date as date_type
+from datetime import timedelta
+from itertools import repeat
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.exceptions import EmptyResultSet
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .bulk import insert_values
+from .models import Portfolio, PortfolioSnapshot, Stock
+
+CHUNK_SIZE = 20000
+
+# ?range= values of /portfolio/performance/, in days (None = all history)
+PERFORMANCE_RANGES: Dict[str, Optional[int]] = {
+    "1w": 7,
+    "1m": 30,
+    "3m": 91,
+    "6m": 182,
+    "1y": 365,
+    "all": None,
+}
+DEFAULT_PERFORMANCE_RANGE = "1m"
+
+
+def compute_nav(
+    user_ids: np.ndarray,
+    cash: np.ndarray,
+    position_user_ids: np.ndarray,
+    position_stock_ids: np.ndarray,
+    position_shares: np.ndarray,
+    stock_ids: np.ndarray,
+    stock_prices: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Value every portfolio at once.
+    Returns (holdings_value, nav) arrays aligned with user_ids, in cents.
+    """
+    prices = np.zeros(int(stock_ids.max(initial=0)) + 1)
+    prices[stock_ids] = stock_prices
+    position_values = position_shares * prices[position_stock_ids]
+
+    # Map each position's user id to its row in user_ids
+    order = np.argsort(user_ids)
+    rows = order[np.searchsorted(user_ids, position_user_ids, sorter=order)]
+    holdings_value = np.bincount(rows, weights=position_values, minlength=len(user_ids))
+
+    holdings_value = np.round(holdings_value * 100)
+    return holdings_value, np.round(cash * 100) + holdings_value
+
+
+def column_arrays(queryset, fields, dtypes) -> Tuple[np.ndarray, ...]:
+    """
+    Load a values_list query into one NumPy array per column.
+    Rows are fetched with a plain cursor, skipping per-value ORM converters.
+    """
+    rows = []
+    try:
+        sql, params = queryset.values_list(*fields).query.sql_with_params()
+    except EmptyResultSet:
+        pass  # e.g. filtered on an empty list of ids
+    else:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            while chunk := cursor.fetchmany(CHUNK_SIZE):
+                rows.extend(chunk)
+    if not rows:
+        return tuple(np.empty(0, dtype=dtype) for dtype in dtypes)
+    return tuple(
+        np.asarray(column, dtype=dtype) for column, dtype in zip(zip(*rows), dtypes)
+    )
+
+
+def _cents_to_str(cents: np.ndarray) -> list:
+    """Format whole-cent amounts as exact decimal strings."""
+    return [f"{int(c) // 100}.{int(c) % 100:02d}" for c in cents.tolist()]
+
+
+class PerformanceService:
+    """
+    Service class for portfolio NAV snapshots.
+    """
+
+    @staticmethod
+    def take_snapshots(snapshot_date: Optional[date_type] = None) -> int:
+        """
+        Record the NAV of every user's portfolio at current prices.
+        Re-running for the same date overwrites that day's rows.
+        Returns the number of snapshots written.
+        """
+        snapshot_date = snapshot_date or timezone.localdate()
+        outer_atomic = connection.in_atomic_block
+
+        with transaction.atomic():
+            if connection.vendor == "postgresql" and not outer_atomic:
+                # Read prices, balances and positions from one snapshot, so a
+                # trade committing meanwhile is seen in all of them or none.
+                with connection.cursor() as cursor:
+                    cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+            stock_ids, stock_prices = column_arrays(
+                Stock.objects.all(), ["id", "current_price"], [np.int64, np.float64]
+            )
+            user_ids, cash = column_arrays(
+                get_user_model().objects.all(),
+                ["id", "virtual_balance"],
+                [np.int64, np.float64],
+            )
+            position_user_ids, position_stock_ids, position_shares = column_arrays(
+                Portfolio.objects.filter(user__isnull=False, shares__gt=0),
+                ["user_id", "stock_id", "shares"],
+                [np.int64, np.int64, np.float64],
+            )
+        if not len(user_ids):
+            return 0
+
+        holdings_value, nav = compute_nav(
+            user_ids,
+            cash,
+            position_user_ids,
+            position_stock_ids,
+            position_shares,
+            stock_ids,
+            stock_prices,
+        )
+
+        # Multi-row upserts: under psycopg2, executemany would be one round
+        # trip per user.
+        rows = zip(
+            user_ids.tolist(),
+            repeat(snapshot_date),
+            _cents_to_str(np.round(cash * 100)),
+            _cents_to_str(holdings_value),
+            _cents_to_str(nav),
+        )
+        with transaction.atomic(), connection.cursor() as cursor:
+            insert_values(
+                cursor,
+                PortfolioSnapshot._meta.db_table,
+                ["user_id", "date", "cash", "holdings_value", "nav"],
+                rows,
+                conflict=["user_id", "date"],
+                update=["cash", "holdings_value", "nav"],
+            )
+        return len(user_ids)
+
+    @staticmethod
+    def get_performance(user, range_key: str) -> dict:
+        """Get the user's NAV series over a range from the snapshot table."""
+        days = PERFORMANCE_RANGES[range_key]
+        snapshots = PortfolioSnapshot.objects.filter(user=user)
+        if days is not None:
+            snapshots = snapshots.filter(
+                date__gte=timezone.localdate() - timedelta(days=days)
+            )
+        points = [
+            {
+                "date": snapshot_date.isoformat(),
+                "nav": float(nav),
+                "cash": float(cash),
+                "holdings_value": float(holdings_value),
+            }
+            for snapshot_date, nav, cash, holdings_value in snapshots.order_by(
+                "date"
+            ).values_list("date", "nav", "cash", "holdings_value")
+        ]
+
+        start_nav = points[0]["nav"] if points else None
+        end_nav = points[-1]["nav"] if points else None
+        return {
+            "range": range_key,
+            "points": points,
+            "start_nav": start_nav,
+            "end_nav": end_nav,
+            "return_percent": (
+                (end_nav - start_nav) / start_nav * 100 if start_nav else 0
+            ),
+        }
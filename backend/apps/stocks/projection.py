@@ -0,0 +1,137 @@
+"""
+Monte Carlo portfolio projections run in a process pool.
+
+The holdings' current values and the mean and covariance of their daily
+returns come from the shared returns matrix (see risk.py). The paths are
+then simulated in chunks of PROJECTION_CHUNK_PATHS by a pool of worker
+processes (see montecarlo.py), so the CPU-bound work runs neither on the
+ASGI event loop nor in a request thread. The caller awaits the chunks as
+they finish, which is when progress is reported, and copies them into one
+array of the paths' values on PROJECTION_POINTS sample days.
+"""
+
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Awaitable, Callable, NamedTuple, Optional
+
+import numpy as np
+
+from . import montecarlo
+from .config import PROJECTION_CHUNK_PATHS, PROJECTION_POINTS, PROJECTION_WORKERS
+from .risk import RiskError, get_returns_matrix, holding_values
+
+
+class ProjectionError(Exception):
+    """A projection that can't be run (e.g. no holdings with history)."""
+
+
+class ProjectionInputs(NamedTuple):
+    """What the simulation needs to know about a portfolio."""
+
+    symbols: list
+    values: np.ndarray
+    means: np.ndarray
+    covariance: np.ndarray
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_projection_pool() -> ProcessPoolExecutor:
+    """
+    Get this process's projection worker pool. Workers are spawned rather
+    than forked, so they don't inherit the server's threads and sockets.
+    """
+    global _pool
+
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(
+                    max_workers=PROJECTION_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _pool
+
+
+class ProjectionService:
+    """
+    Service class for Monte Carlo portfolio projections.
+    """
+
+    @staticmethod
+    def get_inputs(user) -> ProjectionInputs:
+        """Load the user's holdings and their return statistics."""
+        try:
+            matrix = get_returns_matrix()
+        except RiskError as e:
+            raise ProjectionError(str(e))
+
+        values, symbols = holding_values(user)
+        held = [stock_id for stock_id in values if stock_id in matrix.column]
+        if not held:
+            raise ProjectionError("No holdings with price history to project")
+
+        columns = [matrix.column[stock_id] for stock_id in held]
+        return ProjectionInputs(
+            symbols=[symbols[stock_id] for stock_id in held],
+            values=np.array([values[stock_id] for stock_id in held]),
+            means=matrix.means[columns],
+            covariance=matrix.covariance[np.ix_(columns, columns)],
+        )
+
+    @staticmethod
+    async def run(
+        inputs: ProjectionInputs,
+        days: int,
+        paths: int,
+        on_progress: Callable[[int, int], Awaitable[None]],
+        seed: Optional[int] = None,
+    ) -> dict:
+        """
+        Simulate paths in the worker pool, awaiting on_progress(done, total)
+        after each chunk, and return the percentile summary.
+        """
+        loop = asyncio.get_running_loop()
+        pool = get_projection_pool()
+
+        sizes = [PROJECTION_CHUNK_PATHS] * (paths // PROJECTION_CHUNK_PATHS)
+        if paths % PROJECTION_CHUNK_PATHS:
+            sizes.append(paths % PROJECTION_CHUNK_PATHS)
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+        sampled = montecarlo.sample_days(days, PROJECTION_POINTS)
+
+        futures = [
+            loop.run_in_executor(
+                pool,
+                montecarlo.simulate_chunk,
+                inputs.means,
+                inputs.covariance,
+                inputs.values,
+                sampled,
+                size,
+                chunk_seed,
+            )
+            for size, chunk_seed in zip(sizes, seeds)
+        ]
+        values = np.empty((paths, len(sampled)), dtype=np.float32)
+        try:
+            done = 0
+            for future in asyncio.as_completed(futures):
+                chunk = await future
+                values[done : done + len(chunk)] = chunk
+                done += len(chunk)
+                await on_progress(done, paths)
+        except BaseException:
+            # Drop the chunks not started yet (e.g. the client disconnected)
+            for future in futures:
+                future.cancel()
+            raise
+
+        summary = await loop.run_in_executor(
+            pool, montecarlo.summarize, values, sampled, float(inputs.values.sum())
+        )
+        return {"symbols": inputs.symbols, **summary}
@@ -0,0 +1,380 @@
+"""
+Cross-process shared-memory quote board.
+
+Every worker process (Daphne/Gunicorn) maps the same fixed-layout block of
+shared memory: one slot per tracked symbol holding the latest price,
+previous close, day high/low, volume and a sequence number. The price
+writer publishes into it and every process reads it without locking, so
+trade pricing, stock lists and WebSocket snapshots cost memory reads
+instead of database round-trips.
+
+Slots use a seqlock: the writer makes the sequence number odd while it
+updates a slot and even again when done. Readers retry if the sequence
+was odd or changed while they were copying the slot.
+
+The board is named after the symbol list and the database, and outlives
+the processes using it. Every process re-warms it from the database when
+it attaches, so prices left over from a previous run are replaced. Only
+Stock.save() publishes: writes that bypass it (QuerySet.update(),
+bulk_update(), raw SQL) must call refresh_quote_board() afterwards.
+"""
+
+import logging
+import os
+import tempfile
+import threading
+import zlib
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from decimal import Decimal
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+
+from .config import QUOTE_BOARD_NAME, TRACKED_STOCKS
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are only serialized within a process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Bump when the layout below changes so stale boards are never misread.
+BOARD_MAGIC = 0x46494E51554F5401  # "FINQUOT" + layout version 1
+
+HEADER_DTYPE = np.dtype(
+    [
+        ("magic", "<u8"),
+        ("nonce", "<u8"),  # Random per board, so versions never repeat
+        ("version", "<u8"),  # Incremented on every publish
+        ("slot_count", "<u8"),
+    ]
+)
+
+SLOT_DTYPE = np.dtype(
+    [
+        ("seq", "<u8"),
+        ("stock_id", "<i8"),
+        ("current_price", "<f8"),
+        ("previous_close", "<f8"),
+        ("day_high", "<f8"),
+        ("day_low", "<f8"),
+        ("volume", "<i8"),
+        ("updated_at", "<f8"),  # POSIX timestamp of Stock.last_updated
+    ]
+)
+
+MAX_READ_RETRIES = 100
+
+CENT = Decimal("0.01")
+
+
+@dataclass(frozen=True)
+class Quote:
+    """A consistent copy of one slot of the quote board."""
+
+    stock_id: int
+    symbol: str
+    name: str
+    sector: str
+    current_price: Decimal
+    previous_close: Decimal
+    day_high: Decimal
+    day_low: Decimal
+    volume: int
+    updated_at: datetime
+
+    def to_stock(self):
+        """
+        Build an in-memory Stock instance (not fetched from the database).
+        Useful for pricing and serialization; it is never saved.
+        """
+        from .models import Stock
+
+        stock = Stock(
+            id=self.stock_id,
+            symbol=self.symbol,
+            name=self.name,
+            sector=self.sector,
+            current_price=self.current_price,
+            previous_close=self.previous_close,
+            day_high=self.day_high,
+            day_low=self.day_low,
+            volume=self.volume,
+            last_updated=self.updated_at,
+        )
+        stock.refresh_price_change()
+        stock._state.adding = False
+        return stock
+
+
+class QuoteBoard:
+    """
+    Fixed-layout array of quote slots in named shared memory.
+    Slot positions follow TRACKED_STOCKS, so all processes agree on them.
+    """
+
+    def __init__(
+        self,
+        name: str = QUOTE_BOARD_NAME,
+        stocks=TRACKED_STOCKS,
+        database: str = "",
+    ):
+        self.stocks = list(stocks)
+        self.symbols = [symbol for symbol, _, _ in self.stocks]
+        self.slot_index = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+        # The name includes the symbol list, so editing TRACKED_STOCKS
+        # results in a fresh board instead of reusing a mismatched layout,
+        # and the database, so projects sharing a host never share prices.
+        layout_key = zlib.crc32(f"{','.join(self.symbols)}@{database}".encode())
+        self.name = f"{name}_{layout_key:08x}"
+
+        size = HEADER_DTYPE.itemsize + SLOT_DTYPE.itemsize * len(self.symbols)
+        self.shm, self.created = self._open(self.name, size)
+
+        self.header = np.ndarray((1,), dtype=HEADER_DTYPE, buffer=self.shm.buf)
+        self.slots = np.ndarray(
+            (len(self.symbols),),
+            dtype=SLOT_DTYPE,
+            buffer=self.shm.buf,
+            offset=HEADER_DTYPE.itemsize,
+        )
+
+        if self.created:
+            self.header["nonce"] = int.from_bytes(os.urandom(4), "little")
+            self.header["slot_count"] = len(self.symbols)
+            self.header["magic"] = BOARD_MAGIC
+
+        self._thread_lock = threading.Lock()
+        self._lock_path = os.path.join(tempfile.gettempdir(), f"{self.name}.lock")
+        self._id_index: Dict[int, int] = {}
+
+    @staticmethod
+    def _open(name: str, size: int) -> Tuple[shared_memory.SharedMemory, bool]:
+        """Create the shared memory block, or attach to an existing one."""
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            created = True
+        except FileExistsError:
+            shm = shared_memory.SharedMemory(name=name)
+            created = False
+
+        # The board must outlive whichever worker created it; otherwise the
+        # resource tracker unlinks it when that process exits.
+        try:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+
+        return shm, created
+
+    @property
+    def is_ready(self) -> bool:
+        """Whether the board has been fully initialized by its creator."""
+        return int(self.header["magic"][0]) == BOARD_MAGIC
+
+    @contextmanager
+    def _write_lock(self):
+        """Serialize writers across threads and (where supported) processes."""
+        with self._thread_lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self._lock_path, "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def publish(self, stock, if_newer: bool = False) -> bool:
+        """
+        Write a Stock's latest prices into its slot. With if_newer, a slot
+        already holding a later update of the same stock is left alone.
+        Returns False if the symbol is not tracked or the slot was kept.
+        """
+        index = self.slot_index.get(stock.symbol)
+        if index is None or not self.is_ready:
+            return False
+
+        updated_at = stock.last_updated or datetime.now(timezone.utc)
+
+        with self._write_lock():
+            slot = self.slots[index : index + 1]
+            if (
+                if_newer
+                and int(slot["seq"][0]) > 0
+                and int(slot["stock_id"][0]) == stock.id
+                and float(slot["updated_at"][0]) > updated_at.timestamp()
+            ):
+                self._id_index[stock.id] = index
+                return False
+            slot["seq"] += 1  # Odd: write in progress
+            slot["stock_id"] = stock.id
+            slot["current_price"] = float(stock.current_price)
+            slot["previous_close"] = float(stock.previous_close)
+            slot["day_high"] = float(stock.day_high)
+            slot["day_low"] = float(stock.day_low)
+            slot["volume"] = int(stock.volume)
+            slot["updated_at"] = updated_at.timestamp()
+            slot["seq"] += 1  # Even: slot is consistent again
+            self.header["version"] += 1
+
+        self._id_index[stock.id] = index
+        return True
+
+    def _read_slot(self, index: int) -> Optional[Quote]:
+        """Copy one slot, retrying while a write is in progress."""
+        for _ in range(MAX_READ_RETRIES):
+            seq = int(self.slots["seq"][index])
+            if seq & 1:
+                continue
+            row = self.slots[index].copy()
+            if int(self.slots["seq"][index]) != seq:
+                continue
+            if seq == 0:
+                return None  # Never published
+
+            symbol, name, sector = self.stocks[index]
+            return Quote(
+                stock_id=int(row["stock_id"]),
+                symbol=symbol,
+                name=name,
+                sector=sector,
+                current_price=Decimal(float(row["current_price"])).quantize(CENT),
+                previous_close=Decimal(float(row["previous_close"])).quantize(CENT),
+                day_high=Decimal(float(row["day_high"])).quantize(CENT),
+                day_low=Decimal(float(row["day_low"])).quantize(CENT),
+                volume=int(row["volume"]),
+                updated_at=datetime.fromtimestamp(
+                    float(row["updated_at"]), tz=timezone.utc
+                ),
+            )
+        return None
+
+    def get(self, symbol: str) -> Optional[Quote]:
+        """Get the latest quote for a symbol, or None if not on the board."""
+        index = self.slot_index.get(symbol)
+        if index is None or not self.is_ready:
+            return None
+        return self._read_slot(index)
+
+    def get_by_id(self, stock_id: int) -> Optional[Quote]:
+        """Get the latest quote for a Stock primary key."""
+        if not self.is_ready:
+            return None
+
+        index = self._id_index.get(stock_id)
+        if index is None:
+            matches = np.flatnonzero(self.slots["stock_id"] == stock_id)
+            if len(matches) == 0:
+                return None
+            index = int(matches[0])
+            self._id_index[stock_id] = index
+
+        quote = self._read_slot(index)
+        if quote is None or quote.stock_id != stock_id:
+            self._id_index.pop(stock_id, None)
+            return None
+        return quote
+
+    def snapshot(self) -> Optional[List[Quote]]:
+        """
+        Get quotes for every tracked symbol, ordered by symbol.
+        Returns None unless every slot has been published.
+        """
+        if not self.is_ready:
+            return None
+        quotes = []
+        for index in range(len(self.symbols)):
+            quote = self._read_slot(index)
+            if quote is None:
+                return None
+            quotes.append(quote)
+        return sorted(quotes, key=lambda q: q.symbol)
+
+    def version(self) -> Optional[Tuple[str, datetime]]:
+        """
+        Get a freshness token for the whole board, and its latest update.
+        Returns None unless every slot has been published.
+        """
+        if not self.is_ready or not np.all(self.slots["seq"] > 0):
+            return None
+        nonce = int(self.header["nonce"][0])
+        version = int(self.header["version"][0])
+        latest = float(self.slots["updated_at"].max())
+        return (
+            f"q{nonce:x}-{version}",
+            datetime.fromtimestamp(latest, tz=timezone.utc),
+        )
+
+
+_board: Optional[QuoteBoard] = None
+_board_lock = threading.Lock()
+_board_unavailable = False
+
+
+def get_quote_board() -> Optional[QuoteBoard]:
+    """
+    Get this process's handle on the shared quote board.
+    Returns None if shared memory is unavailable; callers then use the DB.
+    """
+    global _board, _board_unavailable
+
+    if _board is not None or _board_unavailable:
+        return _board
+
+    with _board_lock:
+        if _board is None and not _board_unavailable:
+            try:
+                _board = QuoteBoard(database=_database_key())
+            except Exception as e:
+                logger.error(f"Quote board unavailable, using database: {e}")
+                _board_unavailable = True
+                return None
+
+            # A board that already existed may hold prices from before a
+            # restart; updates published since by running workers are kept.
+            _warm_board(_board, if_newer=not _board.created)
+
+    return _board
+
+
+def _database_key() -> str:
+    database = settings.DATABASES["default"]
+    return ":".join(
+        str(database.get(key) or "") for key in ("ENGINE", "HOST", "PORT", "NAME")
+    )
+
+
+def _warm_board(board: QuoteBoard, if_newer: bool = False) -> None:
+    """Fill the board from the database."""
+    from .models import Stock
+
+    try:
+        for stock in Stock.objects.filter(symbol__in=board.symbols):
+            board.publish(stock, if_newer=if_newer)
+    except Exception as e:
+        logger.warning(f"Could not warm quote board from database: {e}")
+
+
+def refresh_quote_board() -> None:
+    """
+    Republish every tracked stock from the database. Call it after writes
+    that bypass Stock.save() (QuerySet.update(), bulk_update(), raw SQL).
+    """
+    board = get_quote_board()
+    if board is not None:
+        _warm_board(board)
+
+
+def publish_stock(stock) -> None:
+    """Publish a Stock's prices to the quote board, if available."""
+    board = get_quote_board()
+    if board is not None:
+        board.publish(stock)
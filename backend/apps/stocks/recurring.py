@@ -0,0 +1,241 @@
+"""
+Recurring buys (dollar-cost averaging) executed in bulk.
+
+A RecurringOrder buys a fixed amount of a stock every day, week, two weeks
+or month. The run_recurring_orders job executes every due order in chunks
+of RECURRING_ORDER_CHUNK_SIZE, one transaction per chunk:
+
+- all chunks are priced from one snapshot of current prices, taken when
+  the run starts;
+- the chunk's users and positions are locked and loaded with one query
+  each, and each user's orders are funded in order from that balance while
+  it covers them, instead of one conditional UPDATE per order;
+- the results are written set-wise, with multi-row statements of up to
+  BULK_BATCH_SIZE rows: the new balances and the orders' next runs as
+  UPDATEs joined to VALUES lists, the Portfolio upserts and the
+  Transaction and TaxLot inserts with bulk_create.
+"""
+
+import calendar
+from datetime import datetime, timedelta
+from decimal import ROUND_DOWN, ROUND_HALF_UP, Decimal
+from typing import Dict, List, Optional, Tuple
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .bulk import BULK_BATCH_SIZE, update_from_values
+from .config import RECURRING_ORDER_CHUNK_SIZE
+from .models import Portfolio, RecurringOrder, Stock, TaxLot, Transaction
+from .streams import notify_portfolios_changed
+from .trading import CENT, TradingService
+
+SHARE_STEP = Decimal("0.0001")
+
+FREQUENCY_DAYS = {"daily": 1, "weekly": 7, "biweekly": 14}
+
+
+def add_month(moment: datetime) -> datetime:
+    """The same day and time next month, or that month's last day."""
+    year, month = divmod(moment.month, 12)
+    year, month = moment.year + year, month + 1
+    day = min(moment.day, calendar.monthrange(year, month)[1])
+    return moment.replace(year=year, month=month, day=day)
+
+
+def next_run(run_at: datetime, frequency: str, now: datetime) -> datetime:
+    """
+    First run of the schedule after now. Runs missed while the job wasn't
+    running are skipped rather than executed all at once.
+    """
+    if frequency in FREQUENCY_DAYS:
+        step = timedelta(days=FREQUENCY_DAYS[frequency])
+        return run_at + step * ((now - run_at) // step + 1)
+    while run_at <= now:
+        run_at = add_month(run_at)
+    return run_at
+
+
+def order_shares(amount: Decimal, price: Decimal) -> Decimal:
+    """Shares an amount buys, rounded down to the smallest tradable fraction."""
+    return (amount / price).quantize(SHARE_STEP, rounding=ROUND_DOWN)
+
+
+class RecurringOrderService:
+    """
+    Service class for recurring buys.
+    """
+
+    @staticmethod
+    def run_due(
+        now: Optional[datetime] = None,
+        chunk_size: int = RECURRING_ORDER_CHUNK_SIZE,
+    ) -> Dict[str, int]:
+        """
+        Execute every active order due at now. Returns the number of
+        orders by outcome (filled, insufficient_balance, no_price).
+        """
+        now = now or timezone.now()
+        prices = dict(Stock.objects.values_list("id", "current_price"))
+
+        outcomes = {status: 0 for status, _ in RecurringOrder.STATUS_CHOICES}
+        last_id = 0
+        while True:
+            with transaction.atomic():
+                # Orders locked by another run are skipped; it moves them on.
+                orders = list(
+                    RecurringOrder.objects.select_for_update(skip_locked=True)
+                    .filter(is_active=True, next_run_at__lte=now, id__gt=last_id)
+                    .order_by("id")
+                    .values_list(
+                        "id",
+                        "user_id",
+                        "stock_id",
+                        "amount",
+                        "frequency",
+                        "next_run_at",
+                    )[:chunk_size]
+                )
+                if not orders:
+                    break
+                for status in RecurringOrderService._execute_chunk(orders, prices, now):
+                    outcomes[status] += 1
+            last_id = orders[-1][0]
+        return outcomes
+
+    @staticmethod
+    def _execute_chunk(
+        orders: List[Tuple], prices: Dict[int, Decimal], now: datetime
+    ) -> List[str]:
+        """Execute a chunk of due orders. Returns each order's outcome."""
+        User = get_user_model()
+        user_ids = sorted({user_id for _, user_id, *_ in orders})
+        stock_ids = {stock_id for _, _, stock_id, *_ in orders}
+
+        balances: Dict[int, Decimal] = dict(
+            User.objects.select_for_update()
+            .filter(id__in=user_ids)
+            .order_by("id")
+            .values_list("id", "virtual_balance")
+        )
+        held = (
+            Portfolio.objects.select_for_update()
+            .filter(user_id__in=user_ids, stock_id__in=stock_ids)
+            .values_list("user_id", "stock_id", "shares", "average_buy_price")
+        )
+        positions: Dict[Tuple[int, int], Tuple[Decimal, Decimal]] = {
+            (user_id, stock_id): (shares, average_buy_price)
+            for user_id, stock_id, shares, average_buy_price in held
+        }
+
+        statuses = []
+        trades = []
+        changed = set()
+        for _, user_id, stock_id, amount, _, _ in orders:
+            price = prices.get(stock_id) or Decimal("0")
+            shares = order_shares(amount, price) if price > 0 else Decimal("0")
+            if shares <= 0:
+                statuses.append("no_price")
+                continue
+            total_amount = TradingService.trade_amount(shares, price)
+            if balances[user_id] < total_amount:
+                statuses.append("insufficient_balance")
+                continue
+
+            balances[user_id] -= total_amount
+            held, average_buy_price = positions.get(
+                (user_id, stock_id), (Decimal("0"), Decimal("0"))
+            )
+            total_shares = held + shares
+            positions[(user_id, stock_id)] = (
+                total_shares,
+                ((held * average_buy_price + total_amount) / total_shares).quantize(
+                    CENT, rounding=ROUND_HALF_UP
+                ),
+            )
+            changed.add((user_id, stock_id))
+            trades.append(
+                Transaction(
+                    user_id=user_id,
+                    stock_id=stock_id,
+                    transaction_type="buy",
+                    shares=shares,
+                    price_per_share=price,
+                    total_amount=total_amount,
+                )
+            )
+            statuses.append("filled")
+
+        # Multi-row statements only: under psycopg2, executemany would be
+        # one round trip per row.
+        adapt = connection.ops.adapt_datetimefield_value
+        run_time = adapt(now)
+        with connection.cursor() as cursor:
+            if trades:
+                funded = sorted({trade.user_id for trade in trades})
+                update_from_values(
+                    cursor,
+                    User._meta.db_table,
+                    "id",
+                    ["virtual_balance"],
+                    [(user_id, balances[user_id]) for user_id in funded],
+                )
+                Portfolio.objects.bulk_create(
+                    [
+                        Portfolio(
+                            user_id=user_id,
+                            stock_id=stock_id,
+                            shares=positions[(user_id, stock_id)][0],
+                            average_buy_price=positions[(user_id, stock_id)][1],
+                        )
+                        for user_id, stock_id in sorted(changed)
+                    ],
+                    batch_size=BULK_BATCH_SIZE,
+                    update_conflicts=True,
+                    unique_fields=["user", "stock"],
+                    update_fields=["shares", "average_buy_price", "updated_at"],
+                )
+                trades = Transaction.objects.bulk_create(
+                    trades, batch_size=BULK_BATCH_SIZE
+                )
+                TaxLot.objects.bulk_create(
+                    [
+                        TaxLot(
+                            user_id=trade.user_id,
+                            stock_id=trade.stock_id,
+                            transaction=trade,
+                            shares=trade.shares,
+                            remaining_shares=trade.shares,
+                            cost_per_share=trade.price_per_share,
+                            acquired_at=trade.executed_at,
+                        )
+                        for trade in trades
+                    ],
+                    batch_size=BULK_BATCH_SIZE,
+                )
+                transaction.on_commit(lambda: RecurringOrderService._committed(funded))
+
+            update_from_values(
+                cursor,
+                RecurringOrder._meta.db_table,
+                "id",
+                ["next_run_at", "last_run_at", "last_status"],
+                [
+                    (
+                        order_id,
+                        adapt(next_run(run_at, frequency, now)),
+                        run_time,
+                        status,
+                    )
+                    for (order_id, _, _, _, frequency, run_at), status in zip(
+                        orders, statuses
+                    )
+                ],
+            )
+        return statuses
+
+    @staticmethod
+    def _committed(user_ids: List[int]) -> None:
+        """Refresh what depends on the users' trades, as for live trades."""
+        notify_portfolios_changed(user_ids)
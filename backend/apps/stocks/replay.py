@@ -0,0 +1,201 @@
+"""
+Accelerated replay of stored price history through the live price path.
+
+For classroom sessions outside market hours, the daily bars in
+StockPriceHistory are played back as if they were live: each replayed
+trading day is split into ticks that walk from the open through the day's
+low and high (in the order the close suggests) to the close. Each tick is
+saved on the Stock rows like a live update, so the quote board, holders'
+portfolio streams and the order matching engine all see it. The snapshot
+is also pushed to the ws/stocks/ connections.
+
+All bars are loaded once into per-symbol arrays with a cursor on the next
+bar, and the Stock rows are kept in memory, so playing a tick only writes.
+"""
+
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from django.db import transaction
+from django.db.models.functions import TruncDate
+
+from .config import REPLAY_TICKS_PER_DAY, STOCK_SYMBOLS
+from .models import Stock, StockPriceHistory
+from .performance import column_arrays
+from .services import StockService
+from .streams import broadcast_prices
+
+# Length of a real trading session (9:30-16:00), which speeds are relative to
+TRADING_DAY_SECONDS = 6.5 * 60 * 60
+
+REPLAY_FIELDS = [
+    "current_price",
+    "previous_close",
+    "day_high",
+    "day_low",
+    "volume",
+    "last_updated",
+]
+
+# Bar columns
+OPEN, HIGH, LOW, CLOSE, VOLUME = range(5)
+
+
+def tick_seconds(speed: float, ticks_per_day: int) -> float:
+    """Wall-clock seconds between ticks at a speed multiplier."""
+    return TRADING_DAY_SECONDS / speed / ticks_per_day
+
+
+def intraday_path(bars: np.ndarray, ticks: int) -> np.ndarray:
+    """
+    Prices at each tick of the day for a (symbols x 5) array of bars.
+
+    Up days go open -> low -> high -> close and down days open -> high ->
+    low -> close, in straight lines over equal thirds of the day. Returns a
+    (ticks x symbols) array whose last row is the close.
+    """
+    up = bars[:, CLOSE] >= bars[:, OPEN]
+    first = np.where(up, bars[:, LOW], bars[:, HIGH])
+    second = np.where(up, bars[:, HIGH], bars[:, LOW])
+    waypoints = np.stack([bars[:, OPEN], first, second, bars[:, CLOSE]], axis=1)
+
+    position = np.arange(1, ticks + 1) / ticks * 3
+    segment = np.minimum(position.astype(int), 2)
+    fraction = (position - segment)[:, None]
+    start = waypoints[:, segment].T
+    end = waypoints[:, segment + 1].T
+    return start + (end - start) * fraction
+
+
+@dataclass
+class SymbolCursor:
+    """A symbol's bars in date order and the index of the next bar to play."""
+
+    stock: Stock
+    dates: np.ndarray
+    bars: np.ndarray
+    position: int = 0
+    last_close: Optional[float] = None
+
+    def take(self, day: np.datetime64) -> Optional[np.ndarray]:
+        """Return the bar for day and move past it (None if it has none)."""
+        if self.position < len(self.dates) and self.dates[self.position] == day:
+            bar = self.bars[self.position]
+            self.position += 1
+            return bar
+        return None
+
+
+def _to_price(value: float) -> Decimal:
+    return Decimal(f"{value:.2f}")
+
+
+class MarketReplay:
+    """
+    Plays stored daily bars back as live price ticks.
+    """
+
+    def __init__(
+        self,
+        stocks: List[Stock],
+        cursors: List[SymbolCursor],
+        ticks_per_day: int = REPLAY_TICKS_PER_DAY,
+    ):
+        self.stocks = stocks
+        self.cursors = cursors
+        self.ticks_per_day = ticks_per_day
+        days = [cursor.dates for cursor in cursors]
+        self.days = np.unique(np.concatenate(days)) if days else np.empty(0, "M8[D]")
+
+    @classmethod
+    def load(
+        cls,
+        symbols: Sequence[str] = STOCK_SYMBOLS,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        ticks_per_day: int = REPLAY_TICKS_PER_DAY,
+    ) -> "MarketReplay":
+        """Load the stocks and all their bars in the range, in one query each."""
+        stocks = list(Stock.objects.filter(symbol__in=symbols))
+        history = StockPriceHistory.objects.filter(
+            stock_id__in=[stock.id for stock in stocks]
+        )
+        if start:
+            history = history.filter(timestamp__date__gte=start)
+        if end:
+            history = history.filter(timestamp__date__lte=end)
+        stock_ids, days, *columns = column_arrays(
+            history.order_by().annotate(day=TruncDate("timestamp")),
+            [
+                "stock_id",
+                "day",
+                "open_price",
+                "high_price",
+                "low_price",
+                "close_price",
+                "volume",
+            ],
+            [np.int64, "datetime64[D]"] + [np.float64] * 5,
+        )
+        bars = np.stack(columns, axis=1)
+        order = np.lexsort((days, stock_ids))
+        stock_ids, days, bars = stock_ids[order], days[order], bars[order]
+
+        by_id: Dict[int, Stock] = {stock.id: stock for stock in stocks}
+        found, starts = np.unique(stock_ids, return_index=True)
+        cursors = [
+            SymbolCursor(by_id[stock_id], days[begin:stop], bars[begin:stop])
+            for stock_id, begin, stop in zip(
+                found.tolist(), starts.tolist(), [*starts[1:].tolist(), len(days)]
+            )
+        ]
+        return cls(stocks, cursors, ticks_per_day)
+
+    def ticks(self) -> Iterator[Tuple[np.datetime64, int, List[Stock]]]:
+        """
+        Advance the in-memory stocks tick by tick.
+        Yields (day, tick number, stocks changed by the tick).
+        """
+        for day in self.days:
+            playing = [
+                (cursor, bar)
+                for cursor in self.cursors
+                if (bar := cursor.take(day)) is not None
+            ]
+            if not playing:
+                continue
+            bars = np.stack([bar for _, bar in playing])
+            path = intraday_path(bars, self.ticks_per_day)
+            highs = np.maximum.accumulate(np.maximum(path, bars[:, OPEN]), axis=0)
+            lows = np.minimum.accumulate(np.minimum(path, bars[:, OPEN]), axis=0)
+            volume = np.arange(1, self.ticks_per_day + 1) / self.ticks_per_day
+
+            for cursor, bar in playing:
+                previous = cursor.last_close
+                cursor.stock.previous_close = _to_price(
+                    bar[OPEN] if previous is None else previous
+                )
+                cursor.last_close = float(bar[CLOSE])
+
+            changed = [cursor.stock for cursor, _ in playing]
+            for tick in range(self.ticks_per_day):
+                for column, stock in enumerate(changed):
+                    stock.current_price = _to_price(path[tick, column])
+                    stock.day_high = _to_price(highs[tick, column])
+                    stock.day_low = _to_price(lows[tick, column])
+                    stock.volume = int(bars[column, VOLUME] * volume[tick])
+                yield day, tick, changed
+
+    def publish(self, changed: List[Stock]) -> None:
+        """Send one tick through the live update path."""
+        with transaction.atomic():
+            for stock in changed:
+                stock.save(update_fields=REPLAY_FIELDS)
+        StockService.publish_price_updates(changed)
+
+        # Built from the saved in-memory rows: no per-tick read
+        price_version = StockService.get_price_version(self.stocks)
+        broadcast_prices(self.stocks, price_version[0] if price_version else None)
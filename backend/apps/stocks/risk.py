@@ -0,0 +1,232 @@
+"""
+Portfolio risk analytics from daily returns.
+
+The daily returns of every stock with stored history are arranged once in
+a (days x stocks) ReturnsMatrix, built from the process's in-memory price
+timeline (see timeline.py) and rebuilt when that is reloaded. Everything
+that doesn't depend on the portfolio is computed with it: mean returns,
+the covariance and correlation matrices, and each stock's covariance with
+the benchmark. A request then only takes the rows and columns of the
+stocks held and combines them with the weight vector: one matrix-vector
+product for the portfolio's return series (historical VaR) and small dot
+products for volatility, beta and parametric VaR.
+"""
+
+import threading
+from statistics import NormalDist
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .backtest import TRADING_DAYS_PER_YEAR, forward_fill
+from .config import RISK_BENCHMARK, RISK_LOOKBACK_DAYS
+from .models import Portfolio
+from .timeline import DAY_SECONDS, PriceTimeline, get_price_timeline
+
+VAR_CONFIDENCE_LEVELS = [0.95, 0.99]
+
+
+class RiskError(Exception):
+    """Risk figures that can't be computed (e.g. no price history)."""
+
+
+class ReturnsMatrix:
+    """
+    Daily returns of the whole universe over the lookback window, with the
+    statistics shared by every portfolio.
+    """
+
+    def __init__(
+        self,
+        stock_ids: List[int],
+        symbols: List[str],
+        returns: np.ndarray,
+        benchmark: Optional[str] = None,
+    ):
+        self.stock_ids = stock_ids
+        self.symbols = symbols
+        self.column = {stock_id: index for index, stock_id in enumerate(stock_ids)}
+        self.returns = returns
+
+        # Benchmark: a tracked symbol, or the equal-weighted universe
+        if benchmark in symbols:
+            self.benchmark = benchmark
+            self.benchmark_returns = returns[:, symbols.index(benchmark)]
+        else:
+            self.benchmark = "equal_weighted"
+            self.benchmark_returns = returns.mean(axis=1)
+
+        self.means = returns.mean(axis=0)
+        self.covariance = np.atleast_2d(np.cov(returns, rowvar=False))
+        deviations = np.sqrt(np.diag(self.covariance))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.correlation = np.nan_to_num(
+                self.covariance / np.outer(deviations, deviations)
+            )
+        centered = self.benchmark_returns - self.benchmark_returns.mean()
+        self.benchmark_covariance = (
+            (returns - self.means).T @ centered / (len(returns) - 1)
+        )
+        self.benchmark_variance = centered @ centered / (len(returns) - 1)
+
+    @classmethod
+    def from_timeline(
+        cls,
+        timeline: PriceTimeline,
+        lookback: int = RISK_LOOKBACK_DAYS,
+        benchmark: Optional[str] = RISK_BENCHMARK,
+    ) -> "ReturnsMatrix":
+        """
+        Align the timeline's closes on the days any stock traded, carry
+        gaps forward and take the last lookback daily returns. Days before
+        a stock's first bar count as zero returns.
+        """
+        stock_ids = sorted(timeline.series)
+        days = [times // DAY_SECONDS for times, _ in timeline.series.values()]
+        if not days:
+            raise RiskError("No price history available")
+        all_days = np.unique(np.concatenate(days))[-(lookback + 1) :]
+        if len(all_days) < 3:
+            raise RiskError("Not enough price history")
+
+        prices = np.full((len(all_days), len(stock_ids)), np.nan)
+        for column, stock_id in enumerate(stock_ids):
+            times, closes = timeline.series[stock_id]
+            stock_days = times // DAY_SECONDS
+            inside = np.isin(stock_days, all_days)
+            rows = np.searchsorted(all_days, stock_days[inside])
+            prices[rows, column] = closes[inside]
+
+        prices = forward_fill(prices)
+        returns = np.nan_to_num(prices[1:] / prices[:-1] - 1)
+        symbols = [timeline.symbols.get(stock_id, "") for stock_id in stock_ids]
+        return cls(stock_ids, symbols, returns, benchmark)
+
+
+_matrix: Optional[ReturnsMatrix] = None
+_matrix_timeline: Optional[PriceTimeline] = None
+_matrix_lock = threading.Lock()
+
+
+def get_returns_matrix() -> ReturnsMatrix:
+    """Get this process's returns matrix, rebuilt with the price timeline."""
+    global _matrix, _matrix_timeline
+
+    timeline = get_price_timeline()
+    if _matrix_timeline is not timeline:
+        with _matrix_lock:
+            if _matrix_timeline is not timeline:
+                _matrix = ReturnsMatrix.from_timeline(timeline)
+                _matrix_timeline = timeline
+    return _matrix
+
+
+def portfolio_risk(
+    matrix: ReturnsMatrix, columns: List[int], weights: np.ndarray
+) -> Tuple[np.ndarray, float, float, float]:
+    """
+    Risk of a portfolio with the given weights on some matrix columns.
+    Returns (daily returns series, daily volatility, beta, daily mean).
+    """
+    daily_returns = matrix.returns[:, columns] @ weights
+    covariance = matrix.covariance[np.ix_(columns, columns)]
+    volatility = float(np.sqrt(weights @ covariance @ weights))
+    beta = (
+        float(weights @ matrix.benchmark_covariance[columns])
+        / matrix.benchmark_variance
+        if matrix.benchmark_variance
+        else 0.0
+    )
+    return daily_returns, volatility, beta, float(weights @ matrix.means[columns])
+
+
+def holding_values(user) -> Tuple[Dict[int, float], Dict[int, str]]:
+    """Current value and symbol of each stock the user holds, by stock id."""
+    values: Dict[int, float] = {}
+    symbols: Dict[int, str] = {}
+    for stock_id, symbol, shares, price in Portfolio.objects.filter(
+        user=user, shares__gt=0
+    ).values_list("stock_id", "stock__symbol", "shares", "stock__current_price"):
+        values[stock_id] = float(shares * price)
+        symbols[stock_id] = symbol
+    return values, symbols
+
+
+class RiskService:
+    """
+    Service class for portfolio risk analytics.
+    """
+
+    @staticmethod
+    def get_risk(user) -> dict:
+        """Volatility, beta, one-day VaR and correlations of the user's holdings."""
+        matrix = get_returns_matrix()
+        values, symbols = holding_values(user)
+
+        held = [stock_id for stock_id in values if stock_id in matrix.column]
+        missing = sorted(
+            symbols[stock_id] for stock_id in values if stock_id not in matrix.column
+        )
+        total_value = sum(values[stock_id] for stock_id in held)
+
+        result = {
+            "benchmark": matrix.benchmark,
+            "observations": len(matrix.returns),
+            "value": round(total_value, 2),
+            "missing_history": missing,
+        }
+        if not held or total_value <= 0:
+            return {
+                **result,
+                "annualized_volatility": 0.0,
+                "beta": 0.0,
+                "var": {},
+                "holdings": [],
+                "correlation": {"symbols": [], "matrix": []},
+            }
+
+        columns = [matrix.column[stock_id] for stock_id in held]
+        weights = np.array([values[stock_id] for stock_id in held]) / total_value
+        daily_returns, volatility, beta, mean = portfolio_risk(matrix, columns, weights)
+
+        # One-day value at risk, as a positive amount lost
+        var = {}
+        for level in VAR_CONFIDENCE_LEVELS:
+            historical = -np.percentile(daily_returns, (1 - level) * 100)
+            parametric = -(mean + NormalDist().inv_cdf(1 - level) * volatility)
+            var[f"{level:.0%}"] = {
+                "historical": round(max(float(historical), 0.0) * total_value, 2),
+                "parametric": round(max(parametric, 0.0) * total_value, 2),
+            }
+
+        annualize = np.sqrt(TRADING_DAYS_PER_YEAR)
+        stock_volatility = np.sqrt(np.diag(matrix.covariance)[columns]) * annualize
+        stock_beta = (
+            matrix.benchmark_covariance[columns] / matrix.benchmark_variance
+            if matrix.benchmark_variance
+            else np.zeros(len(columns))
+        )
+        held_symbols = [symbols[stock_id] for stock_id in held]
+        return {
+            **result,
+            "annualized_volatility": round(volatility * annualize, 4),
+            "beta": round(beta, 4),
+            "var": var,
+            "holdings": [
+                {
+                    "symbol": symbol,
+                    "weight": round(float(weight), 4),
+                    "annualized_volatility": round(float(stock_vol), 4),
+                    "beta": round(float(stock_b), 4),
+                }
+                for symbol, weight, stock_vol, stock_b in zip(
+                    held_symbols, weights, stock_volatility, stock_beta
+                )
+            ],
+            "correlation": {
+                "symbols": held_symbols,
+                "matrix": np.round(
+                    matrix.correlation[np.ix_(columns, columns)], 4
+                ).tolist(),
+            },
+        }
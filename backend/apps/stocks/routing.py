@@ -8,4 +8,6 @@ from . import consumers
 
 websocket_urlpatterns = [
     re_path(r"ws/stocks/$", consumers.StockPriceConsumer.as_asgi()),
+    re_path(r"ws/portfolio/$", consumers.PortfolioConsumer.as_asgi()),
+    re_path(r"ws/projection/$", consumers.ProjectionConsumer.as_asgi()),
 ]
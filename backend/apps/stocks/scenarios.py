@@ -0,0 +1,185 @@
+"""
+Time-travel scenarios: paper trading on a private historical clock.
+
+Prices as of a scenario's clock come from the in-memory PriceTimeline
+(see timeline.py): a binary search per lookup, so users at any number of
+different clocks are served without each request scanning a range of
+history.
+
+Scenario trades change cash and positions with conditional F() updates in
+one transaction, like live trades (see trading.py).
+"""
+
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+from typing import List, Optional
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Scenario, ScenarioPosition, ScenarioTrade, Stock
+from .timeline import get_price_timeline
+from .trading import TradeError, TradingService
+
+
+class ScenarioError(Exception):
+    """A scenario that can't be started or advanced as requested."""
+
+
+class ScenarioService:
+    """
+    Service class for time-travel scenarios.
+    """
+
+    @staticmethod
+    def start(user, start_date, initial_balance: Decimal, name: str = "") -> Scenario:
+        """Start a scenario with its clock at the beginning of start_date."""
+        timeline = get_price_timeline()
+        if timeline.first is None:
+            raise ScenarioError("No price history available")
+
+        clock = datetime.combine(start_date, datetime.min.time(), dt_timezone.utc)
+        if not timeline.first.date() <= start_date <= timeline.last.date():
+            raise ScenarioError(
+                f"Start date must be between {timeline.first.date()} "
+                f"and {timeline.last.date()}"
+            )
+
+        return Scenario.objects.create(
+            user=user,
+            name=name,
+            start_date=start_date,
+            clock=clock,
+            initial_balance=initial_balance,
+            cash_balance=initial_balance,
+        )
+
+    @staticmethod
+    def advance(
+        scenario: Scenario, days: Optional[int] = None, to: Optional[datetime] = None
+    ) -> Scenario:
+        """Move the scenario's clock forward by some days or to a time."""
+        target = to if to is not None else scenario.clock + timedelta(days=days)
+        if target <= scenario.clock:
+            raise ScenarioError("The clock can only move forward")
+        if target > timezone.now():
+            raise ScenarioError("The clock can't move past the present")
+
+        moved = Scenario.objects.filter(pk=scenario.pk, clock__lt=target).update(
+            clock=target
+        )
+        if not moved:
+            raise ScenarioError("The clock has already moved past that time")
+        scenario.clock = target
+        return scenario
+
+    @staticmethod
+    @transaction.atomic
+    def trade(
+        scenario: Scenario, stock: Stock, shares: Decimal, transaction_type: str
+    ) -> ScenarioTrade:
+        """Buy or sell at the stock's price as of the scenario's clock."""
+        price = get_price_timeline().price_at(stock.id, scenario.clock)
+        if price is None:
+            raise TradeError(f"No price for {stock.symbol} on {scenario.clock.date()}")
+        total_amount = TradingService.trade_amount(shares, price)
+        scenarios = Scenario.objects.filter(pk=scenario.pk)
+        holding = ScenarioPosition.objects.filter(scenario=scenario, stock=stock)
+
+        if transaction_type == "buy":
+            debited = scenarios.filter(cash_balance__gte=total_amount).update(
+                cash_balance=F("cash_balance") - total_amount
+            )
+            if not debited:
+                raise TradeError("Insufficient balance")
+            _, created = ScenarioPosition.objects.get_or_create(
+                scenario=scenario,
+                stock=stock,
+                defaults={"shares": shares, "average_buy_price": price},
+            )
+            if not created:
+                # Both assignments see the pre-update row values.
+                holding.update(
+                    average_buy_price=(
+                        (F("shares") * F("average_buy_price") + total_amount)
+                        / (F("shares") + shares)
+                    ),
+                    shares=F("shares") + shares,
+                )
+        else:
+            removed = holding.filter(shares__gte=shares).update(
+                shares=F("shares") - shares
+            )
+            if not removed:
+                current = holding.values_list("shares", flat=True).first()
+                if current is None:
+                    raise TradeError("No shares to sell")
+                raise TradeError(f"Insufficient shares. You have {current}")
+            scenarios.update(cash_balance=F("cash_balance") + total_amount)
+            holding.filter(shares=0).delete()
+
+        scenario.refresh_from_db(fields=["cash_balance"])
+        return ScenarioTrade.objects.create(
+            scenario=scenario,
+            stock=stock,
+            transaction_type=transaction_type,
+            shares=shares,
+            price_per_share=price,
+            total_amount=total_amount,
+            executed_at=scenario.clock,
+        )
+
+    @staticmethod
+    def get_prices(scenario: Scenario) -> List[dict]:
+        """Prices of all stocks as of the scenario's clock, from memory."""
+        timeline = get_price_timeline()
+        return sorted(
+            (
+                {
+                    "stock_id": stock_id,
+                    "symbol": timeline.symbols.get(stock_id),
+                    "price": float(price),
+                }
+                for stock_id, price in timeline.prices_at(scenario.clock).items()
+            ),
+            key=lambda row: row["symbol"] or "",
+        )
+
+    @staticmethod
+    def get_summary(scenario: Scenario) -> dict:
+        """Cash, positions and total value as of the scenario's clock."""
+        timeline = get_price_timeline()
+        holdings = []
+        holdings_value = Decimal("0")
+        for position in scenario.positions.select_related("stock"):
+            price = timeline.price_at(position.stock_id, scenario.clock)
+            cost = position.shares * position.average_buy_price
+            value = position.shares * price if price is not None else cost
+            holdings_value += value
+            holdings.append(
+                {
+                    "stock_id": position.stock_id,
+                    "symbol": position.stock.symbol,
+                    "shares": float(position.shares),
+                    "average_buy_price": float(position.average_buy_price),
+                    "price": float(price) if price is not None else None,
+                    "value": float(value),
+                    "profit_loss": float(value - cost),
+                }
+            )
+
+        total_value = scenario.cash_balance + holdings_value
+        return {
+            "clock": scenario.clock.isoformat(),
+            "cash_balance": float(scenario.cash_balance),
+            "holdings_value": float(holdings_value),
+            "total_value": float(total_value),
+            "return_percent": float(
+                (total_value - scenario.initial_balance)
+                / scenario.initial_balance
+                * 100
+            ),
+            "holdings": holdings,
+        }
@@ -2,9 +2,28 @@
 Serializers for Stocks app.
 """
 
+from decimal import Decimal
+
+from django.utils import timezone
 from rest_framework import serializers
 
-from .models import Portfolio, Stock, StockPriceHistory, Transaction, Watchlist
+from .backtest import BacktestError, parse_rule
+from .config import INITIAL_VIRTUAL_BALANCE
+from .models import (
+    CorporateAction,
+    League,
+    Order,
+    Portfolio,
+    PriceAlert,
+    RecurringOrder,
+    Scenario,
+    ScenarioTrade,
+    Stock,
+    StockPriceHistory,
+    TaxLot,
+    Transaction,
+    Watchlist,
+)
 
 
 class StockSerializer(serializers.ModelSerializer):
@@ -66,6 +85,21 @@ class StockPriceHistorySerializer(serializers.ModelSerializer):
         ]
 
 
+class CorporateActionSerializer(serializers.ModelSerializer):
+    """Serializer for stock splits and dividends."""
+
+    class Meta:
+        model = CorporateAction
+        fields = [
+            "id",
+            "action_type",
+            "ex_date",
+            "ratio",
+            "amount",
+            "applied_at",
+        ]
+
+
 class PortfolioSerializer(serializers.ModelSerializer):
     """Serializer for Portfolio model."""
 
@@ -118,9 +152,98 @@ class TransactionSerializer(serializers.ModelSerializer):
             "shares",
             "price_per_share",
             "total_amount",
+            "cost_basis",
+            "realized_profit_loss",
             "executed_at",
         ]
-        read_only_fields = ["user", "price_per_share", "total_amount", "executed_at"]
+        read_only_fields = [
+            "user",
+            "price_per_share",
+            "total_amount",
+            "cost_basis",
+            "realized_profit_loss",
+            "executed_at",
+        ]
+
+
+class TaxLotSerializer(serializers.ModelSerializer):
+    """Serializer for TaxLot model, valued at the stock's current price."""
+
+    cost_basis = serializers.ReadOnlyField()
+    unrealized_profit_loss = serializers.SerializerMethodField()
+
+    class Meta:
+        model = TaxLot
+        fields = [
+            "id",
+            "transaction",
+            "shares",
+            "remaining_shares",
+            "cost_per_share",
+            "cost_basis",
+            "unrealized_profit_loss",
+            "acquired_at",
+        ]
+
+    def get_unrealized_profit_loss(self, obj):
+        return obj.remaining_shares * (obj.stock.current_price - obj.cost_per_share)
+
+
+class PriceAlertSerializer(serializers.ModelSerializer):
+    """Serializer for price alerts on watchlist entries."""
+
+    watchlist_id = serializers.PrimaryKeyRelatedField(
+        queryset=Watchlist.objects.select_related("stock"),
+        source="watchlist",
+        write_only=True,
+    )
+    stock_symbol = serializers.CharField(
+        source="watchlist.stock.symbol", read_only=True
+    )
+    target_price = serializers.DecimalField(
+        max_digits=12, decimal_places=2, min_value=Decimal("0.01"), required=False
+    )
+    percent = serializers.DecimalField(
+        max_digits=6,
+        decimal_places=2,
+        min_value=Decimal("0.01"),
+        max_value=Decimal("100"),
+        required=False,
+    )
+
+    class Meta:
+        model = PriceAlert
+        fields = [
+            "id",
+            "watchlist_id",
+            "stock_symbol",
+            "condition",
+            "target_price",
+            "percent",
+            "reference_price",
+            "is_active",
+            "triggered_at",
+            "triggered_price",
+            "created_at",
+        ]
+        read_only_fields = [
+            "reference_price",
+            "is_active",
+            "triggered_at",
+            "triggered_price",
+            "created_at",
+        ]
+
+    def validate(self, attrs):
+        if attrs["condition"] == "move":
+            if attrs.get("percent") is None:
+                raise serializers.ValidationError("Move alerts need a percent")
+            attrs["target_price"] = None
+        else:
+            if attrs.get("target_price") is None:
+                raise serializers.ValidationError("Price alerts need a target_price")
+            attrs["percent"] = None
+        return attrs
 
 
 class WatchlistSerializer(serializers.ModelSerializer):
@@ -130,10 +253,11 @@ class WatchlistSerializer(serializers.ModelSerializer):
     stock_id = serializers.PrimaryKeyRelatedField(
         queryset=Stock.objects.all(), source="stock", write_only=True
     )
+    alerts = PriceAlertSerializer(many=True, read_only=True)
 
     class Meta:
         model = Watchlist
-        fields = ["id", "user", "stock", "stock_id", "added_at"]
+        fields = ["id", "user", "stock", "stock_id", "alerts", "added_at"]
         read_only_fields = ["user"]
 
 
@@ -141,5 +265,225 @@ class TradeSerializer(serializers.Serializer):
     """Serializer for executing trades."""
 
     stock_id = serializers.IntegerField()
-    shares = serializers.DecimalField(max_digits=12, decimal_places=4)
+    shares = serializers.DecimalField(
+        max_digits=12, decimal_places=4, min_value=Decimal("0.0001")
+    )
     transaction_type = serializers.ChoiceField(choices=["buy", "sell"])
+
+
+class TradeBatchSerializer(serializers.Serializer):
+    """Serializer for executing a batch of trades in one transaction."""
+
+    MAX_ORDERS = 100
+
+    orders = TradeSerializer(many=True, allow_empty=False, max_length=MAX_ORDERS)
+
+
+class OrderSerializer(serializers.ModelSerializer):
+    """Serializer for resting limit/stop orders."""
+
+    stock = StockListSerializer(read_only=True)
+    stock_id = serializers.PrimaryKeyRelatedField(
+        queryset=Stock.objects.all(), source="stock", write_only=True
+    )
+    stock_symbol = serializers.CharField(source="stock.symbol", read_only=True)
+    shares = serializers.DecimalField(
+        max_digits=12, decimal_places=4, min_value=Decimal("0.0001")
+    )
+    trigger_price = serializers.DecimalField(
+        max_digits=12, decimal_places=2, min_value=Decimal("0.01")
+    )
+
+    class Meta:
+        model = Order
+        fields = [
+            "id",
+            "stock",
+            "stock_id",
+            "stock_symbol",
+            "transaction_type",
+            "order_type",
+            "shares",
+            "trigger_price",
+            "status",
+            "rejection_reason",
+            "transaction",
+            "created_at",
+            "executed_at",
+        ]
+        read_only_fields = [
+            "status",
+            "rejection_reason",
+            "transaction",
+            "created_at",
+            "executed_at",
+        ]
+
+
+class RecurringOrderSerializer(serializers.ModelSerializer):
+    """Serializer for recurring buys (dollar-cost averaging)."""
+
+    stock = StockListSerializer(read_only=True)
+    stock_id = serializers.PrimaryKeyRelatedField(
+        queryset=Stock.objects.all(), source="stock", write_only=True
+    )
+    stock_symbol = serializers.CharField(source="stock.symbol", read_only=True)
+    amount = serializers.DecimalField(
+        max_digits=12, decimal_places=2, min_value=Decimal("1.00")
+    )
+
+    class Meta:
+        model = RecurringOrder
+        fields = [
+            "id",
+            "stock",
+            "stock_id",
+            "stock_symbol",
+            "amount",
+            "frequency",
+            "next_run_at",
+            "is_active",
+            "last_run_at",
+            "last_status",
+            "created_at",
+        ]
+        read_only_fields = ["last_run_at", "last_status", "created_at"]
+
+
+class LeagueSerializer(serializers.ModelSerializer):
+    """Serializer for private trading leagues."""
+
+    owner = serializers.CharField(source="owner.username", read_only=True)
+    member_count = serializers.IntegerField(read_only=True)
+    starting_balance = serializers.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        min_value=Decimal("1"),
+        default=Decimal(str(INITIAL_VIRTUAL_BALANCE)),
+    )
+
+    class Meta:
+        model = League
+        fields = [
+            "id",
+            "name",
+            "owner",
+            "start_date",
+            "starting_balance",
+            "invite_code",
+            "member_count",
+            "created_at",
+        ]
+        read_only_fields = ["id", "invite_code", "created_at"]
+
+    def validate_start_date(self, value):
+        if value < timezone.localdate():
+            raise serializers.ValidationError("Start date can't be in the past")
+        return value
+
+
+class LeagueJoinSerializer(serializers.Serializer):
+    """Serializer for joining a league by its invite code."""
+
+    invite_code = serializers.CharField(max_length=12)
+
+
+class BacktestSerializer(serializers.Serializer):
+    """Serializer for a declarative backtest strategy."""
+
+    MAX_RULES = 10
+
+    symbols = serializers.ListField(
+        child=serializers.CharField(max_length=10), required=False, allow_empty=False
+    )
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    initial_capital = serializers.FloatField(default=10000, min_value=1)
+    position_size = serializers.FloatField(default=1, min_value=0.01, max_value=1)
+    entry = serializers.ListField(
+        child=serializers.DictField(), allow_empty=False, max_length=MAX_RULES
+    )
+    exit = serializers.ListField(
+        child=serializers.DictField(), default=list, max_length=MAX_RULES
+    )
+
+    def _validate_rules(self, rules):
+        try:
+            for rule in rules:
+                parse_rule(rule)
+        except BacktestError as e:
+            raise serializers.ValidationError(str(e))
+        return rules
+
+    def validate_entry(self, value):
+        return self._validate_rules(value)
+
+    def validate_exit(self, value):
+        return self._validate_rules(value)
+
+    def validate_symbols(self, value):
+        return [symbol.upper() for symbol in value]
+
+
+class ScenarioSerializer(serializers.ModelSerializer):
+    """Serializer for time-travel scenarios."""
+
+    initial_balance = serializers.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        min_value=Decimal("1"),
+        default=Decimal(str(INITIAL_VIRTUAL_BALANCE)),
+    )
+
+    class Meta:
+        model = Scenario
+        fields = [
+            "id",
+            "name",
+            "start_date",
+            "clock",
+            "initial_balance",
+            "cash_balance",
+            "created_at",
+        ]
+        read_only_fields = ["id", "clock", "cash_balance", "created_at"]
+
+
+class ScenarioAdvanceSerializer(serializers.Serializer):
+    """Serializer for moving a scenario's clock: by days or to a time."""
+
+    days = serializers.IntegerField(min_value=1, max_value=3650, required=False)
+    to = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        if ("days" in attrs) == ("to" in attrs):
+            raise serializers.ValidationError("Provide either days or to")
+        return attrs
+
+
+class ScenarioOrderSerializer(TradeSerializer):
+    """Serializer for a trade inside a scenario."""
+
+    shares = serializers.DecimalField(
+        max_digits=12, decimal_places=4, min_value=Decimal("0.0001")
+    )
+
+
+class ScenarioTradeSerializer(serializers.ModelSerializer):
+    """Serializer for trades executed in a scenario."""
+
+    stock_symbol = serializers.CharField(source="stock.symbol", read_only=True)
+
+    class Meta:
+        model = ScenarioTrade
+        fields = [
+            "id",
+            "stock_id",
+            "stock_symbol",
+            "transaction_type",
+            "shares",
+            "price_per_share",
+            "total_amount",
+            "executed_at",
+            "created_at",
+        ]
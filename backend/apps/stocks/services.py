@@ -3,13 +3,21 @@ Stock data services using yfinance.
 """
 
 import logging
+from datetime import datetime
 from decimal import Decimal
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import yfinance as yf
+from django.db.models import Count, Max
 
+from .alerts import get_alert_monitor
 from .config import STOCK_SYMBOLS, TRACKED_STOCKS
-from .models import Stock
+from .leaderboards import get_leaderboards
+from .models import Stock, StockPriceHistory
+from .orders import get_matching_engine
+from .quotes import get_quote_board
+from .streams import broadcast_holder_ticks
+from .timeline import invalidate_price_timeline
 
 logger = logging.getLogger(__name__)
 
@@ -84,7 +92,7 @@ class StockService:
         Returns count of successfully updated stocks.
         """
         prices = StockService.fetch_current_prices()
-        updated = 0
+        updated_stocks = []
 
         for symbol, data in prices.items():
             if data is None:
@@ -99,13 +107,113 @@ class StockService:
                 stock.volume = data["volume"]
                 stock.market_cap = data["market_cap"]
                 stock.save()
-                updated += 1
+                updated_stocks.append(stock)
             except Stock.DoesNotExist:
                 logger.warning(f"Stock {symbol} not found in database")
             except Exception as e:
                 logger.error(f"Error updating {symbol}: {e}")
 
-        return updated
+        StockService.publish_price_updates(updated_stocks)
+        return len(updated_stocks)
+
+    @staticmethod
+    def publish_price_updates(stocks: List[Stock]) -> None:
+        """
+        Propagate saved price updates: holders' live valuations, resting
+        orders, price alerts and leaderboards. Shared by the live feed and
+        market replays.
+        """
+        # Push the new prices to the live valuations of their holders
+        broadcast_holder_ticks(stocks)
+
+        # Execute resting limit/stop orders triggered by the new prices
+        try:
+            get_matching_engine().on_tick(stocks)
+        except Exception as e:
+            logger.error(f"Error matching orders: {e}")
+
+        # Fire the watchlist price alerts the new prices crossed
+        try:
+            get_alert_monitor().on_tick(stocks)
+        except Exception as e:
+            logger.error(f"Error firing price alerts: {e}")
+
+        # Re-rank the holders of the stocks that ticked
+        try:
+            get_leaderboards().on_tick(stocks)
+        except Exception as e:
+            logger.error(f"Error updating leaderboards: {e}")
+
+    @staticmethod
+    def get_price_version(
+        stocks: Optional[List[Stock]] = None,
+    ) -> Optional[Tuple[str, datetime]]:
+        """
+        Get a freshness token for the stored stock prices.
+
+        The token changes whenever a stock is saved or the set of stocks
+        changes, so REST (ETag) and WebSocket snapshots can share it.
+        Returns (version, last_updated), or None if there are no stocks.
+        Uses the shared quote board when it holds every tracked stock,
+        else the given just-saved stocks, else the database.
+        """
+        board = get_quote_board()
+        board_version = board.version() if board else None
+        if board_version is not None:
+            return board_version
+
+        if stocks is not None:
+            count = len(stocks)
+            latest = max((stock.last_updated for stock in stocks), default=None)
+        else:
+            stats = Stock.objects.aggregate(
+                latest=Max("last_updated"), count=Count("id")
+            )
+            count, latest = stats["count"], stats["latest"]
+        if latest is None:
+            return None
+        return f"{count}-{int(latest.timestamp() * 1_000_000)}", latest
+
+    @staticmethod
+    def get_stock_snapshot() -> Optional[List[Stock]]:
+        """
+        Get all tracked stocks from the shared quote board, without the DB.
+        Returns None if the board does not hold every tracked stock yet.
+        """
+        board = get_quote_board()
+        quotes = board.snapshot() if board else None
+        if quotes is None:
+            return None
+        return [quote.to_stock() for quote in quotes]
+
+    @staticmethod
+    def get_stock(stock_id: int) -> Optional[Stock]:
+        """
+        Get a stock for pricing, from the quote board when possible.
+        Falls back to the database; returns None if the stock doesn't exist.
+        """
+        board = get_quote_board()
+        quote = board.get_by_id(stock_id) if board else None
+        if quote is not None:
+            return quote.to_stock()
+        return Stock.objects.filter(id=stock_id).first()
+
+    @staticmethod
+    def get_stocks(stock_ids) -> Dict[int, Stock]:
+        """
+        Get several stocks for pricing as one snapshot, keyed by id.
+        Reads the quote board once, falling back to a single DB query.
+        Missing ids are left out of the result.
+        """
+        board = get_quote_board()
+        quotes = board.snapshot() if board else None
+        if quotes is not None:
+            stocks = {
+                q.stock_id: q.to_stock() for q in quotes if q.stock_id in stock_ids
+            }
+            if len(stocks) == len(stock_ids):
+                return stocks
+        return Stock.objects.in_bulk(list(stock_ids))
 
     @staticmethod
     def fetch_price_history(symbol: str, period: str = "1mo") -> List[dict]:
@@ -141,6 +249,46 @@ class StockService:
             logger.error(f"Error fetching history for {symbol}: {e}")
             return []
 
+    @staticmethod
+    def store_price_history(symbol: str, period: str = "10y") -> int:
+        """
+        Download daily price history for a tracked stock into
+        StockPriceHistory (used by backtests). Existing days are updated.
+        Returns the number of days stored.
+        """
+        stock = Stock.objects.filter(symbol=symbol).first()
+        if stock is None:
+            return 0
+
+        cent = Decimal("0.01")
+        rows = [
+            StockPriceHistory(
+                stock=stock,
+                timestamp=datetime.fromisoformat(point["timestamp"]),
+                open_price=Decimal(str(point["open"])).quantize(cent),
+                high_price=Decimal(str(point["high"])).quantize(cent),
+                low_price=Decimal(str(point["low"])).quantize(cent),
+                close_price=Decimal(str(point["close"])).quantize(cent),
+                volume=point["volume"],
+            )
+            for point in StockService.fetch_price_history(symbol, period)
+        ]
+        StockPriceHistory.objects.bulk_create(
+            rows,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=["stock", "timestamp"],
+            update_fields=[
+                "open_price",
+                "high_price",
+                "low_price",
+                "close_price",
+                "volume",
+            ],
+        )
+        invalidate_price_timeline()
+        return len(rows)
+
     @staticmethod
     def get_stock_quote(symbol: str) -> Optional[dict]:
         """
@@ -0,0 +1,137 @@
+"""
+Trading statistics computed with SQL aggregates.
+
+Counts, volumes, average entry prices and turnover are grouped by stock and
+by truncated date in the database, so only the grouped rows leave it. The
+result is cached per user and period under a key that includes the id of
+the user's latest transaction, so a trade committed by any process (a
+request, the recurring-buy job, a market replay) makes the next read
+recompute it. Entries also expire after STATS_CACHE_TTL seconds, which
+bounds staleness from a trade committing out of id order and lets
+superseded entries go.
+"""
+
+from decimal import Decimal
+from typing import List
+
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+
+from .config import STATS_CACHE_TTL
+from .models import Transaction
+
+STATS_PERIODS = {
+    "day": TruncDay,
+    "week": TruncWeek,
+    "month": TruncMonth,
+}
+DEFAULT_STATS_PERIOD = "month"
+
+BUY = Q(transaction_type="buy")
+SELL = Q(transaction_type="sell")
+
+
+def stats_cache_key(user_id: int, period: str, version: int) -> str:
+    return f"transaction_stats:{user_id}:{period}:{version}"
+
+
+def stats_version(user_id: int) -> int:
+    """
+    Id of the user's latest transaction (0 without any), read from the
+    (user, executed_at, id) index. A trade from any process changes it.
+    """
+    return (
+        Transaction.objects.filter(user_id=user_id)
+        .order_by("-executed_at", "-id")
+        .values_list("id", flat=True)
+        .first()
+        or 0
+    )
+
+
+def _aggregates() -> dict:
+    return {
+        "trades_count": Count("id"),
+        "buy_count": Count("id", filter=BUY),
+        "sell_count": Count("id", filter=SELL),
+        "shares_bought": Sum("shares", filter=BUY),
+        "shares_sold": Sum("shares", filter=SELL),
+        "bought_amount": Sum("total_amount", filter=BUY),
+        "sold_amount": Sum("total_amount", filter=SELL),
+        "realized_profit_loss": Sum("realized_profit_loss"),
+    }
+
+
+def _format(row: dict) -> dict:
+    """Fill empty sums and add turnover and average entry/exit prices."""
+    zero = Decimal("0")
+    shares_bought = row["shares_bought"] or zero
+    shares_sold = row["shares_sold"] or zero
+    bought_amount = row["bought_amount"] or zero
+    sold_amount = row["sold_amount"] or zero
+    return {
+        "trades_count": row["trades_count"],
+        "buy_count": row["buy_count"],
+        "sell_count": row["sell_count"],
+        "shares_bought": float(shares_bought),
+        "shares_sold": float(shares_sold),
+        "bought_amount": float(bought_amount),
+        "sold_amount": float(sold_amount),
+        "turnover": float(bought_amount + sold_amount),
+        "average_entry_price": (
+            float(bought_amount / shares_bought) if shares_bought else None
+        ),
+        "average_exit_price": (
+            float(sold_amount / shares_sold) if shares_sold else None
+        ),
+        "realized_profit_loss": float(row["realized_profit_loss"] or zero),
+    }
+
+
+class TransactionStatsService:
+    """
+    Service class for per-user trading statistics.
+    """
+
+    @staticmethod
+    def get_stats(user, period: str) -> dict:
+        """Get the user's statistics in total, per stock and per period."""
+        key = stats_cache_key(user.pk, period, stats_version(user.pk))
+        stats = cache.get(key)
+        if stats is None:
+            stats = TransactionStatsService.compute(user, period)
+            cache.set(key, stats, timeout=STATS_CACHE_TTL)
+        return stats
+
+    @staticmethod
+    def compute(user, period: str) -> dict:
+        """Run the aggregate queries: one total, one per stock, one per period."""
+        transactions = Transaction.objects.filter(user=user).order_by()
+
+        by_stock: List[dict] = [
+            {
+                "stock_id": row["stock_id"],
+                "symbol": row["stock__symbol"],
+                **_format(row),
+            }
+            for row in transactions.values("stock_id", "stock__symbol")
+            .annotate(**_aggregates())
+            .order_by("stock__symbol")
+        ]
+        by_period: List[dict] = [
+            {"period_start": row["period_start"].date().isoformat(), **_format(row)}
+            for row in transactions.annotate(
+                period_start=STATS_PERIODS[period]("executed_at")
+            )
+            .values("period_start")
+            .annotate(**_aggregates())
+            .order_by("period_start")
+        ]
+
+        return {
+            "period": period,
+            "totals": _format(transactions.aggregate(**_aggregates())),
+            "by_stock": by_stock,
+            "by_period": by_period,
+        }
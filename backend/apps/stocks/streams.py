@@ -0,0 +1,124 @@
+"""
+Channel layer fan-out for live portfolio valuations.
+
+Each authenticated ws/portfolio/ connection joins one group per stock its
+user holds, so channel layer group membership is an inverted index from
+symbol to holder channels. A price tick is sent once to each changed
+stock's group and only reaches users holding it; each connection then
+revalues its user's portfolio from holdings cached in memory. After a
+trade the user's connections are told to reload holdings and update
+their group membership.
+
+The stock price board (ws/stocks/) polls the price version, but a market
+replay pushes each new snapshot to its "stock_prices" group directly.
+"""
+
+import asyncio
+import logging
+from typing import Iterable, List, Optional, Tuple
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+logger = logging.getLogger(__name__)
+
+STOCK_PRICES_GROUP = "stock_prices"
+
+
+def holder_group_name(stock_id: int) -> str:
+    """Channel layer group of connections whose user holds this stock."""
+    return f"stock_holders_{stock_id}"
+
+
+def portfolio_group_name(user_id: int) -> str:
+    """Channel layer group of a user's portfolio connections."""
+    return f"portfolio_{user_id}"
+
+
+def stock_payload(stock) -> dict:
+    """A stock as sent in ws/stocks/ price snapshots."""
+    return {
+        "id": stock.id,
+        "symbol": stock.symbol,
+        "name": stock.name,
+        "sector": stock.sector,
+        "current_price": float(stock.current_price),
+        "previous_close": float(stock.previous_close),
+        "day_high": float(stock.day_high),
+        "day_low": float(stock.day_low),
+        "volume": stock.volume,
+        "price_change": float(stock.price_change),
+        "price_change_percent": float(stock.price_change_percent),
+        "last_updated": (
+            stock.last_updated.isoformat() if stock.last_updated else None
+        ),
+    }
+
+
+def _group_send(group: str, message: dict) -> None:
+    _group_send_many([(group, message)])
+
+
+def _group_send_many(messages: List[Tuple[str, dict]]) -> None:
+    """Send several group messages from sync code in one event loop hop."""
+    channel_layer = get_channel_layer()
+    if channel_layer is None or not messages:
+        return
+
+    async def send_all():
+        results = await asyncio.gather(
+            *(channel_layer.group_send(group, message) for group, message in messages),
+            return_exceptions=True,
+        )
+        for (group, _), result in zip(messages, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error sending to {group}: {result}")
+
+    try:
+        async_to_sync(send_all)()
+    except Exception as e:
+        logger.error(f"Error sending group messages: {e}")
+
+
+def broadcast_holder_ticks(stocks) -> None:
+    """Send new prices to the holders of each updated stock."""
+    _group_send_many(
+        [
+            (
+                holder_group_name(stock.id),
+                {
+                    "type": "portfolio.tick",
+                    "stock_id": stock.id,
+                    "price": float(stock.current_price),
+                },
+            )
+            for stock in stocks
+        ]
+    )
+
+
+def broadcast_prices(stocks, version: Optional[str]) -> None:
+    """Push a full price snapshot to every ws/stocks/ connection."""
+    _group_send(
+        STOCK_PRICES_GROUP,
+        {
+            "type": "stock.price.update",
+            "version": version,
+            "data": [stock_payload(stock) for stock in stocks],
+        },
+    )
+
+
+def notify_portfolio_changed(user_id: int) -> None:
+    """Tell a user's portfolio connections that their holdings changed."""
+    notify_portfolios_changed([user_id])
+
+
+def notify_portfolios_changed(user_ids: Iterable[int]) -> None:
+    """Tell several users' portfolio connections that their holdings changed."""
+    _group_send_many(
+        [
+            (portfolio_group_name(user_id), {"type": "portfolio.changed"})
+            for user_id in user_ids
+        ]
+    )
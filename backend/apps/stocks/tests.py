@@ -0,0 +1,111 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from .models import Portfolio, Stock, Transaction
+
+
+class PortfolioSummaryTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="investor", password="secret", virtual_balance=Decimal("5000")
+        )
+        self.client.force_authenticate(self.user)
+        self.url = reverse("portfolio-summary")
+
+    def hold(self, count):
+        for index in range(count):
+            stock = Stock.objects.create(
+                symbol=f"S{index}",
+                name=f"Stock {index}",
+                current_price=Decimal("12.50"),
+            )
+            Portfolio.objects.create(
+                user=self.user,
+                stock=stock,
+                shares=Decimal("4"),
+                average_buy_price=Decimal("10.00"),
+            )
+
+    def test_summary_uses_one_query_whatever_the_holdings(self):
+        for count in (1, 20):
+            Portfolio.objects.all().delete()
+            Stock.objects.all().delete()
+            self.hold(count)
+
+            with self.assertNumQueries(1):
+                response = self.client.get(self.url)
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data["holdings_count"], count)
+            self.assertEqual(response.data["total_value"], 50.0 * count)
+            self.assertEqual(response.data["total_cost"], 40.0 * count)
+            self.assertEqual(response.data["total_profit_loss"], 10.0 * count)
+            self.assertEqual(response.data["profit_loss_percent"], 25.0)
+            self.assertEqual(response.data["virtual_balance"], 5000.0)
+
+    def test_summary_without_holdings(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["holdings_count"], 0)
+        self.assertEqual(response.data["total_value"], 0.0)
+        self.assertEqual(response.data["profit_loss_percent"], 0)
+
+
+class TransactionPaginationTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="trader", password="secret"
+        )
+        self.client.force_authenticate(self.user)
+        stock = Stock.objects.create(symbol="PAGE", name="Page Stock")
+        Transaction.objects.bulk_create(
+            Transaction(
+                user=self.user,
+                stock=stock,
+                transaction_type="buy",
+                shares=Decimal("1"),
+                price_per_share=Decimal("10.00"),
+                total_amount=Decimal("10.00"),
+            )
+            for _ in range(7)
+        )
+        # Most rows share a timestamp, so pages must break ties by id
+        now = timezone.now()
+        ids = list(Transaction.objects.order_by("id").values_list("id", flat=True))
+        Transaction.objects.filter(id__in=ids[:5]).update(executed_at=now)
+        Transaction.objects.filter(id__in=ids[5:]).update(
+            executed_at=now + timedelta(seconds=1)
+        )
+        self.expected = [*ids[5:][::-1], *ids[:5][::-1]]
+
+    def test_pages_follow_executed_at_then_id(self):
+        url = reverse("transaction-list") + "?page_size=3"
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append([row["id"] for row in response.data["results"]])
+            url = response.data["next"]
+
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual(sum(pages, []), self.expected)
+
+        # And back again
+        url = response.data["previous"]
+        back = []
+        while url:
+            response = self.client.get(url)
+            back.insert(0, [row["id"] for row in response.data["results"]])
+            url = response.data["previous"]
+        self.assertEqual(back, pages[:-1])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse("transaction-list") + "?cursor=cD1ub3Bl")
+        self.assertEqual(response.status_code, 404)
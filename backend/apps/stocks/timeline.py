@@ -0,0 +1,152 @@
+"""
+In-memory price history shared by time-travel scenarios and risk analytics.
+
+A PriceTimeline holds one array of times (epoch seconds, ascending) and
+one of closes per stock, loaded from StockPriceHistory once per process.
+Daily bars are stamped at the start of their session, but their close is
+only known once the session ends, so each is keyed by its session close
+(MARKET_CLOSE on the bar's date, in MARKET_TIMEZONE). "Price of S at T" is
+a binary search for the last close known at T. The timeline is reloaded
+after PRICE_TIMELINE_TTL seconds, and at once in a process that stores new
+history.
+"""
+
+import calendar
+import threading
+import time
+from datetime import date, datetime, timedelta
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+from typing import Dict, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from .config import MARKET_CLOSE, MARKET_TIMEZONE, PRICE_TIMELINE_TTL
+from .models import Stock, StockPriceHistory
+from .performance import column_arrays
+
+
+def _epoch(when: datetime) -> int:
+    """Seconds since the epoch of a datetime (naive values are UTC)."""
+    return calendar.timegm(when.utctimetuple())
+
+
+def _from_epoch(seconds: int) -> datetime:
+    return datetime.fromtimestamp(seconds, tz=dt_timezone.utc)
+
+
+DAY_SECONDS = 24 * 60 * 60
+EPOCH_DATE = date(1970, 1, 1)
+
+
+def session_closes(seconds: np.ndarray) -> np.ndarray:
+    """
+    When the closes of daily bars stamped at seconds became known: the
+    session close on each bar's (UTC) date, or the bar's own time if later.
+    """
+    days, inverse = np.unique(seconds // DAY_SECONDS, return_inverse=True)
+    market = ZoneInfo(MARKET_TIMEZONE)
+    closes = np.array(
+        [
+            _epoch(
+                datetime.combine(
+                    EPOCH_DATE + timedelta(days=day), MARKET_CLOSE, tzinfo=market
+                )
+            )
+            for day in days.tolist()
+        ],
+        dtype=np.int64,
+    )
+    return np.maximum(seconds, closes[inverse.reshape(-1)])
+
+
+class PriceTimeline:
+    """
+    Closing prices of every stock over time, for "price as of T" lookups.
+    series maps stock ids to (times the closes became known, closes).
+    """
+
+    def __init__(
+        self,
+        series: Dict[int, Tuple[np.ndarray, np.ndarray]],
+        symbols: Dict[int, str],
+    ):
+        self.series = series
+        self.symbols = symbols
+        self.loaded_at = time.monotonic()
+        starts = [times[0] for times, _ in series.values()]
+        ends = [times[-1] for times, _ in series.values()]
+        self.first = _from_epoch(int(min(starts))) if starts else None
+        self.last = _from_epoch(int(max(ends))) if ends else None
+
+    @classmethod
+    def load(cls) -> "PriceTimeline":
+        """
+        Load all stored history, keyed by session close and split into
+        per-stock sorted arrays.
+        """
+        stock_ids, timestamps, closes = column_arrays(
+            StockPriceHistory.objects.order_by(),
+            ["stock_id", "timestamp", "close_price"],
+            [np.int64, object, np.float64],
+        )
+        seconds = np.fromiter(
+            (_epoch(timestamp) for timestamp in timestamps),
+            dtype=np.int64,
+            count=len(timestamps),
+        )
+        seconds = session_closes(seconds)
+        order = np.lexsort((seconds, stock_ids))
+        stock_ids, seconds, closes = stock_ids[order], seconds[order], closes[order]
+
+        found, starts = np.unique(stock_ids, return_index=True)
+        ends = [*starts[1:].tolist(), len(stock_ids)]
+        series = {
+            stock_id: (seconds[begin:end], closes[begin:end])
+            for stock_id, begin, end in zip(found.tolist(), starts.tolist(), ends)
+        }
+        return cls(series, dict(Stock.objects.values_list("id", "symbol")))
+
+    def price_at(self, stock_id: int, when: datetime) -> Optional[Decimal]:
+        """Close of the stock's last bar closed by when (None if none)."""
+        series = self.series.get(stock_id)
+        if series is None:
+            return None
+        times, closes = series
+        index = int(np.searchsorted(times, _epoch(when), side="right")) - 1
+        if index < 0:
+            return None
+        return Decimal(f"{closes[index]:.2f}")
+
+    def prices_at(self, when: datetime) -> Dict[int, Decimal]:
+        """Prices of every stock with a bar closed by when."""
+        prices = {}
+        for stock_id in self.series:
+            price = self.price_at(stock_id, when)
+            if price is not None:
+                prices[stock_id] = price
+        return prices
+
+
+_timeline: Optional[PriceTimeline] = None
+_timeline_lock = threading.Lock()
+
+
+def get_price_timeline() -> PriceTimeline:
+    """Get this process's price timeline, loading it if missing or stale."""
+    global _timeline
+
+    timeline = _timeline
+    if timeline is None or time.monotonic() - timeline.loaded_at > PRICE_TIMELINE_TTL:
+        with _timeline_lock:
+            if _timeline is timeline:
+                _timeline = PriceTimeline.load()
+            timeline = _timeline
+    return timeline
+
+
+def invalidate_price_timeline() -> None:
+    """Drop this process's timeline so the next lookup reloads it."""
+    global _timeline
+    _timeline = None
@@ -0,0 +1,319 @@
+"""
+Trade execution for the paper trading simulator.
+
+Balances and positions are changed with conditional UPDATE statements
+built from F() expressions (e.g. "subtract the cost only if the balance
+covers it"), inside one transaction per trade. The database applies each
+change atomically, so concurrent trades from the same user can't lose
+updates and no explicit row locking is needed. Every trade path updates
+(or locks) the user row before the position rows, so trades running
+concurrently always wait on each other in the same order and can't
+deadlock.
+"""
+
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+
+from .lots import LotLedger
+from .models import Portfolio, Stock, TaxLot, Transaction
+from .streams import notify_portfolio_changed
+
+CENT = Decimal("0.01")
+
+
+class TradeError(Exception):
+    """A trade that can't be executed (insufficient balance or shares)."""
+
+    def __init__(self, message: str, order_index: Optional[int] = None):
+        super().__init__(message)
+        self.order_index = order_index
+
+
+class TradeResult(NamedTuple):
+    """Outcome of an executed trade."""
+
+    transaction: Transaction
+    portfolio: Optional[Portfolio]  # None once a position is fully sold
+    virtual_balance: Decimal
+
+
+class BatchResult(NamedTuple):
+    """Outcome of an executed batch of orders."""
+
+    transactions: List[Transaction]
+    portfolios: List[Portfolio]  # Positions touched by the batch, still open
+    virtual_balance: Decimal
+
+
+class TradingService:
+    """
+    Service for executing buy and sell orders atomically.
+    """
+
+    @staticmethod
+    def trade_amount(shares: Decimal, price: Decimal) -> Decimal:
+        """Total amount of a trade, rounded to cents as stored in the ledger."""
+        return (shares * price).quantize(CENT, rounding=ROUND_HALF_UP)
+
+    @staticmethod
+    def execute(
+        user, stock: Stock, shares: Decimal, transaction_type: str
+    ) -> TradeResult:
+        """Execute a buy or sell order at the stock's current price."""
+        if transaction_type == "buy":
+            return TradingService.buy(user, stock, shares)
+        return TradingService.sell(user, stock, shares)
+
+    @staticmethod
+    @transaction.atomic
+    def buy(user, stock: Stock, shares: Decimal) -> TradeResult:
+        """
+        Buy shares: debit the balance if it is large enough, then add the
+        shares to the position, recalculating the average buy price, and open a tax lot.
+        """
+        User = get_user_model()
+        price = stock.current_price
+        total_amount = TradingService.trade_amount(shares, price)
+
+        debited = User.objects.filter(
+            pk=user.pk, virtual_balance__gte=total_amount
+        ).update(virtual_balance=F("virtual_balance") - total_amount)
+        if not debited:
+            raise TradeError("Insufficient balance")
+
+        portfolio, created = Portfolio.objects.get_or_create(
+            user=user,
+            stock=stock,
+            defaults={"shares": shares, "average_buy_price": price},
+        )
+        if not created:
+            # Both assignments see the pre-update row values.
+            Portfolio.objects.filter(pk=portfolio.pk).update(
+                average_buy_price=(
+                    (F("shares") * F("average_buy_price") + total_amount)
+                    / (F("shares") + shares)
+                ),
+                shares=F("shares") + shares,
+            )
+            portfolio.refresh_from_db(fields=["shares", "average_buy_price"])
+
+        result = TradingService._record(
+            user, stock, "buy", shares, price, total_amount, portfolio
+        )
+        LotLedger.new_lot(result.transaction).save()
+        return result
+
+    @staticmethod
+    @transaction.atomic
+    def sell(user, stock: Stock, shares: Decimal) -> TradeResult:
+        """
+        Sell shares: credit the balance, then remove them from the position
+        if it holds enough (rolling the credit back otherwise) and consume
+        tax lots to record the realized P&L. Empty positions are deleted.
+        """
+        User = get_user_model()
+        price = stock.current_price
+        total_amount = TradingService.trade_amount(shares, price)
+
+        # The user row is locked before the position, like every other
+        # trade path, so concurrent trades can't deadlock.
+        User.objects.filter(pk=user.pk).update(
+            virtual_balance=F("virtual_balance") + total_amount
+        )
+
+        holding = Portfolio.objects.filter(user=user, stock=stock)
+        removed = holding.filter(shares__gte=shares).update(shares=F("shares") - shares)
+        if not removed:
+            current = holding.values_list("shares", flat=True).first()
+            if current is None:
+                raise TradeError("No shares to sell")
+            raise TradeError(f"Insufficient shares. You have {current}")
+
+        average_buy_price = holding.values_list("average_buy_price", flat=True).get()
+        cost_basis = LotLedger.close(user, stock, shares, average_buy_price)
+
+        holding.filter(shares=0).delete()
+        portfolio = holding.first()
+
+        return TradingService._record(
+            user, stock, "sell", shares, price, total_amount, portfolio, cost_basis
+        )
+
+    @staticmethod
+    def _record(
+        user,
+        stock,
+        transaction_type,
+        shares,
+        price,
+        total_amount,
+        portfolio,
+        cost_basis=None,
+    ) -> TradeResult:
+        """Write the ledger entry and read back the resulting balance."""
+        trade = Transaction.objects.create(
+            user=user,
+            stock=stock,
+            transaction_type=transaction_type,
+            shares=shares,
+            price_per_share=price,
+            total_amount=total_amount,
+            **TradingService._realized(total_amount, cost_basis),
+        )
+
+        user.refresh_from_db(fields=["virtual_balance"])
+        if portfolio is not None:
+            portfolio.stock = stock
+
+        user_id = user.pk
+        transaction.on_commit(lambda: TradingService._committed(user_id))
+
+        return TradeResult(trade, portfolio, user.virtual_balance)
+
+    @staticmethod
+    def _committed(user_id: int) -> None:
+        """Refresh what depends on the user's trades once they commit."""
+        notify_portfolio_changed(user_id)
+
+    @staticmethod
+    def _realized(total_amount: Decimal, cost_basis: Optional[Decimal]) -> dict:
+        """Cost basis and realized P&L fields of a sell transaction."""
+        if cost_basis is None:
+            return {}
+        cost_basis = cost_basis.quantize(CENT, rounding=ROUND_HALF_UP)
+        return {
+            "cost_basis": cost_basis,
+            "realized_profit_loss": total_amount - cost_basis,
+        }
+
+    @staticmethod
+    @transaction.atomic
+    def execute_batch(user, orders: List[Tuple[Stock, Decimal, str]]) -> BatchResult:
+        """
+        Execute a list of (stock, shares, transaction_type) orders as a unit.
+
+        Orders are applied in sequence to the user's balance and positions in
+        memory, at the prices of the given Stock objects, so the whole batch
+        sees one price snapshot. If any order fails, nothing is written;
+        otherwise the results are saved with one balance UPDATE, one bulk
+        Portfolio upsert and one bulk Transaction insert. Tax lots are
+        consumed in memory too and saved with one bulk update and insert.
+        """
+        User = get_user_model()
+
+        # Lock the user row so single trades (whose conditional UPDATEs start
+        # with, or follow, a balance update) wait for the batch to finish.
+        balance = (
+            User.objects.select_for_update()
+            .values_list("virtual_balance", flat=True)
+            .get(pk=user.pk)
+        )
+        stock_ids = {stock.id for stock, _, _ in orders}
+        held = (
+            Portfolio.objects.select_for_update()
+            .filter(user=user, stock_id__in=stock_ids)
+            .values_list("stock_id", "shares", "average_buy_price")
+        )
+        positions: Dict[int, Tuple[Decimal, Decimal]] = {
+            stock_id: (shares, average_buy_price)
+            for stock_id, shares, average_buy_price in held
+        }
+        lots = LotLedger.open_lots(user, stock_ids)
+        new_lots: List[TaxLot] = []
+        changed_lots: Dict[int, TaxLot] = {}
+
+        trades = []
+        for index, (stock, shares, transaction_type) in enumerate(orders):
+            price = stock.current_price
+            total_amount = TradingService.trade_amount(shares, price)
+            held, average_buy_price = positions.get(
+                stock.id, (Decimal("0"), Decimal("0"))
+            )
+
+            if transaction_type == "buy":
+                if balance < total_amount:
+                    raise TradeError("Insufficient balance", index)
+                balance -= total_amount
+                total_shares = held + shares
+                average_buy_price = (
+                    (held * average_buy_price + total_amount) / total_shares
+                ).quantize(CENT, rounding=ROUND_HALF_UP)
+                positions[stock.id] = (total_shares, average_buy_price)
+            else:
+                if held < shares:
+                    if stock.id not in positions:
+                        raise TradeError("No shares to sell", index)
+                    raise TradeError(f"Insufficient shares. You have {held}", index)
+                balance += total_amount
+                positions[stock.id] = (held - shares, average_buy_price)
+
+            trade = Transaction(
+                user=user,
+                stock=stock,
+                transaction_type=transaction_type,
+                shares=shares,
+                price_per_share=price,
+                total_amount=total_amount,
+            )
+            if transaction_type == "buy":
+                lot = LotLedger.new_lot(trade)
+                LotLedger.add(lots[stock.id], lot)
+                new_lots.append(lot)
+            else:
+                cost_basis, changed = LotLedger.consume(
+                    lots[stock.id], shares, average_buy_price
+                )
+                changed_lots.update((id(lot), lot) for lot in changed)
+                for field, value in TradingService._realized(
+                    total_amount, cost_basis
+                ).items():
+                    setattr(trade, field, value)
+            trades.append(trade)
+
+        User.objects.filter(pk=user.pk).update(virtual_balance=balance)
+
+        stocks = {stock.id: stock for stock, _, _ in orders}
+        open_positions = [
+            Portfolio(
+                user=user,
+                stock=stocks[stock_id],
+                shares=shares,
+                average_buy_price=average_buy_price,
+            )
+            for stock_id, (shares, average_buy_price) in positions.items()
+            if shares > 0
+        ]
+        Portfolio.objects.filter(
+            user=user,
+            stock_id__in=[
+                stock_id for stock_id, (shares, _) in positions.items() if shares == 0
+            ],
+        ).delete()
+        Portfolio.objects.bulk_create(
+            open_positions,
+            update_conflicts=True,
+            unique_fields=["user", "stock"],
+            update_fields=["shares", "average_buy_price", "updated_at"],
+        )
+
+        trades = Transaction.objects.bulk_create(trades)
+        TaxLot.objects.bulk_update(
+            [lot for lot in changed_lots.values() if lot.pk is not None],
+            ["remaining_shares"],
+        )
+        TaxLot.objects.bulk_create(new_lots)
+        user.virtual_balance = balance
+
+        user_id = user.pk
+        transaction.on_commit(lambda: TradingService._committed(user_id))
+
+        portfolios = list(
+            Portfolio.objects.filter(user=user, stock_id__in=stock_ids).select_related(
+                "stock"
+            )
+        )
+        return BatchResult(trades, portfolios, balance)
@@ -6,8 +6,16 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from .views import (
+    BacktestView,
+    LeagueViewSet,
+    OrderViewSet,
     PortfolioViewSet,
+    PriceAlertViewSet,
+    RecurringOrderViewSet,
+    ReturnLeaderboardView,
+    ScenarioViewSet,
     StockViewSet,
+    TradeBatchView,
     TradeView,
     TransactionViewSet,
     WatchlistViewSet,
@@ -17,9 +25,17 @@ router = DefaultRouter()
 router.register(r"stocks", StockViewSet, basename="stock")
 router.register(r"portfolio", PortfolioViewSet, basename="portfolio")
 router.register(r"transactions", TransactionViewSet, basename="transaction")
+router.register(r"orders", OrderViewSet, basename="order")
+router.register(r"recurring-orders", RecurringOrderViewSet, basename="recurring-order")
 router.register(r"watchlist", WatchlistViewSet, basename="watchlist")
+router.register(r"alerts", PriceAlertViewSet, basename="price-alert")
+router.register(r"leagues", LeagueViewSet, basename="league")
+router.register(r"scenarios", ScenarioViewSet, basename="scenario")
 
 urlpatterns = [
     path("", include(router.urls)),
     path("trade/", TradeView.as_view(), name="trade"),
+    path("trade/batch/", TradeBatchView.as_view(), name="trade-batch"),
+    path("backtest/", BacktestView.as_view(), name="backtest"),
+    path("leaderboard/", ReturnLeaderboardView.as_view(), name="leaderboard"),
 ]
@@ -2,25 +2,84 @@
 API views for Stocks app.
 """
 
+from datetime import datetime
 from decimal import Decimal
 
-from rest_framework import status, viewsets
+from django.db import transaction
+from django.db.models import Avg, Count, DecimalField, F, Q, Sum
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import Cursor, CursorPagination
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from apps.users.achievements import check_achievements
+from apps.users import events
+from apps.users.idempotency import idempotent
 
-from .models import Portfolio, Stock, Transaction, Watchlist
+from .alerts import get_alert_monitor
+from .backtest import BacktestError, BacktestService
+from .config import STOCK_SYMBOLS
+from .exports import (
+    HOLDING_EXPORT_FIELDS,
+    TRANSACTION_EXPORT_FIELDS,
+    CSVRenderer,
+    NDJSONRenderer,
+    export_response,
+)
+from .leaderboards import get_leaderboards
+from .lots import LotLedger
+from .models import (
+    CorporateAction,
+    League,
+    LeagueMembership,
+    Order,
+    Portfolio,
+    PriceAlert,
+    RecurringOrder,
+    Scenario,
+    Stock,
+    TaxLot,
+    Transaction,
+    Watchlist,
+)
+from .optimizer import DEFAULT_OBJECTIVE, OBJECTIVES, OptimizerService
+from .orders import get_matching_engine
+from .performance import (
+    DEFAULT_PERFORMANCE_RANGE,
+    PERFORMANCE_RANGES,
+    PerformanceService,
+)
+from .risk import RiskError, RiskService
+from .scenarios import ScenarioError, ScenarioService
 from .serializers import (
+    BacktestSerializer,
+    CorporateActionSerializer,
+    LeagueJoinSerializer,
+    LeagueSerializer,
+    OrderSerializer,
     PortfolioSerializer,
+    PriceAlertSerializer,
+    RecurringOrderSerializer,
+    ScenarioAdvanceSerializer,
+    ScenarioOrderSerializer,
+    ScenarioSerializer,
+    ScenarioTradeSerializer,
     StockListSerializer,
     StockSerializer,
+    TaxLotSerializer,
+    TradeBatchSerializer,
     TradeSerializer,
     TransactionSerializer,
     WatchlistSerializer,
 )
 from .services import StockService
+from .stats import DEFAULT_STATS_PERIOD, STATS_PERIODS, TransactionStatsService
+from .trading import TradeError, TradingService
 
 
 class StockViewSet(viewsets.ReadOnlyModelViewSet):
@@ -30,12 +89,81 @@ class StockViewSet(viewsets.ReadOnlyModelViewSet):
     """
 
     queryset = Stock.objects.all()
+    filter_backends = [OrderingFilter]
+    ordering_fields = [
+        "symbol",
+        "current_price",
+        "price_change",
+        "price_change_percent",
+    ]
+
+    MOVERS_DEFAULT_LIMIT = 10
+    MOVERS_MAX_LIMIT = 50
 
     def get_serializer_class(self):
         if self.action == "list":
             return StockListSerializer
         return StockSerializer
 
+    def list(self, request, *args, **kwargs):
+        """List stocks, answering conditional requests from the price version."""
+        price_version = StockService.get_price_version()
+        if price_version is None:
+            return super().list(request, *args, **kwargs)
+        return self._conditional_response(
+            request, *price_version, self._list_stocks, *args, **kwargs
+        )
+
+    def _list_stocks(self, request, *args, **kwargs):
+        """Render the list from the shared quote board when it is complete."""
+        stocks = None
+        if not request.query_params.get("ordering"):
+            stocks = StockService.get_stock_snapshot()
+        if stocks is None:
+            return super().list(request, *args, **kwargs)
+
+        page = self.paginate_queryset(stocks)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        return Response(self.get_serializer(stocks, many=True).data)
+
+    def retrieve(self, request, *args, **kwargs):
+        """Get a stock, answering conditional requests from its last update."""
+        last_updated = (
+            Stock.objects.filter(pk=kwargs.get("pk"))
+            .values_list("last_updated", flat=True)
+            .first()
+        )
+        if last_updated is None:
+            return super().retrieve(request, *args, **kwargs)
+        version = str(int(last_updated.timestamp() * 1_000_000))
+        return self._conditional_response(
+            request, version, last_updated, super().retrieve, *args, **kwargs
+        )
+
+    def _conditional_response(
+        self, request, version, last_updated, handler, *args, **kwargs
+    ):
+        """
+        Return 304 if the client already has this version, else call handler.
+        Nothing is serialized when the client's copy is still fresh.
+        """
+        etag = quote_etag(f'W/"{version}"')
+        last_modified = int(last_updated.timestamp())
+
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if not_modified is not None:
+            not_modified["ETag"] = etag
+            return not_modified
+
+        response = handler(request, *args, **kwargs)
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        return response
+
     @action(detail=False, methods=["post"])
     def refresh(self, request):
         """Refresh stock prices from external API."""
@@ -53,6 +181,64 @@ class StockViewSet(viewsets.ReadOnlyModelViewSet):
             {"message": f"Initialized {len(stocks)} stocks", "stocks": serializer.data}
         )
 
+    @action(detail=False, methods=["get"])
+    def movers(self, request):
+        """Get top gainers (direction=up) or losers (direction=down)."""
+        direction = request.query_params.get("direction", "up")
+        if direction not in ("up", "down"):
+            return Response(
+                {"error": "direction must be 'up' or 'down'"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            limit = int(request.query_params.get("limit", self.MOVERS_DEFAULT_LIMIT))
+        except ValueError:
+            return Response(
+                {"error": "limit must be an integer"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        limit = max(1, min(limit, self.MOVERS_MAX_LIMIT))
+
+        if direction == "up":
+            stocks = Stock.objects.filter(price_change_percent__gt=0).order_by(
+                "-price_change_percent"
+            )
+        else:
+            stocks = Stock.objects.filter(price_change_percent__lt=0).order_by(
+                "price_change_percent"
+            )
+
+        serializer = StockListSerializer(stocks[:limit], many=True)
+        return Response({"direction": direction, "stocks": serializer.data})
+
+    @action(detail=False, methods=["get"])
+    def sectors(self, request):
+        """Get per-sector aggregates: average change, total volume and market cap."""
+        sectors = (
+            Stock.objects.order_by("sector")
+            .values("sector")
+            .annotate(
+                stocks_count=Count("id"),
+                average_change_percent=Avg("price_change_percent"),
+                total_volume=Sum("volume"),
+                total_market_cap=Sum("market_cap"),
+            )
+        )
+
+        return Response(
+            [
+                {
+                    "sector": row["sector"],
+                    "stocks_count": row["stocks_count"],
+                    "average_change_percent": float(row["average_change_percent"] or 0),
+                    "total_volume": row["total_volume"] or 0,
+                    "total_market_cap": row["total_market_cap"] or 0,
+                }
+                for row in sectors
+            ]
+        )
+
     @action(detail=True, methods=["get"])
     def history(self, request, pk=None):
         """Get price history for a stock."""
@@ -63,6 +249,18 @@ class StockViewSet(viewsets.ReadOnlyModelViewSet):
 
         return Response({"symbol": stock.symbol, "period": period, "history": history})
 
+    @action(detail=True, methods=["get"], url_path="corporate-actions")
+    def corporate_actions(self, request, pk=None):
+        """Get a stock's splits and dividends, latest first."""
+        stock = self.get_object()
+        actions = stock.corporate_actions.all()
+        action_type = request.query_params.get("type")
+        if action_type:
+            if action_type not in dict(CorporateAction.ACTION_TYPES):
+                raise ValidationError({"error": "type must be one of: split, dividend"})
+            actions = actions.filter(action_type=action_type)
+        return Response(CorporateActionSerializer(actions, many=True).data)
+
     @action(detail=True, methods=["get"])
     def quote(self, request, pk=None):
         """Get real-time quote for a stock."""
@@ -108,10 +306,17 @@ class PortfolioViewSet(viewsets.ReadOnlyModelViewSet):
                 }
             )
 
-        holdings = Portfolio.objects.filter(user=user).select_related("stock")
-
-        total_value = sum(h.current_value for h in holdings)
-        total_cost = sum(h.total_cost for h in holdings)
+        # One aggregate query, whatever the number of holdings
+        money = DecimalField(max_digits=20, decimal_places=6)
+        totals = Portfolio.objects.filter(user=user).aggregate(
+            total_value=Sum(
+                F("shares") * F("stock__current_price"), output_field=money
+            ),
+            total_cost=Sum(F("shares") * F("average_buy_price"), output_field=money),
+            holdings_count=Count("id"),
+        )
+        total_value = totals["total_value"] or Decimal("0")
+        total_cost = totals["total_cost"] or Decimal("0")
 
         return Response(
             {
@@ -123,26 +328,287 @@ class PortfolioViewSet(viewsets.ReadOnlyModelViewSet):
                     if total_cost > 0
                     else 0
                 ),
-                "holdings_count": holdings.count(),
+                "holdings_count": totals["holdings_count"],
                 "virtual_balance": float(user.virtual_balance),
             }
         )
 
+    @action(detail=False, methods=["get"], permission_classes=[IsAuthenticated])
+    def realized(self, request):
+        """
+        Get realized P&L from the sell ledger, in total and per stock
+        (including positions since closed).
+        """
+        sells = Transaction.objects.filter(
+            user=request.user, realized_profit_loss__isnull=False
+        )
+        by_stock = (
+            sells.values("stock_id", "stock__symbol")
+            .annotate(
+                sells_count=Count("id"),
+                proceeds=Sum("total_amount"),
+                cost_basis=Sum("cost_basis"),
+                realized_profit_loss=Sum("realized_profit_loss"),
+            )
+            .order_by("stock__symbol")
+        )
+
+        stocks = [
+            {
+                "stock_id": row["stock_id"],
+                "symbol": row["stock__symbol"],
+                "sells_count": row["sells_count"],
+                "proceeds": float(row["proceeds"]),
+                "cost_basis": float(row["cost_basis"]),
+                "realized_profit_loss": float(row["realized_profit_loss"]),
+            }
+            for row in by_stock
+        ]
+        return Response(
+            {
+                "total_proceeds": sum(row["proceeds"] for row in stocks),
+                "total_cost_basis": sum(row["cost_basis"] for row in stocks),
+                "total_realized_profit_loss": sum(
+                    row["realized_profit_loss"] for row in stocks
+                ),
+                "stocks": stocks,
+            }
+        )
+
+    @action(detail=True, methods=["get"])
+    def lots(self, request, pk=None):
+        """
+        Get a position's open tax lots with unrealized P&L, and the P&L
+        realized so far on the stock.
+        """
+        portfolio = self.get_object()
+        lots = list(
+            TaxLot.objects.filter(
+                user=portfolio.user_id,
+                stock=portfolio.stock_id,
+                remaining_shares__gt=0,
+            )
+            .select_related("stock")
+            .order_by(*LotLedger.lot_order())
+        )
+        realized = Transaction.objects.filter(
+            user=portfolio.user_id, stock=portfolio.stock_id
+        ).aggregate(total=Sum("realized_profit_loss"))["total"] or Decimal("0")
+
+        # Shares held from before the lot ledger are costed at the average price
+        uncovered = portfolio.shares - sum(
+            (lot.remaining_shares for lot in lots), Decimal("0")
+        )
+        cost_basis = sum((lot.cost_basis for lot in lots), Decimal("0"))
+        cost_basis += max(uncovered, Decimal("0")) * portfolio.average_buy_price
+        market_value = portfolio.shares * portfolio.stock.current_price
+        return Response(
+            {
+                "symbol": portfolio.stock.symbol,
+                "shares": float(portfolio.shares),
+                "current_price": float(portfolio.stock.current_price),
+                "cost_basis": float(cost_basis),
+                "unrealized_profit_loss": float(market_value - cost_basis),
+                "realized_profit_loss": float(realized),
+                "lots": TaxLotSerializer(lots, many=True).data,
+            }
+        )
+
+    @action(
+        detail=False,
+        methods=["get"],
+        permission_classes=[IsAuthenticated],
+        renderer_classes=[CSVRenderer, NDJSONRenderer],
+    )
+    def export(self, request):
+        """
+        Download the holdings as a stream.
+        Query param: format (csv or ndjson; default csv).
+        """
+        return export_response(
+            self.get_queryset().order_by("stock__symbol"),
+            HOLDING_EXPORT_FIELDS,
+            request.accepted_renderer.format,
+            "portfolio",
+        )
+
+    @action(detail=False, methods=["get"], permission_classes=[IsAuthenticated])
+    def performance(self, request):
+        """
+        Get the daily NAV series of the user's portfolio.
+        Query param: range (1w, 1m, 3m, 6m, 1y, all; default 1m).
+        """
+        range_key = request.query_params.get("range", DEFAULT_PERFORMANCE_RANGE)
+        if range_key not in PERFORMANCE_RANGES:
+            return Response(
+                {"error": f"range must be one of: {', '.join(PERFORMANCE_RANGES)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response(PerformanceService.get_performance(request.user, range_key))
+
+    @action(detail=False, methods=["get"], permission_classes=[IsAuthenticated])
+    def risk(self, request):
+        """Volatility, beta, value at risk and correlations of the holdings."""
+        try:
+            return Response(RiskService.get_risk(request.user))
+        except RiskError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=False, methods=["get"], permission_classes=[IsAuthenticated])
+    def optimize(self, request):
+        """
+        Get the efficient frontier, the optimal portfolios of the tracked
+        stocks and the orders that rebalance the user's holdings to one.
+        Query param: objective (max_sharpe, min_variance; default max_sharpe).
+        """
+        objective = request.query_params.get("objective", DEFAULT_OBJECTIVE)
+        if objective not in OBJECTIVES:
+            return Response(
+                {"error": f"objective must be one of: {', '.join(OBJECTIVES)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            return Response(OptimizerService.get_plan(request.user, objective))
+        except RiskError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class TransactionCursorPagination(CursorPagination):
+    """
+    Keyset pagination over (executed_at, id), newest first.
+    The cursor holds the executed_at and id of the row it continues from,
+    and each page is an index range scan on (user, executed_at, id) from
+    there, without COUNT(*) or OFFSET, so deep pages cost the same as the
+    first one, even inside a run of equal timestamps.
+    """
+
+    ordering = ("-executed_at", "-id")
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor.reverse)
+        if cursor is not None and cursor.position is not None:
+            executed_at, pk = self._parse_position(cursor.position)
+            if reverse:
+                after = Q(executed_at__gt=executed_at) | Q(
+                    executed_at=executed_at, id__gt=pk
+                )
+            else:
+                after = Q(executed_at__lt=executed_at) | Q(
+                    executed_at=executed_at, id__lt=pk
+                )
+            queryset = queryset.filter(after)
+
+        ordering = ("executed_at", "id") if reverse else self.ordering
+        results = list(queryset.order_by(*ordering)[: self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[: self.page_size]
+        if reverse:
+            self.page.reverse()
+
+        # A cursor means there are rows on the side it came from
+        came_from = cursor is not None and cursor.position is not None
+        self.has_next = has_more if not reverse else came_from
+        self.has_previous = has_more if reverse else came_from
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=False, position=self._position(self.page[-1]))
+        )
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=True, position=self._position(self.page[0]))
+        )
+
+    @staticmethod
+    def _position(transaction_row) -> str:
+        return f"{transaction_row.executed_at.isoformat()},{transaction_row.pk}"
+
+    def _parse_position(self, position: str):
+        try:
+            executed_at, pk = position.rsplit(",", 1)
+            return datetime.fromisoformat(executed_at), int(pk)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
 
 class TransactionViewSet(viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for Transaction model.
     Uses the authenticated user automatically.
+    Query params: stock_id, transaction_type (buy or sell).
     """
 
     serializer_class = TransactionSerializer
+    pagination_class = TransactionCursorPagination
 
     def get_queryset(self):
         user = self.request.user
         queryset = Transaction.objects.select_related("stock")
-        if user.is_authenticated:
-            return queryset.filter(user=user)
-        return queryset.none()
+        if not user.is_authenticated:
+            return queryset.none()
+
+        queryset = queryset.filter(user=user)
+        params = self.request.query_params
+        if "stock_id" in params:
+            try:
+                queryset = queryset.filter(stock_id=int(params["stock_id"]))
+            except ValueError:
+                raise ValidationError({"error": "stock_id must be an integer"})
+        if "transaction_type" in params:
+            if params["transaction_type"] not in ("buy", "sell"):
+                raise ValidationError({"error": "transaction_type must be buy or sell"})
+            queryset = queryset.filter(transaction_type=params["transaction_type"])
+        return queryset
+
+    @action(detail=False, methods=["get"], permission_classes=[IsAuthenticated])
+    def stats(self, request):
+        """
+        Get trading statistics in total, per stock and per period.
+        Query param: period (day, week or month; default month).
+        """
+        period = request.query_params.get("period", DEFAULT_STATS_PERIOD)
+        if period not in STATS_PERIODS:
+            return Response(
+                {"error": f"period must be one of: {', '.join(STATS_PERIODS)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response(TransactionStatsService.get_stats(request.user, period))
+
+    @action(
+        detail=False,
+        methods=["get"],
+        permission_classes=[IsAuthenticated],
+        renderer_classes=[CSVRenderer, NDJSONRenderer],
+    )
+    def export(self, request):
+        """
+        Download the full transaction history as a stream.
+        Query param: format (csv or ndjson; default csv), plus the list filters.
+        """
+        return export_response(
+            self.get_queryset().order_by("-executed_at", "-id"),
+            TRANSACTION_EXPORT_FIELDS,
+            request.accepted_renderer.format,
+            "transactions",
+        )
 
 
 class TradeView(APIView):
@@ -151,6 +617,7 @@ class TradeView(APIView):
     Requires authentication — uses request.user for all operations.
     """
 
+    @idempotent
     def post(self, request):
         """Execute a buy or sell trade."""
         user = request.user
@@ -170,9 +637,8 @@ class TradeView(APIView):
         shares = Decimal(str(data["shares"]))
         transaction_type = data["transaction_type"]
 
-        try:
-            stock = Stock.objects.get(id=stock_id)
-        except Stock.DoesNotExist:
+        stock = StockService.get_stock(stock_id)
+        if stock is None:
             return Response(
                 {"error": "Stock not found"}, status=status.HTTP_404_NOT_FOUND
             )
@@ -183,102 +649,151 @@ class TradeView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        total_amount = shares * stock.current_price
+        try:
+            trade = TradingService.execute(user, stock, shares, transaction_type)
+        except TradeError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        if transaction_type == "buy":
-            result = self._execute_buy(user, stock, shares, total_amount)
-        else:
-            result = self._execute_sell(user, stock, shares, total_amount)
+        verb = "bought" if transaction_type == "buy" else "sold"
+        result = {
+            "message": f"Successfully {verb} {shares} shares of {stock.symbol}",
+            "transaction": TransactionSerializer(trade.transaction).data,
+            "portfolio": (
+                PortfolioSerializer(trade.portfolio).data if trade.portfolio else None
+            ),
+            "virtual_balance": float(trade.virtual_balance),
+        }
 
-        if "error" in result:
-            return Response(result, status=status.HTTP_400_BAD_REQUEST)
+        # Streak and achievements are updated in the background; unlocked
+        # achievements are pushed over the user's WebSocket.
+        events.emit(events.TRADE, user.id)
 
-        # Update daily streak on trades too
-        user.update_streak()
+        return Response(result)
 
-        # Check for newly unlocked achievements
-        new_achievements = check_achievements(user)
-        if new_achievements:
-            result["new_achievements"] = [
-                {"name": a.name, "icon": a.icon, "xp_reward": a.xp_reward}
-                for a in new_achievements
-            ]
 
-        return Response(result)
+class TradeBatchView(APIView):
+    """
+    API endpoint for executing several trades atomically.
+    All orders are priced from one snapshot; either all execute or none.
+    """
 
-    def _execute_buy(self, user, stock, shares, total_amount):
-        """Execute a buy order."""
-        if user.virtual_balance < total_amount:
-            return {"error": "Insufficient balance"}
+    @idempotent
+    def post(self, request):
+        """Execute a list of buy/sell orders."""
+        user = request.user
+        if not user.is_authenticated:
+            return Response(
+                {"error": "Authentication required"},
+                status=status.HTTP_401_UNAUTHORIZED,
+            )
 
-        user.virtual_balance -= total_amount
-        user.save()
+        serializer = TradeBatchSerializer(data=request.data)
 
-        portfolio, created = Portfolio.objects.get_or_create(
-            user=user,
-            stock=stock,
-            defaults={"shares": shares, "average_buy_price": stock.current_price},
-        )
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        if not created:
-            total_shares = portfolio.shares + shares
-            total_cost = (portfolio.shares * portfolio.average_buy_price) + total_amount
-            portfolio.average_buy_price = total_cost / total_shares
-            portfolio.shares = total_shares
-            portfolio.save()
-
-        transaction = Transaction.objects.create(
-            user=user,
-            stock=stock,
-            transaction_type="buy",
-            shares=shares,
-            price_per_share=stock.current_price,
-            total_amount=total_amount,
-        )
+        orders = serializer.validated_data["orders"]
+        stocks = StockService.get_stocks({order["stock_id"] for order in orders})
 
-        return {
-            "message": f"Successfully bought {shares} shares of {stock.symbol}",
-            "transaction": TransactionSerializer(transaction).data,
-            "portfolio": PortfolioSerializer(portfolio).data,
-            "virtual_balance": float(user.virtual_balance),
-        }
+        trades = []
+        for index, order in enumerate(orders):
+            stock = stocks.get(order["stock_id"])
+            if stock is None:
+                return Response(
+                    {"error": "Stock not found", "order_index": index},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
+            if stock.current_price <= 0:
+                return Response(
+                    {"error": "Stock price not available", "order_index": index},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            shares = Decimal(str(order["shares"]))
+            trades.append((stock, shares, order["transaction_type"]))
 
-    def _execute_sell(self, user, stock, shares, total_amount):
-        """Execute a sell order."""
         try:
-            portfolio = Portfolio.objects.get(user=user, stock=stock)
-        except Portfolio.DoesNotExist:
-            return {"error": "No shares to sell"}
+            batch = TradingService.execute_batch(user, trades)
+        except TradeError as e:
+            return Response(
+                {"error": str(e), "order_index": e.order_index},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-        if portfolio.shares < shares:
-            return {"error": f"Insufficient shares. You have {portfolio.shares}"}
+        result = {
+            "message": f"Successfully executed {len(batch.transactions)} orders",
+            "transactions": TransactionSerializer(batch.transactions, many=True).data,
+            "portfolio": PortfolioSerializer(batch.portfolios, many=True).data,
+            "virtual_balance": float(batch.virtual_balance),
+        }
 
-        user.virtual_balance += total_amount
-        user.save()
+        # Post-trade bookkeeping runs once for the whole batch
+        events.emit(events.TRADE, user.id)
 
-        portfolio.shares -= shares
-        if portfolio.shares == 0:
-            portfolio.delete()
-            portfolio_data = None
-        else:
-            portfolio.save()
-            portfolio_data = PortfolioSerializer(portfolio).data
-
-        transaction = Transaction.objects.create(
-            user=user,
-            stock=stock,
-            transaction_type="sell",
-            shares=shares,
-            price_per_share=stock.current_price,
-            total_amount=total_amount,
+        return Response(result)
+
+
+class OrderViewSet(mixins.CreateModelMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet for resting limit/stop orders of the authenticated user.
+    Orders execute automatically when a price update reaches their trigger.
+    """
+
+    serializer_class = OrderSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = Order.objects.filter(user=self.request.user).select_related("stock")
+        order_status = self.request.query_params.get("status")
+        if order_status:
+            queryset = queryset.filter(status=order_status)
+        return queryset
+
+    def perform_create(self, serializer):
+        data = serializer.validated_data
+        if data["transaction_type"] == "sell":
+            held = (
+                Portfolio.objects.filter(user=self.request.user, stock=data["stock"])
+                .values_list("shares", flat=True)
+                .first()
+            )
+            if held is None or held < data["shares"]:
+                raise ValidationError({"error": "Insufficient shares"})
+
+        order = serializer.save(user=self.request.user)
+        get_matching_engine().add(order)
+
+    @action(detail=True, methods=["post"])
+    def cancel(self, request, pk=None):
+        """Cancel an open order."""
+        order = self.get_object()
+        cancelled = Order.objects.filter(pk=order.pk, status="open").update(
+            status="cancelled"
         )
+        if not cancelled:
+            return Response(
+                {"error": f"Order is already {order.status}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        order.refresh_from_db()
+        return Response(OrderSerializer(order).data)
 
-        return {
-            "message": f"Successfully sold {shares} shares of {stock.symbol}",
-            "transaction": TransactionSerializer(transaction).data,
-            "portfolio": portfolio_data,
-            "virtual_balance": float(user.virtual_balance),
-        }
+
+class RecurringOrderViewSet(viewsets.ModelViewSet):
+    """
+    ViewSet for the authenticated user's recurring buys. Due orders are
+    executed by the run_recurring_orders job; set is_active to pause one.
+    """
+
+    serializer_class = RecurringOrderSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return RecurringOrder.objects.filter(user=self.request.user).select_related(
+            "stock"
+        )
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
 
 
 class WatchlistViewSet(viewsets.ModelViewSet):
@@ -291,10 +806,308 @@ class WatchlistViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         user = self.request.user
-        queryset = Watchlist.objects.select_related("stock")
+        queryset = Watchlist.objects.select_related("stock").prefetch_related("alerts")
         if user.is_authenticated:
             return queryset.filter(user=user)
         return queryset.none()
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+
+
+class PriceAlertViewSet(
+    mixins.CreateModelMixin, mixins.DestroyModelMixin, viewsets.ReadOnlyModelViewSet
+):
+    """
+    ViewSet for price alerts on the authenticated user's watchlist entries.
+    Alerts fire once, on the first price tick that crosses them.
+    """
+
+    serializer_class = PriceAlertSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = PriceAlert.objects.filter(
+            watchlist__user=self.request.user
+        ).select_related("watchlist__stock")
+        active = self.request.query_params.get("active")
+        if active is not None:
+            queryset = queryset.filter(is_active=active.lower() == "true")
+        return queryset
+
+    def perform_create(self, serializer):
+        data = serializer.validated_data
+        watchlist = data["watchlist"]
+        if watchlist.user_id != self.request.user.id:
+            raise ValidationError({"error": "Stock is not in your watchlist"})
+
+        price = watchlist.stock.current_price
+        if price <= 0:
+            raise ValidationError({"error": "No current price for this stock"})
+        if data["condition"] == "above" and data["target_price"] <= price:
+            raise ValidationError(
+                {"error": f"Target must be above the current price (${price})"}
+            )
+        if data["condition"] == "below" and data["target_price"] >= price:
+            raise ValidationError(
+                {"error": f"Target must be below the current price (${price})"}
+            )
+
+        alert = serializer.save(reference_price=price)
+        get_alert_monitor().add(alert)
+
+
+LEADERBOARD_DEFAULT_LIMIT = 20
+LEADERBOARD_MAX_LIMIT = 100
+LEADERBOARD_DEFAULT_WINDOW = 5
+LEADERBOARD_MAX_WINDOW = 50
+
+
+def leaderboard_params(request):
+    """The leaderboard's ?limit (top entries) and ?window (entries around me)."""
+    try:
+        limit = int(request.query_params.get("limit", LEADERBOARD_DEFAULT_LIMIT))
+        window = int(request.query_params.get("window", LEADERBOARD_DEFAULT_WINDOW))
+    except ValueError:
+        raise ValidationError({"error": "limit and window must be integers"})
+    return (
+        max(1, min(limit, LEADERBOARD_MAX_LIMIT)),
+        max(0, min(window, LEADERBOARD_MAX_WINDOW)),
+    )
+
+
+class ReturnLeaderboardView(APIView):
+    """
+    API view for the global leaderboard: users ranked by the return of
+    their portfolio on the initial virtual balance.
+    """
+
+    def get(self, request):
+        limit, window = leaderboard_params(request)
+        user_id = request.user.id if request.user.is_authenticated else None
+        return Response(get_leaderboards().get_global(user_id, limit, window))
+
+
+class LeagueViewSet(
+    mixins.CreateModelMixin, mixins.DestroyModelMixin, viewsets.ReadOnlyModelViewSet
+):
+    """
+    ViewSet for the private leagues the authenticated user is a member of.
+    The creator owns the league and joins it; others join with its invite
+    code.
+    """
+
+    serializer_class = LeagueSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return (
+            League.objects.filter(
+                id__in=LeagueMembership.objects.filter(user=self.request.user).values(
+                    "league_id"
+                )
+            )
+            .select_related("owner")
+            .annotate(member_count=Count("memberships"))
+            .order_by("-created_at")
+        )
+
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            league = serializer.save(owner=self.request.user)
+            LeagueMembership.objects.create(league=league, user=self.request.user)
+        league.member_count = 1
+
+    def destroy(self, request, *args, **kwargs):
+        league = self.get_object()
+        if league.owner_id != request.user.id:
+            return Response(
+                {"error": "Only the owner can delete a league"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+        league.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=False, methods=["post"])
+    def join(self, request):
+        """Join a league by its invite code."""
+        serializer = LeagueJoinSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        league = League.objects.filter(
+            invite_code=serializer.validated_data["invite_code"]
+        ).first()
+        if league is None:
+            return Response(
+                {"error": "Invalid invite code"}, status=status.HTTP_404_NOT_FOUND
+            )
+
+        with transaction.atomic():
+            _, created = LeagueMembership.objects.get_or_create(
+                league=league, user=request.user
+            )
+            if not created:
+                return Response(
+                    {"error": "You are already a member of this league"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            League.objects.filter(pk=league.pk).update(version=F("version") + 1)
+        return Response(
+            LeagueSerializer(self.get_queryset().get(pk=league.pk)).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+    @action(detail=True, methods=["post"])
+    def leave(self, request, pk=None):
+        """Leave a league. Its owner deletes it instead."""
+        league = self.get_object()
+        if league.owner_id == request.user.id:
+            return Response(
+                {"error": "The owner can't leave a league; delete it instead"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        with transaction.atomic():
+            LeagueMembership.objects.filter(league=league, user=request.user).delete()
+            League.objects.filter(pk=league.pk).update(version=F("version") + 1)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=True, methods=["get"])
+    def leaderboard(self, request, pk=None):
+        """Members ranked by their return since the league started."""
+        league = self.get_object()
+        limit, window = leaderboard_params(request)
+        return Response(
+            {
+                "id": league.id,
+                "name": league.name,
+                **get_leaderboards().get_league(
+                    league.id, request.user.id, limit, window
+                ),
+            }
+        )
+
+
+class ScenarioViewSet(
+    mixins.CreateModelMixin, mixins.DestroyModelMixin, viewsets.ReadOnlyModelViewSet
+):
+    """
+    ViewSet for the authenticated user's time-travel scenarios.
+    Each scenario trades at historical prices as of its own clock.
+    """
+
+    serializer_class = ScenarioSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return Scenario.objects.filter(user=self.request.user)
+
+    def perform_create(self, serializer):
+        data = serializer.validated_data
+        try:
+            serializer.instance = ScenarioService.start(
+                self.request.user,
+                data["start_date"],
+                data["initial_balance"],
+                data.get("name", ""),
+            )
+        except ScenarioError as e:
+            raise ValidationError({"error": str(e)})
+
+    @action(detail=True, methods=["post"])
+    def advance(self, request, pk=None):
+        """Move the scenario's clock forward (`days` or `to`)."""
+        scenario = self.get_object()
+        serializer = ScenarioAdvanceSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            ScenarioService.advance(scenario, **serializer.validated_data)
+        except ScenarioError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(ScenarioSerializer(scenario).data)
+
+    @action(detail=True, methods=["post"])
+    def trade(self, request, pk=None):
+        """Buy or sell at the price as of the scenario's clock."""
+        scenario = self.get_object()
+        serializer = ScenarioOrderSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        stock = Stock.objects.filter(pk=data["stock_id"]).first()
+        if stock is None:
+            return Response(
+                {"error": "Stock not found"}, status=status.HTTP_404_NOT_FOUND
+            )
+
+        try:
+            trade = ScenarioService.trade(
+                scenario, stock, data["shares"], data["transaction_type"]
+            )
+        except TradeError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(
+            {
+                "trade": ScenarioTradeSerializer(trade).data,
+                "cash_balance": float(scenario.cash_balance),
+            }
+        )
+
+    @action(detail=True, methods=["get"])
+    def prices(self, request, pk=None):
+        """Prices of all stocks as of the scenario's clock."""
+        scenario = self.get_object()
+        return Response(
+            {
+                "clock": scenario.clock.isoformat(),
+                "prices": ScenarioService.get_prices(scenario),
+            }
+        )
+
+    @action(detail=True, methods=["get"])
+    def summary(self, request, pk=None):
+        """Cash, positions and total value as of the scenario's clock."""
+        return Response(ScenarioService.get_summary(self.get_object()))
+
+    @action(detail=True, methods=["get"])
+    def trades(self, request, pk=None):
+        """Trades executed in the scenario, latest clock first."""
+        scenario = self.get_object()
+        return Response(
+            ScenarioTradeSerializer(
+                scenario.trades.select_related("stock"), many=True
+            ).data
+        )
+
+
+class BacktestView(APIView):
+    """
+    API endpoint for backtesting a rule-based strategy over stored daily
+    price history.
+    """
+
+    def post(self, request):
+        """Run a strategy; defaults to all tracked stocks and all history."""
+        serializer = BacktestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        try:
+            result = BacktestService.run(
+                data.get("symbols", STOCK_SYMBOLS),
+                data["entry"],
+                data["exit"],
+                data["initial_capital"],
+                data["position_size"],
+                data.get("start"),
+                data.get("end"),
+            )
+        except BacktestError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(result)
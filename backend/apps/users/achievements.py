@@ -1,6 +1,7 @@
 """
 Achievement checking logic.
-Called after lesson completions and trades to award newly unlocked achievements.
+Run by the event worker after lesson completions and trades to award newly
+unlocked achievements.
 """
 
 from apps.lessons.models import UserLessonProgress, UserModuleProgress
@@ -48,8 +49,12 @@ def check_achievements(user):
 
         current_value = checker(user)
         if current_value >= achievement.condition_value:
-            UserAchievement.objects.create(user=user, achievement=achievement)
-            user.add_xp(achievement.xp_reward)
-            new_achievements.append(achievement)
+            # get_or_create: another worker may have just unlocked it
+            _, created = UserAchievement.objects.get_or_create(
+                user=user, achievement=achievement
+            )
+            if created:
+                user.add_xp(achievement.xp_reward)
+                new_achievements.append(achievement)
 
     return new_achievements
@@ -0,0 +1,38 @@
+"""
+WebSocket consumer for per-user events (unlocked achievements, etc.).
+"""
+
+import json
+
+from channels.generic.websocket import AsyncWebsocketConsumer
+
+from .notifications import user_group_name
+
+
+class UserEventConsumer(AsyncWebsocketConsumer):
+    """
+    Authenticated WebSocket that receives events for the connected user.
+    Messages are sent as {"type": <message_type>, "data": ...}.
+    """
+
+    async def connect(self):
+        """Accept authenticated connections and join the user's group."""
+        user = self.scope.get("user")
+        if user is None or not user.is_authenticated:
+            await self.close()
+            return
+
+        self.group_name = user_group_name(user.id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        """Leave the user's group."""
+        if hasattr(self, "group_name"):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def user_notify(self, event):
+        """Forward a notification from the channel layer to the client."""
+        await self.send(
+            text_data=json.dumps({"type": event["message_type"], "data": event["data"]})
+        )
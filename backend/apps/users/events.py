@@ -0,0 +1,92 @@
+"""
+Post-commit event pipeline for gamification bookkeeping.
+
+Trades and lesson completions emit events instead of updating streaks and
+checking achievements inside the request. Events are queued only once the
+surrounding transaction commits (transaction.on_commit) and are processed
+by a background worker thread, which pushes newly unlocked achievements to
+the user over WebSocket. Events still in the queue when the process exits
+are lost; they are only bookkeeping and are re-evaluated on the next one.
+"""
+
+import logging
+import queue
+import threading
+
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections, transaction
+
+from .achievements import check_achievements
+from .notifications import notify_user
+
+logger = logging.getLogger(__name__)
+
+TRADE = "trade"
+LESSON_COMPLETED = "lesson_completed"
+
+_queue: "queue.Queue[tuple[str, int]]" = queue.Queue()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def emit(event_type: str, user_id: int) -> None:
+    """Queue an event for a user, once the current transaction commits."""
+    transaction.on_commit(lambda: _enqueue(event_type, user_id))
+
+
+def _enqueue(event_type: str, user_id: int) -> None:
+    _ensure_worker()
+    _queue.put((event_type, user_id))
+
+
+def _ensure_worker() -> None:
+    """Start this process's worker thread on first use."""
+    global _worker
+    if _worker is not None and _worker.is_alive():
+        return
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(
+                target=_run_worker, name="finlearn-events", daemon=True
+            )
+            _worker.start()
+
+
+def _run_worker() -> None:
+    while True:
+        event_type, user_id = _queue.get()
+        try:
+            process_event(event_type, user_id)
+        except Exception:
+            logger.exception(f"Error processing {event_type} event for {user_id}")
+        finally:
+            close_old_connections()
+            _queue.task_done()
+
+
+def process_event(event_type: str, user_id: int) -> None:
+    """Run the bookkeeping for one event and notify unlocked achievements."""
+    user = get_user_model().objects.filter(pk=user_id).first()
+    if user is None:
+        return
+
+    if event_type == TRADE:
+        # Lesson completions update the streak in the request, since the
+        # response reports it.
+        user.update_streak()
+
+    new_achievements = check_achievements(user)
+    if new_achievements:
+        notify_user(
+            user.id,
+            "achievements",
+            [
+                {"name": a.name, "icon": a.icon, "xp_reward": a.xp_reward}
+                for a in new_achievements
+            ],
+        )
+
+
+def wait_for_events() -> None:
+    """Block until every queued event has been processed (for scripts)."""
+    _queue.join()
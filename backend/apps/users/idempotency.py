@@ -0,0 +1,124 @@
+"""
+Idempotency-Key support for mutating API endpoints.
+
+A client that retries a request (e.g. after a network failure) sends the
+same Idempotency-Key header. The first request stores its response under
+(user, key); retries replay it with one indexed lookup instead of running
+the business logic again. The key row is inserted in the same transaction
+as the business logic, so concurrent duplicates wait for the first request
+and then replay its response.
+"""
+
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = "HTTP_IDEMPOTENCY_KEY"
+MAX_KEY_LENGTH = 255
+
+
+def key_ttl() -> timedelta:
+    """How long stored responses are replayed."""
+    return timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+
+
+def request_fingerprint(request) -> str:
+    """Hash of the request, to detect a key reused for a different request."""
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    payload = f"{request.method}\n{request.path}\n{body}"
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _replay(record: IdempotencyKey) -> HttpResponse:
+    response = HttpResponse(
+        record.response_body,
+        status=record.status_code,
+        content_type="application/json",
+    )
+    response["Idempotent-Replayed"] = "true"
+    return response
+
+
+def _lookup(user, key, fingerprint):
+    """Return a response for an existing key, or None to execute the request."""
+    record = IdempotencyKey.objects.filter(user=user, key=key).first()
+    if record is None:
+        return None
+    if record.created_at < timezone.now() - key_ttl():
+        record.delete()
+        return None
+    if record.fingerprint != fingerprint:
+        return Response(
+            {"error": "Idempotency-Key was already used for a different request"},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    return _replay(record)
+
+
+def idempotent(view_method):
+    """
+    Decorator for APIView/ViewSet methods honouring the Idempotency-Key header.
+    Requests without the header, or from anonymous users, run normally.
+    Responses with a 5xx status are not stored, so those can be retried.
+    """
+
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.META.get(HEADER)
+        if not key or not request.user.is_authenticated:
+            return view_method(self, request, *args, **kwargs)
+
+        if len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {"error": f"Idempotency-Key must be at most {MAX_KEY_LENGTH} chars"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        user = request.user
+        fingerprint = request_fingerprint(request)
+
+        existing = _lookup(user, key, fingerprint)
+        if existing is not None:
+            return existing
+
+        with transaction.atomic():
+            try:
+                # Blocks on the unique index while a concurrent duplicate
+                # is still in flight, then fails once it has committed.
+                with transaction.atomic():
+                    record = IdempotencyKey.objects.create(
+                        user=user, key=key, fingerprint=fingerprint
+                    )
+            except IntegrityError:
+                record = None
+
+            if record is None:
+                return _lookup(user, key, fingerprint) or Response(
+                    {"error": "A request with this Idempotency-Key is in progress"},
+                    status=status.HTTP_409_CONFLICT,
+                )
+
+            response = view_method(self, request, *args, **kwargs)
+
+            if response.status_code >= 500:
+                record.delete()
+                return response
+
+            record.status_code = response.status_code
+            record.response_body = JSONRenderer().render(response.data).decode()
+            record.save(update_fields=["status_code", "response_body"])
+
+        return response
+
+    return wrapper
@@ -0,0 +1,21 @@
+"""
+Management command to delete expired Idempotency-Key responses.
+Meant to run periodically (e.g. from cron); uses the created_at index.
+"""
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.users.idempotency import key_ttl
+from apps.users.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = "Delete stored Idempotency-Key responses older than the TTL."
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - key_ttl()
+        deleted, _ = IdempotencyKey.objects.filter(created_at__lt=cutoff).delete()
+        self.stdout.write(
+            self.style.SUCCESS(f"Deleted {deleted} expired idempotency keys.")
+        )
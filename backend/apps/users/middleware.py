@@ -0,0 +1,33 @@
+"""
+Channels middleware for DRF token authentication on WebSockets.
+Browsers can't set headers on WebSocket requests, so the token is passed
+in the query string: ws/user/?token=<key>.
+"""
+
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser
+from rest_framework.authtoken.models import Token
+
+
+@database_sync_to_async
+def get_token_user(key: str):
+    """Get the user owning a token, or AnonymousUser."""
+    try:
+        return Token.objects.select_related("user").get(key=key).user
+    except Token.DoesNotExist:
+        return AnonymousUser()
+
+
+class TokenAuthMiddleware(BaseMiddleware):
+    """Set scope["user"] from a ?token= query parameter, if present."""
+
+    async def __call__(self, scope, receive, send):
+        query = parse_qs(scope.get("query_string", b"").decode())
+        token = query.get("token", [None])[0]
+        if token:
+            scope = dict(scope)
+            scope["user"] = await get_token_user(token)
+        return await super().__call__(scope, receive, send)
@@ -7,6 +7,8 @@ from datetime import timedelta
 
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Greatest
 from django.utils import timezone
 
 
@@ -46,12 +48,16 @@ class User(AbstractUser):
         return self.username
 
     def add_xp(self, amount: int) -> None:
-        """Add XP points and check for level up."""
-        self.xp_points += amount
-        new_level = (self.xp_points // 1000) + 1
-        if new_level > self.level:
-            self.level = new_level
-        self.save()
+        """
+        Add XP points and check for level up. Done in one UPDATE, so XP
+        awarded concurrently (e.g. by the achievements worker) isn't lost.
+        """
+        User.objects.filter(pk=self.pk).update(
+            xp_points=F("xp_points") + amount,
+            level=Greatest(F("level"), (F("xp_points") + amount) / 1000 + 1),
+            updated_at=timezone.now(),
+        )
+        self.refresh_from_db(fields=["xp_points", "level", "updated_at"])
 
     def update_streak(self) -> None:
         """Update the daily activity streak.
@@ -70,7 +76,7 @@ class User(AbstractUser):
             self.streak_days = 1
 
         self.last_activity_date = today
-        self.save()
+        self.save(update_fields=["streak_days", "last_activity_date", "updated_at"])
 
     @property
     def xp_to_next_level(self) -> int:
@@ -131,3 +137,28 @@ class UserAchievement(models.Model):
 
     def __str__(self):
         return f"{self.user} - {self.achievement}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Stored response of a mutating request sent with an Idempotency-Key header.
+    Retries with the same key replay this response instead of re-executing.
+    """
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="idempotency_keys"
+    )
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)  # SHA-256 of method, path, body
+
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response_body = models.TextField(blank=True)  # Rendered JSON
+
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        db_table = "idempotency_keys"
+        unique_together = ["user", "key"]
+
+    def __str__(self):
+        return f"{self.user} - {self.key}"
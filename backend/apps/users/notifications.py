@@ -0,0 +1,61 @@
+"""
+Push notifications to a user's WebSocket connections.
+Every authenticated connection to ws/user/ joins its user's group.
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+logger = logging.getLogger(__name__)
+
+
+def user_group_name(user_id: int) -> str:
+    """Channel layer group for a user's WebSocket connections."""
+    return f"user_{user_id}"
+
+
+def notify_user(user_id: int, message_type: str, data) -> None:
+    """
+    Send a message to all of a user's open WebSocket connections.
+    Must be called from synchronous code (views, services, workers).
+    """
+    notify_users(message_type, {user_id: data})
+
+
+def notify_users(message_type: str, data_by_user: Dict[int, Any]) -> None:
+    """
+    Send a message to each of several users, all in one event loop hop.
+    Must be called from synchronous code (views, services, workers).
+    """
+    channel_layer = get_channel_layer()
+    if channel_layer is None or not data_by_user:
+        return
+
+    async def send_all():
+        user_ids = list(data_by_user)
+        results = await asyncio.gather(
+            *(
+                channel_layer.group_send(
+                    user_group_name(user_id),
+                    {
+                        "type": "user.notify",
+                        "message_type": message_type,
+                        "data": data_by_user[user_id],
+                    },
+                )
+                for user_id in user_ids
+            ),
+            return_exceptions=True,
+        )
+        for user_id, result in zip(user_ids, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error notifying user {user_id}: {result}")
+
+    try:
+        async_to_sync(send_all)()
+    except Exception as e:
+        logger.error(f"Error sending notifications: {e}")
@@ -0,0 +1,11 @@
+"""
+WebSocket URL routing for Users app.
+"""
+
+from django.urls import re_path
+
+from . import consumers
+
+websocket_urlpatterns = [
+    re_path(r"ws/user/$", consumers.UserEventConsumer.as_asgi()),
+]
@@ -15,11 +15,15 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 django_asgi_app = get_asgi_application()
 
 # Import after Django setup (must follow get_asgi_application)
-from apps.stocks.routing import websocket_urlpatterns  # noqa: E402
+from apps.stocks.routing import websocket_urlpatterns as stock_urlpatterns  # noqa: E402
+from apps.users.middleware import TokenAuthMiddleware  # noqa: E402
+from apps.users.routing import websocket_urlpatterns as user_urlpatterns  # noqa: E402
 
 application = ProtocolTypeRouter(
     {
         "http": django_asgi_app,
-        "websocket": AuthMiddlewareStack(URLRouter(websocket_urlpatterns)),
+        "websocket": AuthMiddlewareStack(
+            TokenAuthMiddleware(URLRouter(stock_urlpatterns + user_urlpatterns))
+        ),
     }
 )
@@ -6,6 +6,7 @@ Duolingo-style financial education app.
 import os
 from pathlib import Path
 
+from corsheaders.defaults import default_headers
 from dotenv import load_dotenv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -85,6 +86,18 @@ CHANNEL_LAYERS = {
     }
 }
 
+# Cache (per-user trading statistics). Set REDIS_URL so all worker
+# processes share it; the default in-memory cache is per process.
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
 # Database (PostgreSQL only; requires psycopg2-binary)
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 _conn_max_age_raw = os.getenv("POSTGRES_CONN_MAX_AGE", "60")
@@ -148,3 +161,7 @@ CORS_ALLOWED_ORIGINS = [
     "http://127.0.0.1:5173",
 ]
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key")
+
+# How long (seconds) responses stored under an Idempotency-Key are replayed
+IDEMPOTENCY_KEY_TTL = int(os.getenv("IDEMPOTENCY_KEY_TTL", str(24 * 60 * 60)))
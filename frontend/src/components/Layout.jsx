@@ -1,10 +1,21 @@
-import { useState } from 'react';
+import { useEffect, useState } from 'react';
 import { Outlet } from 'react-router-dom';
 import { Menu } from 'lucide-react';
 import Sidebar from './Sidebar';
+import { useAuth } from '../contexts/AuthContext';
+import { useUserEvents } from '../hooks/useWebSocket';
 
 function Layout() {
   const [sidebarOpen, setSidebarOpen] = useState(false);
+  const { user, refreshUser } = useAuth();
+  const { lastMessage } = useUserEvents(user ? localStorage.getItem('token') : null);
+
+  // Achievements are awarded in the background; refresh XP when one unlocks
+  useEffect(() => {
+    if (lastMessage?.type === 'achievements') {
+      refreshUser();
+    }
+  }, [lastMessage]);
 
   return (
     <div className="flex min-h-screen bg-gray-50">
@@ -14,6 +14,7 @@ export function useWebSocket(url) {
   const maxReconnectAttempts = 5;
 
   const connect = useCallback(() => {
+    if (!url) return;
     try {
       // Use the full WebSocket URL
       const wsUrl = url.startsWith('ws') ? url : `ws://${window.location.host}${url}`;
@@ -127,4 +128,55 @@ export function useStockPrices() {
   };
 }
 
+/**
+ * Hook for per-user events (e.g. unlocked achievements).
+ * Authenticates with the stored token; pass null to stay disconnected.
+ */
+export function useUserEvents(token) {
+  const url = token ? `/ws/user/?token=${encodeURIComponent(token)}` : null;
+  return useWebSocket(url);
+}
+
+/**
+ * Hook for the live valuation of the user's holdings.
+ * Returns the latest valuation pushed on each price tick (null until one arrives).
+ */
+export function usePortfolioStream(token) {
+  const url = token ? `/ws/portfolio/?token=${encodeURIComponent(token)}` : null;
+  const { lastMessage, isConnected } = useWebSocket(url);
+  const valuation = lastMessage?.type === 'portfolio' ? lastMessage.data : null;
+  return { valuation, isConnected };
+}
+
+/**
+ * Hook for Monte Carlo projections of the user's portfolio.
+ * project(days, paths) starts one; progress and the final bands stream back.
+ */
+export function useProjection(token) {
+  const url = token ? `/ws/projection/?token=${encodeURIComponent(token)}` : null;
+  const { lastMessage, isConnected, sendMessage } = useWebSocket(url);
+  const [progress, setProgress] = useState(null);
+  const [result, setResult] = useState(null);
+  const [error, setError] = useState(null);
+
+  useEffect(() => {
+    if (lastMessage?.type === 'projection_progress') {
+      setProgress(lastMessage.done / lastMessage.total);
+    } else if (lastMessage?.type === 'projection') {
+      setResult(lastMessage.data);
+    } else if (lastMessage?.error) {
+      setError(lastMessage.error);
+    }
+  }, [lastMessage]);
+
+  const project = useCallback((days = 252, paths = 10000) => {
+    setProgress(0);
+    setResult(null);
+    setError(null);
+    sendMessage({ action: 'project', days, paths });
+  }, [sendMessage]);
+
+  return { project, progress, result, error, isConnected };
+}
+
 export default useWebSocket;
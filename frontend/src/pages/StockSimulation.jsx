@@ -14,7 +14,7 @@ import StockCard from '../components/StockCard';
 import StockChart from '../components/StockChart';
 import { stocksApi } from '../services/api';
 import { useAuth } from '../contexts/AuthContext';
-import { useStockPrices } from '../hooks/useWebSocket';
+import { useStockPrices, usePortfolioStream } from '../hooks/useWebSocket';
 import translations from '../i18n/translations';
 
 // Sample stocks data (used when API is not available)
@@ -73,6 +73,9 @@ function StockSimulation() {
   
   // WebSocket for real-time updates
   const { stocks: wsStocks, isConnected, refreshPrices } = useStockPrices();
+  const { valuation } = usePortfolioStream(
+    isAuthenticated ? localStorage.getItem('token') : null
+  );
 
   const fetchPortfolio = useCallback(async () => {
     if (!isAuthenticated) return;
@@ -113,6 +116,18 @@ function StockSimulation() {
     fetchPortfolio();
   }, [fetchPortfolio]);
 
+  // Live portfolio valuation, pushed on price ticks and after trades
+  useEffect(() => {
+    if (valuation) {
+      setPortfolio((prev) => ({
+        ...prev,
+        balance: valuation.virtual_balance,
+        totalValue: valuation.virtual_balance + valuation.total_value,
+        totalProfitLoss: valuation.total_profit_loss,
+      }));
+    }
+  }, [valuation]);
+
   // Update stocks from WebSocket
   useEffect(() => {
     if (wsStocks && wsStocks.length > 0) {
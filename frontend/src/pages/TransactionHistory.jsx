@@ -8,7 +8,9 @@ import translations from '../i18n/translations';
 function TransactionHistory() {
   const { isAuthenticated } = useAuth();
   const [transactions, setTransactions] = useState([]);
+  const [nextPage, setNextPage] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     async function fetchTransactions() {
@@ -19,6 +21,7 @@ function TransactionHistory() {
       try {
         const data = await stocksApi.getTransactions();
         setTransactions(data?.results ?? data ?? []);
+        setNextPage(data?.next ?? null);
       } catch (err) {
         console.log('Failed to fetch transactions:', err.message);
       } finally {
@@ -28,6 +31,19 @@ function TransactionHistory() {
     fetchTransactions();
   }, [isAuthenticated]);
 
+  const loadMore = async () => {
+    setLoadingMore(true);
+    try {
+      const data = await stocksApi.getTransactions({ next: nextPage });
+      setTransactions((prev) => [...prev, ...(data?.results ?? [])]);
+      setNextPage(data?.next ?? null);
+    } catch (err) {
+      console.log('Failed to fetch transactions:', err.message);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const formatDate = (iso) => {
     if (!iso) return '';
     const d = new Date(iso);
@@ -48,7 +64,7 @@ function TransactionHistory() {
             Historial de Operaciones
           </h1>
           <p className="text-gray-500">
-            {transactions.length} operaciones registradas
+            {transactions.length}{nextPage ? '+' : ''} operaciones registradas
           </p>
         </div>
         <div className="w-14 h-14 bg-primary-100 rounded-2xl flex items-center justify-center">
@@ -125,6 +141,16 @@ function TransactionHistory() {
               </div>
             );
           })}
+          {nextPage && (
+            <button
+              onClick={loadMore}
+              disabled={loadingMore}
+              className="btn-secondary w-full flex items-center justify-center gap-2"
+            >
+              {loadingMore && <Loader2 className="w-4 h-4 animate-spin" />}
+              Cargar más
+            </button>
+          )}
         </div>
       )}
     </div>
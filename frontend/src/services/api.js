@@ -31,7 +31,15 @@ async function fetchApi(endpoint, options = {}) {
     },
   };
   
-  const response = await fetch(url, mergedOptions);
+  let response;
+  try {
+    response = await fetch(url, mergedOptions);
+  } catch (networkError) {
+    // Requests carrying an Idempotency-Key are safe to retry once: the
+    // backend replays the original response instead of executing twice.
+    if (!mergedOptions.headers['Idempotency-Key']) throw networkError;
+    response = await fetch(url, mergedOptions);
+  }
   
   if (!response.ok) {
     const error = await response.json().catch(() => ({}));
@@ -41,6 +49,13 @@ async function fetchApi(endpoint, options = {}) {
   return response.json();
 }
 
+/**
+ * Headers for a mutating request that may be retried safely.
+ */
+function idempotencyHeaders() {
+  return { 'Idempotency-Key': crypto.randomUUID() };
+}
+
 // ============ Lessons API ============
 
 export const lessonsApi = {
@@ -95,6 +110,7 @@ export const lessonsApi = {
    */
   completeLesson: (lessonId, score = 100) => fetchApi(`/lessons/lessons/${lessonId}/complete/`, {
     method: 'POST',
+    headers: idempotencyHeaders(),
     body: JSON.stringify({ score }),
   }),
   
@@ -139,6 +155,11 @@ export const stocksApi = {
    */
   getStockQuote: (id) => fetchApi(`/stocks/stocks/${id}/quote/`),
   
+  /**
+   * Get a stock's splits and dividends, latest first (type: 'split' or 'dividend').
+   */
+  getCorporateActions: (id, type) => fetchApi(`/stocks/stocks/${id}/corporate-actions/${type ? `?type=${type}` : ''}`),
+  
   /**
    * Initialize stocks from config.
    */
@@ -168,6 +189,7 @@ export const stocksApi = {
    */
   executeTrade: (stockId, shares, transactionType) => fetchApi('/stocks/trade/', {
     method: 'POST',
+    headers: idempotencyHeaders(),
     body: JSON.stringify({
       stock_id: stockId,
       shares,
@@ -176,10 +198,138 @@ export const stocksApi = {
   }),
   
   /**
-   * Get transaction history.
+   * Execute several trades atomically.
+   * orders: [{ stock_id, shares, transaction_type }, ...]
+   */
+  executeTradeBatch: (orders) => fetchApi('/stocks/trade/batch/', {
+    method: 'POST',
+    headers: idempotencyHeaders(),
+    body: JSON.stringify({ orders }),
+  }),
+  
+  /**
+   * Get the efficient frontier and the orders rebalancing the portfolio
+   * (send rebalance.orders to executeTradeBatch to apply them).
+   */
+  getPortfolioOptimization: (objective = 'max_sharpe') => fetchApi(`/stocks/portfolio/optimize/?objective=${objective}`),
+
+  /**
+   * Backtest a strategy over stored daily prices.
+   * strategy: { entry: [rule, ...], exit?: [rule, ...], symbols?, start?, end?,
+   *             initial_capital?, position_size? }
+   */
+  runBacktest: (strategy) => fetchApi('/stocks/backtest/', {
+    method: 'POST',
+    body: JSON.stringify(strategy),
+  }),
+  
+  /**
+   * Start a time-travel scenario at a historical date.
+   */
+  createScenario: (startDate, initialBalance = null, name = '') => fetchApi('/stocks/scenarios/', {
+    method: 'POST',
+    body: JSON.stringify({
+      start_date: startDate,
+      name,
+      ...(initialBalance != null && { initial_balance: initialBalance }),
+    }),
+  }),
+
+  /**
+   * Move a scenario's clock forward by a number of days.
+   */
+  advanceScenario: (scenarioId, days) => fetchApi(`/stocks/scenarios/${scenarioId}/advance/`, {
+    method: 'POST',
+    body: JSON.stringify({ days }),
+  }),
+
+  /**
+   * Trade inside a scenario at the prices of its clock.
+   */
+  scenarioTrade: (scenarioId, stockId, shares, transactionType) => fetchApi(`/stocks/scenarios/${scenarioId}/trade/`, {
+    method: 'POST',
+    body: JSON.stringify({ stock_id: stockId, shares, transaction_type: transactionType }),
+  }),
+
+  /**
+   * Get a scenario's prices and valuation as of its clock.
+   */
+  getScenarioPrices: (scenarioId) => fetchApi(`/stocks/scenarios/${scenarioId}/prices/`),
+  getScenarioSummary: (scenarioId) => fetchApi(`/stocks/scenarios/${scenarioId}/summary/`),
+
+  /**
+   * Get the user's limit/stop orders (optionally filtered by status).
+   */
+  getOrders: (status = null) => {
+    const params = status ? `?status=${status}` : '';
+    return fetchApi(`/stocks/orders/${params}`);
+  },
+  
+  /**
+   * Place a limit or stop order.
+   */
+  placeOrder: (stockId, shares, transactionType, orderType, triggerPrice) => fetchApi('/stocks/orders/', {
+    method: 'POST',
+    body: JSON.stringify({
+      stock_id: stockId,
+      shares,
+      transaction_type: transactionType,
+      order_type: orderType,
+      trigger_price: triggerPrice,
+    }),
+  }),
+  
+  /**
+   * Cancel an open order.
+   */
+  cancelOrder: (orderId) => fetchApi(`/stocks/orders/${orderId}/cancel/`, {
+    method: 'POST',
+  }),
+  
+  /**
+   * Get the user's recurring buys.
+   */
+  getRecurringOrders: () => fetchApi('/stocks/recurring-orders/'),
+  
+  /**
+   * Set up a recurring buy of a dollar amount
+   * (frequency: 'daily', 'weekly', 'biweekly' or 'monthly').
    */
-    getTransactions: () => {
-    return fetchApi(`/stocks/transactions/`);
+  createRecurringOrder: (stockId, amount, frequency = 'weekly') => fetchApi('/stocks/recurring-orders/', {
+    method: 'POST',
+    body: JSON.stringify({ stock_id: stockId, amount, frequency }),
+  }),
+  
+  /**
+   * Change a recurring buy, e.g. { is_active: false } to pause it.
+   */
+  updateRecurringOrder: (orderId, changes) => fetchApi(`/stocks/recurring-orders/${orderId}/`, {
+    method: 'PATCH',
+    body: JSON.stringify(changes),
+  }),
+  
+  /**
+   * Delete a recurring buy.
+   */
+  deleteRecurringOrder: (orderId) => fetchApi(`/stocks/recurring-orders/${orderId}/`, {
+    method: 'DELETE',
+  }),
+  
+  /**
+   * Get a page of transaction history, newest first.
+   * Pass the `next` URL of the previous page to continue from it.
+   * Filters: stockId, transactionType ('buy' or 'sell').
+   */
+  getTransactions: ({ next, stockId, transactionType } = {}) => {
+    if (next) {
+      const { pathname, search } = new URL(next, window.location.origin);
+      return fetchApi(`${pathname.replace(API_BASE_URL, '')}${search}`);
+    }
+    const params = new URLSearchParams();
+    if (stockId) params.set('stock_id', stockId);
+    if (transactionType) params.set('transaction_type', transactionType);
+    const query = params.toString();
+    return fetchApi(`/stocks/transactions/${query ? `?${query}` : ''}`);
   },
   
   /**
@@ -203,6 +353,76 @@ export const stocksApi = {
   removeFromWatchlist: (watchlistId) => fetchApi(`/stocks/watchlist/${watchlistId}/`, {
     method: 'DELETE',
   }),
+  
+  /**
+   * Get the user's price alerts (activeOnly: only those not fired yet).
+   */
+  getAlerts: (activeOnly = false) => fetchApi(`/stocks/alerts/${activeOnly ? '?active=true' : ''}`),
+  
+  /**
+   * Set a price alert on a watchlist entry: condition 'above' or 'below'
+   * with a target price, or 'move' with a percent.
+   * Fired alerts arrive over ws/user/ as 'price_alerts' messages.
+   */
+  createAlert: (watchlistId, condition, { targetPrice, percent } = {}) => fetchApi('/stocks/alerts/', {
+    method: 'POST',
+    body: JSON.stringify({
+      watchlist_id: watchlistId,
+      condition,
+      ...(targetPrice !== undefined && { target_price: targetPrice }),
+      ...(percent !== undefined && { percent }),
+    }),
+  }),
+  
+  /**
+   * Delete a price alert.
+   */
+  deleteAlert: (alertId) => fetchApi(`/stocks/alerts/${alertId}/`, {
+    method: 'DELETE',
+  }),
+  
+  /**
+   * Users ranked by portfolio return: the top `limit` and the
+   * `window` entries above and below the current user.
+   */
+  getReturnLeaderboard: (limit = 20, window = 5) => fetchApi(`/stocks/leaderboard/?limit=${limit}&window=${window}`),
+  
+  /**
+   * Get the leagues the user is a member of.
+   */
+  getLeagues: () => fetchApi('/stocks/leagues/'),
+  
+  /**
+   * Create a league starting on startDate (YYYY-MM-DD); the creator joins it.
+   */
+  createLeague: (name, startDate, startingBalance = null) => fetchApi('/stocks/leagues/', {
+    method: 'POST',
+    body: JSON.stringify({
+      name,
+      start_date: startDate,
+      ...(startingBalance !== null && { starting_balance: startingBalance }),
+    }),
+  }),
+  
+  /**
+   * Join a league with its invite code.
+   */
+  joinLeague: (inviteCode) => fetchApi('/stocks/leagues/join/', {
+    method: 'POST',
+    body: JSON.stringify({ invite_code: inviteCode }),
+  }),
+  
+  /**
+   * Leave a league.
+   */
+  leaveLeague: (leagueId) => fetchApi(`/stocks/leagues/${leagueId}/leave/`, {
+    method: 'POST',
+  }),
+  
+  /**
+   * A league's members ranked by return since it started.
+   */
+  getLeagueLeaderboard: (leagueId, limit = 20, window = 5) => fetchApi(`/stocks/leagues/${leagueId}/leaderboard/?limit=${limit}&window=${window}`),
 };
 
 // ============ Users API ============